@@ -0,0 +1,927 @@
+# admin.py - Admin dashboard and content management
+from datetime import datetime
+
+from flask import Blueprint, abort, current_app, flash, jsonify, redirect, render_template, request, session, url_for
+from werkzeug.http import parse_content_range_header
+
+from extensions import chunked_uploads, content_store, full_text_search, job_queue, page_cache, pool_stats
+from helpers import allowed_file, enqueue_post_save_jobs, invalidate_global_vars, release_uploads
+from models import (db, BlogPost, ContactMessage, Event, HomepageVideo, Job, PodcastEpisode, StatCounter,
+                    UpcomingEpisode, User, STAT_COUNTERS, bump_content_version, bump_counter, rebuild_stat_counters)
+from uploads import UploadError
+
+"""
+Admin blueprint, mounted under /admin: the dashboard, content and message
+management, background jobs and chunked uploads. Every view checks for an
+admin session; logging in and out lives in the auth blueprint.
+"""
+
+bp = Blueprint('admin', __name__, url_prefix='/admin')
+
+
+def message_list_query():
+    """Message headers (no body) with the sender's account loaded in the same query"""
+    return ContactMessage.query.options(
+        db.load_only(ContactMessage.id, ContactMessage.user_id, ContactMessage.name, ContactMessage.email,
+                     ContactMessage.subject, ContactMessage.created_at, ContactMessage.is_read),
+        db.joinedload(ContactMessage.user).load_only(User.id, User.username)
+    )
+
+def get_dashboard_stats():
+    """Read all dashboard counters in a single query"""
+    stats = dict(db.session.execute(db.select(StatCounter.name, StatCounter.value)).all())
+    if any(name not in stats for name in STAT_COUNTERS):
+        stats = rebuild_stat_counters()
+    return stats
+
+
+@bp.route('/dashboard')
+def admin_dashboard():
+    """Admin dashboard"""
+    if 'admin_id' not in session:
+        flash('Please log in to access the admin dashboard.', 'error')
+        return redirect(url_for('auth.admin_login'))  
+    # Get statistics from the maintained counters
+    stats = get_dashboard_stats()
+    recent_messages = message_list_query().options(db.undefer(ContactMessage.message)).order_by(
+        ContactMessage.id.desc()).limit(5).all()
+    return render_template('admin_dashboard.html', 
+                          user_count=stats['users'], 
+                          message_count=stats['messages'],
+                          unread_count=stats['unread_messages'],
+                          blog_count=stats['blog_posts'],
+                          episode_count=stats['episodes'],
+                          recent_messages=recent_messages
+    )
+# Admin content management routes
+@bp.route('/blog')
+def admin_blog():
+    """Admin blog management"""
+    if 'admin_id' not in session:
+        flash('Please log in to access the admin dashboard.', 'error')
+        return redirect(url_for('auth.admin_login'))  
+    blog_posts = BlogPost.query.order_by(BlogPost.created_at.desc()).all()
+    return render_template('admin_blog.html', blog_posts=blog_posts)
+@bp.route('/blog/new', methods=['GET', 'POST'])
+def admin_new_blog():
+    """Create new blog post"""
+    if 'admin_id' not in session:
+        flash('Please log in to access the admin dashboard.', 'error')
+        return redirect(url_for('auth.admin_login'))  
+    if request.method == 'POST':
+        title = request.form.get('title')
+        excerpt = request.form.get('excerpt')
+        content = request.form.get('content')
+        author = request.form.get('author')
+        publish_date = request.form.get('publish_date')
+        is_published = 'is_published' in request.form      
+        # Handle image upload
+        if 'image' not in request.files:
+            flash('No file selected', 'error')
+            return redirect(request.url)      
+        file = request.files['image']      
+        if file.filename == '':
+            flash('No file selected', 'error')
+            return redirect(request.url)      
+        if file and allowed_file(file.filename):
+            image_url = content_store.save(file)          
+            # Create new blog post
+            new_blog = BlogPost(
+                title=title,
+                excerpt=excerpt,
+                content=content,
+                author=author,
+                image=image_url,
+                publish_date=datetime.strptime(publish_date, '%Y-%m-%d') if publish_date else datetime.utcnow(),
+                is_published=is_published
+            )          
+            try:
+                db.session.add(new_blog)
+                db.session.commit()
+                page_cache.invalidate('blog')
+                enqueue_post_save_jobs([new_blog.image], [url_for('public.homepage'), url_for('public.blog')])
+                flash('Blog post created successfully!', 'success')
+                return redirect(url_for('admin.admin_blog'))
+            except Exception as e:
+                db.session.rollback()
+                flash('There was an error creating the blog post. Please try again.', 'error')      
+        else:
+            flash('Invalid file type. Allowed types: ' + ', '.join(current_app.config['ALLOWED_EXTENSIONS']), 'error')  
+    return render_template('admin_blog_form.html')
+@bp.route('/blog/edit/<int:post_id>', methods=['GET', 'POST'])
+def admin_edit_blog(post_id):
+    """Edit blog post"""
+    if 'admin_id' not in session:
+        flash('Please log in to access the admin dashboard.', 'error')
+        return redirect(url_for('auth.admin_login'))  
+    post = BlogPost.query.get_or_404(post_id)  
+    if request.method == 'POST':
+        post.title = request.form.get('title')
+        post.excerpt = request.form.get('excerpt')
+        post.content = request.form.get('content')
+        post.author = request.form.get('author')
+        publish_date = request.form.get('publish_date')
+        post.is_published = 'is_published' in request.form      
+        if publish_date:
+            post.publish_date = datetime.strptime(publish_date, '%Y-%m-%d')      
+        old_image = post.image
+        # Handle image upload if a new file is provided
+        if 'image' in request.files:
+            file = request.files['image']
+            if file and file.filename != '' and allowed_file(file.filename):
+                post.image = content_store.save(file)      
+        try:
+            db.session.commit()
+            release_uploads(old_image)
+            page_cache.invalidate('blog', f'blog:{post_id}')
+            enqueue_post_save_jobs(
+                [post.image] if post.image != old_image else [],
+                [url_for('public.homepage'), url_for('public.blog'), url_for('public.blog_post', post_id=post_id)]
+            )
+            flash('Blog post updated successfully!', 'success')
+            return redirect(url_for('admin.admin_blog'))
+        except Exception as e:
+            db.session.rollback()
+            flash('There was an error updating the blog post. Please try again.', 'error')  
+    return render_template('admin_blog_form.html', post=post)
+@bp.route('/blog/delete/<int:post_id>')
+def admin_delete_blog(post_id):
+    """Delete blog post"""
+    if 'admin_id' not in session:
+        flash('Please log in to access the admin dashboard.', 'error')
+        return redirect(url_for('auth.admin_login'))  
+    post = BlogPost.query.get_or_404(post_id)  
+    image_url = post.image
+    try:
+        db.session.delete(post)
+        db.session.commit()
+        release_uploads(image_url)
+        page_cache.invalidate('blog', f'blog:{post_id}')
+        flash('Blog post deleted successfully!', 'success')
+    except Exception as e:
+        db.session.rollback()
+        flash('There was an error deleting the blog post. Please try again.', 'error')  
+    return redirect(url_for('admin.admin_blog'))
+@bp.route('/episodes')
+def admin_episodes():
+    """Admin episodes management"""
+    if 'admin_id' not in session:
+        flash('Please log in to access the admin dashboard.', 'error')
+        return redirect(url_for('auth.admin_login'))  
+    episodes = PodcastEpisode.query.order_by(PodcastEpisode.episode_number.desc()).all()
+    upcoming_episodes = UpcomingEpisode.query.order_by(UpcomingEpisode.scheduled_date.asc()).all()  
+    return render_template('admin_episodes.html', 
+                          episodes=episodes, 
+                          upcoming_episodes=upcoming_episodes
+    )
+@bp.route('/episodes/new', methods=['GET', 'POST'])
+def admin_new_episode():
+    """Create new podcast episode"""
+    if 'admin_id' not in session:
+        flash('Please log in to access the admin dashboard.', 'error')
+        return redirect(url_for('auth.admin_login'))  
+    if request.method == 'POST':
+        title = request.form.get('title')
+        description = request.form.get('description')
+        episode_number = request.form.get('episode_number')
+        publish_date = request.form.get('publish_date')
+        is_published = 'is_published' in request.form      
+        # Files sent through the chunked upload endpoint arrive as upload ids; they are
+        # only claimed once the episode is saved, so a failed save can be resubmitted
+        upload_ids = (request.form.get('image_upload_id', ''), request.form.get('audio_upload_id', ''))
+        image_url = chunked_uploads.completed_url(upload_ids[0], 'episode_image')
+        audio_url = chunked_uploads.completed_url(upload_ids[1], 'episode_audio')
+        saved_urls = []
+        # Handle image upload
+        image_file = request.files.get('image')
+        audio_file = request.files.get('audio')      
+        if not image_url and image_file and image_file.filename != '' and allowed_file(image_file.filename):
+            image_url = content_store.save(image_file)
+            saved_urls.append(image_url)
+        if not audio_url and audio_file and audio_file.filename != '' and allowed_file(audio_file.filename):
+            audio_url = content_store.save(audio_file)
+            saved_urls.append(audio_url)
+        if not image_url or not audio_url:
+            release_uploads(*saved_urls)
+            flash('Both image and audio files are required', 'error')
+            return redirect(request.url)      
+        # Create new episode
+        new_episode = PodcastEpisode(
+            title=title,
+            description=description,
+            episode_number=episode_number,
+            image_url=image_url,
+            audio_url=audio_url,
+            publish_date=datetime.strptime(publish_date, '%Y-%m-%d') if publish_date else datetime.utcnow(),
+            is_published=is_published
+        )      
+        try:
+            db.session.add(new_episode)
+            db.session.commit()
+            chunked_uploads.claim(*upload_ids)
+            page_cache.invalidate('episodes')
+            enqueue_post_save_jobs(
+                [image_url, audio_url], [url_for('public.homepage')],
+                jobs=[('extract_audio_metadata', {'episode_id': new_episode.id})]  # also rebuilds the feed
+            )
+            flash('Episode created successfully!', 'success')
+            return redirect(url_for('admin.admin_episodes'))
+        except Exception as e:
+            db.session.rollback()
+            release_uploads(*saved_urls)
+            flash('There was an error creating the episode. Please try again.', 'error')  
+    return render_template('admin_episode_form.html')
+@bp.route('/upcoming/new', methods=['GET', 'POST'])
+def admin_new_upcoming():
+    """Create new upcoming episode"""
+    if 'admin_id' not in session:
+        flash('Please log in to access the admin dashboard.', 'error')
+        return redirect(url_for('auth.admin_login'))  
+    if request.method == 'POST':
+        title = request.form.get('title')
+        description = request.form.get('description')
+        scheduled_date = request.form.get('scheduled_date')      
+        # Handle image upload
+        image_file = request.files['image']      
+        if image_file and image_file.filename != '' and allowed_file(image_file.filename):
+            image_url = content_store.save(image_file)          
+            # Create new upcoming episode
+            new_upcoming = UpcomingEpisode(
+                title=title,
+                description=description,
+                scheduled_date=datetime.strptime(scheduled_date, '%Y-%m-%d'),
+                image_url=image_url
+            )          
+            try:
+                db.session.add(new_upcoming)
+                db.session.commit()
+                page_cache.invalidate('upcoming')
+                enqueue_post_save_jobs([image_url], [url_for('public.homepage')])
+                flash('Upcoming episode created successfully!', 'success')
+                return redirect(url_for('admin.admin_episodes'))
+            except Exception as e:
+                db.session.rollback()
+                flash('There was an error creating the upcoming episode. Please try again.', 'error')
+        else:
+            flash('Image file is required', 'error')  
+    return render_template('admin_upcoming_form.html')
+@bp.route('/events')
+def admin_events():
+    """Admin events management"""
+    if 'admin_id' not in session:
+        flash('Please log in to access the admin dashboard.', 'error')
+        return redirect(url_for('auth.admin_login'))  
+    events = Event.query.order_by(Event.event_date.desc()).all()
+    return render_template('admin_events.html', events=events)
+@bp.route('/events/new', methods=['GET', 'POST'])
+def admin_new_event():
+    """Create new event"""
+    if 'admin_id' not in session:
+        flash('Please log in to access the admin dashboard.', 'error')
+        return redirect(url_for('auth.admin_login'))  
+    if request.method == 'POST':
+        title = request.form.get('title')
+        description = request.form.get('description')
+        event_date = request.form.get('event_date')
+        location = request.form.get('location')      
+        # Handle image upload
+        image_file = request.files['image']      
+        if image_file and image_file.filename != '' and allowed_file(image_file.filename):
+            image_url = content_store.save(image_file)          
+            # Create new event
+            new_event = Event(
+                title=title,
+                description=description,
+                event_date=datetime.strptime(event_date, '%Y-%m-%d'),
+                location=location,
+                image_url=image_url
+            )          
+            try:
+                db.session.add(new_event)
+                db.session.commit()
+                page_cache.invalidate('events')
+                enqueue_post_save_jobs([image_url], [url_for('public.homepage'), url_for('public.events')])
+                flash('Event created successfully!', 'success')
+                return redirect(url_for('admin.admin_events'))
+            except Exception as e:
+                db.session.rollback()
+                flash('There was an error creating the event. Please try again.', 'error')
+        else:
+            flash('Image file is required', 'error')  
+    return render_template('admin_event_form.html')
+@bp.route('/videos')
+def admin_videos():
+    """Admin videos management"""
+    if 'admin_id' not in session:
+        flash('Please log in to access the admin dashboard.', 'error')
+        return redirect(url_for('auth.admin_login'))  
+    videos = HomepageVideo.query.order_by(HomepageVideo.created_at.desc()).all()
+    return render_template('admin_videos.html', videos=videos)
+@bp.route('/videos/new', methods=['GET', 'POST'])
+def admin_new_video():
+    """Create new homepage video"""
+    if 'admin_id' not in session:
+        flash('Please log in to access the admin dashboard.', 'error')
+        return redirect(url_for('auth.admin_login'))  
+    if request.method == 'POST':
+        title = request.form.get('title')
+        description = request.form.get('description')
+        video_url = request.form.get('video_url')
+        is_active = 'is_active' in request.form      
+        # Create new video
+        new_video = HomepageVideo(
+            title=title,
+            description=description,
+            video_url=video_url,
+            is_active=is_active
+        )      
+        try:
+            db.session.add(new_video)
+            db.session.commit()
+            invalidate_global_vars()
+            flash('Video added successfully!', 'success')
+            return redirect(url_for('admin.admin_videos'))
+        except Exception as e:
+            db.session.rollback()
+            flash('There was an error adding the video. Please try again.', 'error')  
+    return render_template('admin_video_form.html')
+@bp.route('/messages')
+def admin_messages():
+    """Admin contact messages management"""
+    if 'admin_id' not in session:
+        flash('Please log in to access the admin dashboard.', 'error')
+        return redirect(url_for('auth.admin_login'))  
+    status = request.args.get('status')
+    query = message_list_query()
+    if status == 'unread':
+        query = query.filter(ContactMessage.is_read.is_(False))
+    elif status == 'read':
+        query = query.filter(ContactMessage.is_read.is_(True))
+    # Messages are only ever appended, so id order is arrival order and the primary key
+    # serves as the keyset (created_at has second precision, so it ties within a flood)
+    before = request.args.get('before', type=int)
+    if before:
+        query = query.filter(ContactMessage.id < before)
+    per_page = current_app.config['ADMIN_MESSAGES_PER_PAGE']
+    rows = query.order_by(ContactMessage.id.desc()).limit(per_page + 1).all()
+    messages = rows[:per_page]
+    next_cursor = messages[-1].id if len(rows) > per_page else None
+    stats = get_dashboard_stats()
+    return render_template('admin_messages.html', messages=messages, next_cursor=next_cursor, status=status,
+                           message_count=stats['messages'], unread_count=stats['unread_messages'])
+@bp.route('/messages/<int:message_id>/toggle-read')
+def admin_toggle_message_read(message_id):
+    """Toggle message read status"""
+    if 'admin_id' not in session:
+        flash('Please log in to access the admin dashboard.', 'error')
+        return redirect(url_for('auth.admin_login'))  
+    message = ContactMessage.query.get_or_404(message_id)
+    message.is_read = not message.is_read  
+    try:
+        db.session.commit()
+        flash('Message status updated!', 'success')
+    except Exception as e:
+        db.session.rollback()
+        flash('There was an error updating the message status.', 'error')  
+    return redirect(url_for('admin.admin_messages'))
+@bp.route('/messages/<int:message_id>/delete')
+def admin_delete_message(message_id):
+    """Delete contact message"""
+    if 'admin_id' not in session:
+        flash('Please log in to access the admin dashboard.', 'error')
+        return redirect(url_for('auth.admin_login'))  
+    message = ContactMessage.query.get_or_404(message_id)  
+    try:
+        db.session.delete(message)
+        db.session.commit()
+        flash('Message deleted successfully!', 'success')
+    except Exception as e:
+        db.session.rollback()
+        flash('There was an error deleting the message.', 'error')  
+    return redirect(url_for('admin.admin_messages'))
+
+@bp.route('/videos/edit/<int:video_id>', methods=['GET', 'POST'])
+def admin_edit_video(video_id):
+    """Edit homepage video"""
+    if 'admin_id' not in session:
+        flash('Please log in to access the admin dashboard.', 'error')
+        return redirect(url_for('auth.admin_login'))
+    
+    video = HomepageVideo.query.get_or_404(video_id)
+    
+    if request.method == 'POST':
+        video.title = request.form.get('title')
+        video.description = request.form.get('description')
+        video.video_url = request.form.get('video_url')
+        video.is_active = 'is_active' in request.form
+        
+        try:
+            db.session.commit()
+            invalidate_global_vars()
+            flash('Video updated successfully!', 'success')
+            return redirect(url_for('admin.admin_videos'))
+        except Exception as e:
+            db.session.rollback()
+            flash('There was an error updating the video. Please try again.', 'error')
+    
+    return render_template('admin_video_form.html', video=video)
+
+@bp.route('/videos/delete/<int:video_id>')
+def admin_delete_video(video_id):
+    """Delete homepage video"""
+    if 'admin_id' not in session:
+        flash('Please log in to access the admin dashboard.', 'error')
+        return redirect(url_for('auth.admin_login'))
+    
+    video = HomepageVideo.query.get_or_404(video_id)
+    
+    try:
+        db.session.delete(video)
+        db.session.commit()
+        invalidate_global_vars()
+        flash('Video deleted successfully!', 'success')
+    except Exception as e:
+        db.session.rollback()
+        flash('There was an error deleting the video. Please try again.', 'error')
+    
+    return redirect(url_for('admin.admin_videos'))
+
+@bp.route('/episodes/edit/<int:episode_id>', methods=['GET', 'POST'])
+def admin_edit_episode(episode_id):
+    """Edit podcast episode"""
+    if 'admin_id' not in session:
+        flash('Please log in to access the admin dashboard.', 'error')
+        return redirect(url_for('auth.admin_login'))
+    
+    episode = PodcastEpisode.query.get_or_404(episode_id)
+    
+    if request.method == 'POST':
+        episode.title = request.form.get('title')
+        episode.description = request.form.get('description')
+        episode.episode_number = request.form.get('episode_number')
+        publish_date = request.form.get('publish_date')
+        episode.is_published = 'is_published' in request.form
+        
+        if publish_date:
+            episode.publish_date = datetime.strptime(publish_date, '%Y-%m-%d')
+        
+        old_urls = (episode.image_url, episode.audio_url)
+        # Files sent through the chunked upload endpoint arrive as upload ids; they are
+        # only claimed once the episode is saved, so a failed save can be resubmitted
+        upload_ids = (request.form.get('image_upload_id', ''), request.form.get('audio_upload_id', ''))
+        image_url = chunked_uploads.completed_url(upload_ids[0], 'episode_image')
+        audio_url = chunked_uploads.completed_url(upload_ids[1], 'episode_audio')
+        saved_urls = []
+        if image_url:
+            episode.image_url = image_url
+        if audio_url:
+            episode.audio_url = audio_url
+        
+        # Handle image upload if a new file is provided
+        if not image_url and 'image' in request.files:
+            file = request.files['image']
+            if file and file.filename != '' and allowed_file(file.filename):
+                episode.image_url = content_store.save(file)
+                saved_urls.append(episode.image_url)
+        
+        # Handle audio upload if a new file is provided
+        if not audio_url and 'audio' in request.files:
+            file = request.files['audio']
+            if file and file.filename != '' and allowed_file(file.filename):
+                episode.audio_url = content_store.save(file)
+                saved_urls.append(episode.audio_url)
+        
+        try:
+            db.session.commit()
+            chunked_uploads.claim(*upload_ids)
+            release_uploads(*old_urls)
+            page_cache.invalidate('episodes', f'episode:{episode_id}')
+            enqueue_post_save_jobs(
+                [url for url in (episode.image_url, episode.audio_url) if url not in old_urls],
+                [url_for('public.homepage'), url_for('public.episode_detail', episode_id=episode_id)],
+                # Metadata extraction rebuilds the feed once it has the new duration and size
+                jobs=[('extract_audio_metadata', {'episode_id': episode_id})] if episode.audio_url != old_urls[1]
+                else [('build_feed', {})]
+            )
+            flash('Episode updated successfully!', 'success')
+            return redirect(url_for('admin.admin_episodes'))
+        except Exception as e:
+            db.session.rollback()
+            release_uploads(*saved_urls)
+            flash('There was an error updating the episode. Please try again.', 'error')
+    
+    return render_template('admin_episode_form.html', episode=episode)
+
+@bp.route('/episodes/delete/<int:episode_id>')
+def admin_delete_episode(episode_id):
+    """Delete podcast episode"""
+    if 'admin_id' not in session:
+        flash('Please log in to access the admin dashboard.', 'error')
+        return redirect(url_for('auth.admin_login'))
+    
+    episode = PodcastEpisode.query.get_or_404(episode_id)
+    
+    upload_urls = (episode.image_url, episode.audio_url)
+    try:
+        db.session.delete(episode)
+        db.session.commit()
+        release_uploads(*upload_urls)
+        page_cache.invalidate('episodes', f'episode:{episode_id}')
+        enqueue_post_save_jobs(jobs=[('build_feed', {})])
+        flash('Episode deleted successfully!', 'success')
+    except Exception as e:
+        db.session.rollback()
+        flash('There was an error deleting the episode. Please try again.', 'error')
+    
+    return redirect(url_for('admin.admin_episodes'))
+
+@bp.route('/upcoming/edit/<int:upcoming_id>', methods=['GET', 'POST'])
+def admin_edit_upcoming(upcoming_id):
+    """Edit upcoming episode"""
+    if 'admin_id' not in session:
+        flash('Please log in to access the admin dashboard.', 'error')
+        return redirect(url_for('auth.admin_login'))
+    
+    upcoming = UpcomingEpisode.query.get_or_404(upcoming_id)
+    
+    if request.method == 'POST':
+        upcoming.title = request.form.get('title')
+        upcoming.description = request.form.get('description')
+        scheduled_date = request.form.get('scheduled_date')
+        
+        if scheduled_date:
+            upcoming.scheduled_date = datetime.strptime(scheduled_date, '%Y-%m-%d')
+        
+        old_image = upcoming.image_url
+        # Handle image upload if a new file is provided
+        if 'image' in request.files:
+            file = request.files['image']
+            if file and file.filename != '' and allowed_file(file.filename):
+                upcoming.image_url = content_store.save(file)
+        
+        try:
+            db.session.commit()
+            release_uploads(old_image)
+            page_cache.invalidate('upcoming')
+            enqueue_post_save_jobs(
+                [upcoming.image_url] if upcoming.image_url != old_image else [],
+                [url_for('public.homepage')]
+            )
+            flash('Upcoming episode updated successfully!', 'success')
+            return redirect(url_for('admin.admin_episodes'))
+        except Exception as e:
+            db.session.rollback()
+            flash('There was an error updating the upcoming episode. Please try again.', 'error')
+    
+    return render_template('admin_upcoming_form.html', upcoming=upcoming)
+
+@bp.route('/upcoming/delete/<int:upcoming_id>')
+def admin_delete_upcoming(upcoming_id):
+    """Delete upcoming episode"""
+    if 'admin_id' not in session:
+        flash('Please log in to access the admin dashboard.', 'error')
+        return redirect(url_for('auth.admin_login'))
+    
+    upcoming = UpcomingEpisode.query.get_or_404(upcoming_id)
+    
+    image_url = upcoming.image_url
+    try:
+        db.session.delete(upcoming)
+        db.session.commit()
+        release_uploads(image_url)
+        page_cache.invalidate('upcoming')
+        flash('Upcoming episode deleted successfully!', 'success')
+    except Exception as e:
+        db.session.rollback()
+        flash('There was an error deleting the upcoming episode. Please try again.', 'error')
+    
+    return redirect(url_for('admin.admin_episodes'))
+
+@bp.route('/events/edit/<int:event_id>', methods=['GET', 'POST'])
+def admin_edit_event(event_id):
+    """Edit event"""
+    if 'admin_id' not in session:
+        flash('Please log in to access the admin dashboard.', 'error')
+        return redirect(url_for('auth.admin_login'))
+    
+    event = Event.query.get_or_404(event_id)
+    
+    if request.method == 'POST':
+        event.title = request.form.get('title')
+        event.description = request.form.get('description')
+        event_date = request.form.get('event_date')
+        event.location = request.form.get('location')
+        
+        if event_date:
+            event.event_date = datetime.strptime(event_date, '%Y-%m-%d')
+        
+        old_image = event.image_url
+        # Handle image upload if a new file is provided
+        if 'image' in request.files:
+            file = request.files['image']
+            if file and file.filename != '' and allowed_file(file.filename):
+                event.image_url = content_store.save(file)
+        
+        try:
+            db.session.commit()
+            release_uploads(old_image)
+            page_cache.invalidate('events')
+            enqueue_post_save_jobs(
+                [event.image_url] if event.image_url != old_image else [],
+                [url_for('public.homepage'), url_for('public.events')]
+            )
+            flash('Event updated successfully!', 'success')
+            return redirect(url_for('admin.admin_events'))
+        except Exception as e:
+            db.session.rollback()
+            flash('There was an error updating the event. Please try again.', 'error')
+    
+    return render_template('admin_event_form.html', event=event)
+
+@bp.route('/events/delete/<int:event_id>')
+def admin_delete_event(event_id):
+    """Delete event"""
+    if 'admin_id' not in session:
+        flash('Please log in to access the admin dashboard.', 'error')
+        return redirect(url_for('auth.admin_login'))
+    
+    event = Event.query.get_or_404(event_id)
+    
+    image_url = event.image_url
+    try:
+        db.session.delete(event)
+        db.session.commit()
+        release_uploads(image_url)
+        page_cache.invalidate('events')
+        flash('Event deleted successfully!', 'success')
+    except Exception as e:
+        db.session.rollback()
+        flash('There was an error deleting the event. Please try again.', 'error')
+    
+    return redirect(url_for('admin.admin_events'))
+
+@bp.route('/jobs')
+def admin_jobs():
+    """Background job status"""
+    if 'admin_id' not in session:
+        flash('Please log in to access the admin dashboard.', 'error')
+        return redirect(url_for('auth.admin_login'))
+    status = request.args.get('status')
+    query = Job.query
+    if status:
+        query = query.filter_by(status=status)
+    jobs = query.order_by(Job.id.desc()).limit(100).all()
+    status_counts = dict(db.session.execute(
+        db.select(Job.status, db.func.count()).group_by(Job.status)
+    ).all())
+    return render_template('admin_jobs.html', jobs=jobs, status=status, status_counts=status_counts)
+
+@bp.route('/jobs/<int:job_id>/retry')
+def admin_retry_job(job_id):
+    """Requeue a failed job"""
+    if 'admin_id' not in session:
+        flash('Please log in to access the admin dashboard.', 'error')
+        return redirect(url_for('auth.admin_login'))
+    job = Job.query.get_or_404(job_id)
+    try:
+        job_queue.retry(job)
+        flash('Job queued for another run.', 'success')
+    except Exception as e:
+        db.session.rollback()
+        flash('There was an error requeueing the job.', 'error')
+    return redirect(url_for('admin.admin_jobs'))
+
+# Chunked upload endpoints used by the episode form
+@bp.route('/uploads', methods=['POST'])
+def admin_start_upload():
+    """Start a resumable upload"""
+    if 'admin_id' not in session:
+        return jsonify({'error': 'Not logged in'}), 401
+    data = request.get_json(silent=True) or {}
+    try:
+        size = int(data.get('size', 0))
+    except (TypeError, ValueError):
+        size = None
+    try:
+        upload = chunked_uploads.start(data.get('kind'), data.get('filename'), size, allowed_file)
+    except UploadError as e:
+        return jsonify({'error': str(e)}), e.status
+    upload['chunk_size'] = current_app.config['UPLOAD_CHUNK_SIZE']
+    return jsonify(upload), 201
+
+@bp.route('/uploads/<upload_id>', methods=['GET', 'PUT'])
+def admin_upload_chunk(upload_id):
+    """Report the received offset (GET) or append one chunk (PUT with Content-Range)"""
+    if 'admin_id' not in session:
+        return jsonify({'error': 'Not logged in'}), 401
+    try:
+        if request.method == 'GET':
+            return jsonify(chunked_uploads.status(upload_id))
+        content_range = parse_content_range_header(request.headers.get('Content-Range'))
+        if content_range is None or content_range.start is None:
+            return jsonify({'error': 'Content-Range header is required'}), 400
+        offset = chunked_uploads.write_chunk(
+            upload_id, content_range.start, request.stream, request.content_length
+        )
+    except UploadError as e:
+        return jsonify({'error': str(e), 'offset': e.offset}), e.status
+    return jsonify({'id': upload_id, 'offset': offset})
+
+@bp.route('/uploads/<upload_id>/complete', methods=['POST'])
+def admin_complete_upload(upload_id):
+    """Verify a fully received upload and move it into the uploads folder"""
+    if 'admin_id' not in session:
+        return jsonify({'error': 'Not logged in'}), 401
+    data = request.get_json(silent=True) or {}
+    try:
+        upload = chunked_uploads.complete(upload_id, data.get('sha256'))
+    except UploadError as e:
+        return jsonify({'error': str(e), 'offset': e.offset}), e.status
+    return jsonify(upload)
+
+def bulk_selected_ids():
+    """Ids ticked in a bulk action form"""
+    return [int(value) for value in request.form.getlist('ids') if value.isdigit()]
+
+@bp.route('/messages/bulk', methods=['POST'])
+def admin_bulk_messages():
+    """Mark read/unread or delete many messages with a single statement"""
+    if 'admin_id' not in session:
+        flash('Please log in to access the admin dashboard.', 'error')
+        return redirect(url_for('auth.admin_login'))
+    action = request.form.get('action')
+    status = request.form.get('status') or None
+    if action not in ('mark_read', 'mark_unread', 'delete'):
+        abort(400)
+    if request.form.get('scope') == 'filter':
+        # Everything matching the inbox filter, optionally narrowed to one sender
+        conditions = []
+        if status == 'unread':
+            conditions.append(ContactMessage.is_read.isnot(True))
+        elif status == 'read':
+            conditions.append(ContactMessage.is_read.is_(True))
+        email = request.form.get('email', '').strip()
+        if email:
+            conditions.append(ContactMessage.email == email)
+        if not conditions:
+            flash('Choose a status or sender to act on all matching messages.', 'error')
+            return redirect(url_for('admin.admin_messages', status=status))
+    else:
+        ids = bulk_selected_ids()
+        if not ids:
+            flash('No messages selected.', 'error')
+            return redirect(url_for('admin.admin_messages', status=status))
+        conditions = [ContactMessage.id.in_(ids)]
+    # Bulk statements bypass the mapper events, so the counters are adjusted here
+    try:
+        if action in ('mark_read', 'mark_unread'):
+            read = action == 'mark_read'
+            # Only rows that actually change, so rowcount is the exact counter delta
+            changed = ContactMessage.is_read.isnot(True) if read else ContactMessage.is_read.is_(True)
+            result = db.session.execute(
+                db.update(ContactMessage).where(*conditions, changed).values(is_read=read),
+                execution_options={'synchronize_session': False}
+            )
+            count = result.rowcount
+            bump_counter(db.session.connection(), 'unread_messages', -count if read else count)
+        else:
+            deleted = db.session.execute(
+                db.delete(ContactMessage).where(*conditions).returning(ContactMessage.is_read),
+                execution_options={'synchronize_session': False}
+            ).scalars().all()
+            count = len(deleted)
+            bump_counter(db.session.connection(), 'messages', -count)
+            bump_counter(db.session.connection(), 'unread_messages', -sum(1 for is_read in deleted if not is_read))
+        db.session.commit()
+        flash(f'{count} message(s) updated.' if action != 'delete' else f'{count} message(s) deleted.', 'success')
+    except Exception as e:
+        db.session.rollback()
+        flash('There was an error updating the messages. Please try again.', 'error')
+    return redirect(url_for('admin.admin_messages', status=status))
+
+# Content lists that support bulk actions
+BULK_CONTENT = {
+    'blog': {
+        'model': BlogPost,
+        'counter': 'blog_posts',
+        'upload_columns': (BlogPost.image,),
+        'tag': 'blog',
+        'item_tag': 'blog:{}',
+        'pages': ('public.homepage', 'public.blog'),
+        'list': 'admin.admin_blog'
+    },
+    'episodes': {
+        'model': PodcastEpisode,
+        'counter': 'episodes',
+        'upload_columns': (PodcastEpisode.image_url, PodcastEpisode.audio_url),
+        'tag': 'episodes',
+        'item_tag': 'episode:{}',
+        'pages': ('public.homepage',),
+        'list': 'admin.admin_episodes'
+    },
+    'events': {
+        'model': Event,
+        'counter': None,
+        'upload_columns': (Event.image_url,),
+        'tag': 'events',
+        'item_tag': None,
+        'pages': ('public.homepage', 'public.events'),
+        'list': 'admin.admin_events'
+    }
+}
+
+@bp.route('/<kind>/bulk', methods=['POST'])
+def admin_bulk_content(kind):
+    """Publish, unpublish or delete many posts, episodes or events with a single statement"""
+    if 'admin_id' not in session:
+        flash('Please log in to access the admin dashboard.', 'error')
+        return redirect(url_for('auth.admin_login'))
+    if kind not in BULK_CONTENT:
+        abort(404)
+    content = BULK_CONTENT[kind]
+    model = content['model']
+    action = request.form.get('action')
+    publishable = hasattr(model, 'is_published')
+    if action not in (('publish', 'unpublish', 'delete') if publishable else ('delete',)):
+        abort(400)
+    if request.form.get('scope') == 'filter' and publishable and request.form.get('status') in ('published', 'draft'):
+        conditions = [model.is_published.is_(request.form.get('status') == 'published')]
+    else:
+        ids = bulk_selected_ids()
+        if not ids:
+            flash('Nothing selected.', 'error')
+            return redirect(url_for(content['list']))
+        conditions = [model.id.in_(ids)]
+    released = []
+    try:
+        if action in ('publish', 'unpublish'):
+            publish = action == 'publish'
+            changed = model.is_published.isnot(True) if publish else model.is_published.is_(True)
+            affected = db.session.execute(
+                db.update(model).where(*conditions, changed).values(is_published=publish).returning(model.id),
+                execution_options={'synchronize_session': False}
+            ).scalars().all()
+        else:
+            rows = db.session.execute(
+                db.delete(model).where(*conditions).returning(model.id, *content['upload_columns']),
+                execution_options={'synchronize_session': False}
+            ).all()
+            affected = [row[0] for row in rows]
+            released = [url for row in rows for url in row[1:]]
+            # Bulk statements bypass the mapper events, so the counter is adjusted here
+            if content['counter']:
+                bump_counter(db.session.connection(), content['counter'], -len(affected))
+        if affected:
+            bump_content_version(db.session.connection(), content['tag'])
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        flash('There was an error applying the bulk action. Please try again.', 'error')
+        return redirect(url_for(content['list']))
+    release_uploads(*released)
+    tags = [content['tag']]
+    if content['item_tag']:
+        tags += [content['item_tag'].format(item_id) for item_id in affected]
+    page_cache.invalidate(*tags)
+    full_text_search.invalidate()
+    enqueue_post_save_jobs(
+        pages=[url_for(endpoint) for endpoint in content['pages']] if affected else [],
+        jobs=[('build_feed', {})] if kind == 'episodes' and affected else []
+    )
+    flash(f'{len(affected)} item(s) {"deleted" if action == "delete" else action + "ed"}.', 'success')
+    return redirect(url_for(content['list']))
+
+@bp.route('/pool-stats')
+def admin_pool_stats():
+    """Connection pool statistics for this worker process"""
+    if 'admin_id' not in session:
+        return jsonify({'error': 'Not logged in'}), 401
+    return jsonify(pool_stats.snapshot())
+
+@bp.route('/messages/view/<int:message_id>')
+def admin_view_message(message_id):
+    """View contact message"""
+    if 'admin_id' not in session:
+        flash('Please log in to access the admin dashboard.', 'error')
+        return redirect(url_for('auth.admin_login'))
+    
+    message = ContactMessage.query.options(db.joinedload(ContactMessage.user)).filter_by(id=message_id).first_or_404()
+    if not message.is_read:
+        message.is_read = True
+        db.session.commit()
+    
+    return render_template('admin_message_view.html', message=message)
+
+@bp.route('/messages/toggle-read/<int:message_id>')
+def admin_toggle_message_read_alt(message_id):  # Changed function name
+    """Toggle message read status"""
+    if 'admin_id' not in session:
+        flash('Please log in to access the admin dashboard.', 'error')
+        return redirect(url_for('auth.admin_login'))
+    
+    message = ContactMessage.query.get_or_404(message_id)
+    message.is_read = not message.is_read
+    db.session.commit()
+    
+    flash(f'Message marked as {"read" if message.is_read else "unread"}', 'success')
+    return redirect(url_for('admin.admin_messages'))
@@ -0,0 +1,239 @@
+# audio_meta.py - Duration and format metadata for uploaded audio
+import os
+import struct
+
+"""
+Audio metadata extraction in pure Python.
+Only headers are read: MP3 frame headers (plus the Xing/Info or VBRI header
+of VBR files), the RIFF chunks of WAV files and the atom tree of MP4/M4A
+files. Nothing is decoded and the file is never loaded into memory, so an
+hour-long episode is probed with a handful of small reads.
+"""
+
+# MPEG audio bitrates in kbps, indexed by [version is MPEG-1][layer][bitrate index]
+MP3_BITRATES = {
+    (True, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (True, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (True, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (False, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (False, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (False, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+# Sample rates indexed by the 2-bit version field (0 = MPEG-2.5, 2 = MPEG-2, 3 = MPEG-1)
+MP3_SAMPLE_RATES = {
+    0: [11025, 12000, 8000],
+    2: [22050, 24000, 16000],
+    3: [44100, 48000, 32000],
+}
+MP3_SYNC_SEARCH = 256 * 1024
+MP4_CONTAINERS = {b'moov', b'trak', b'mdia', b'minf', b'stbl'}
+
+
+def _metadata(duration, bitrate, sample_rate, byte_size, channels=None):
+    return {
+        'duration_seconds': int(round(duration)) if duration else None,
+        'bitrate': int(bitrate) if bitrate else None,
+        'sample_rate': int(sample_rate) if sample_rate else None,
+        'channels': channels,
+        'byte_size': byte_size
+    }
+
+
+def _parse_mp3_header(header):
+    """Decode a 4-byte MPEG audio frame header; returns None if it is not one"""
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version = (header[1] >> 3) & 3
+    layer = 4 - ((header[1] >> 1) & 3)
+    bitrate_index = header[2] >> 4
+    rate_index = (header[2] >> 2) & 3
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    mpeg1 = version == 3
+    bitrate = MP3_BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    sample_rate = MP3_SAMPLE_RATES[version][rate_index]
+    padding = (header[2] >> 1) & 1
+    if layer == 1:
+        samples = 384
+        frame_length = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples = 1152 if mpeg1 or layer == 2 else 576
+        frame_length = samples // 8 * bitrate // sample_rate + padding
+    return {
+        'mpeg1': mpeg1,
+        'layer': layer,
+        'bitrate': bitrate,
+        'sample_rate': sample_rate,
+        'samples': samples,
+        'frame_length': frame_length,
+        'channels': 1 if header[3] >> 6 == 3 else 2
+    }
+
+
+def probe_mp3(f, byte_size):
+    audio_start = 0
+    header = f.read(10)
+    if header[:3] == b'ID3' and len(header) == 10:
+        size = (header[6] << 21) | (header[7] << 14) | (header[8] << 7) | header[9]
+        audio_start = 10 + size + (10 if header[5] & 0x10 else 0)
+    audio_end = byte_size
+    if byte_size >= 128:
+        f.seek(byte_size - 128)
+        if f.read(3) == b'TAG':
+            audio_end -= 128
+
+    # Find the first frame whose successor also starts with a valid header
+    f.seek(audio_start)
+    window = f.read(MP3_SYNC_SEARCH)
+    frame = None
+    position = window.find(b'\xff')
+    while 0 <= position < len(window) - 4:
+        frame = _parse_mp3_header(window[position:position + 4])
+        if frame:
+            f.seek(audio_start + position + frame['frame_length'])
+            if _parse_mp3_header(f.read(4)):
+                break
+        frame = None
+        position = window.find(b'\xff', position + 1)
+    if frame is None:
+        return None
+    first_frame = audio_start + position
+    f.seek(first_frame)
+    data = f.read(min(frame['frame_length'], 256))
+
+    # VBR files carry the frame count in a Xing/Info or VBRI header inside the first frame
+    side_info = (17 if frame['channels'] == 1 else 32) if frame['mpeg1'] else (9 if frame['channels'] == 1 else 17)
+    frame_count = None
+    xing = data[4 + side_info:4 + side_info + 12]
+    if xing[:4] in (b'Xing', b'Info') and len(xing) >= 12:
+        flags = struct.unpack('>I', xing[4:8])[0]
+        if flags & 1:
+            frame_count = struct.unpack('>I', xing[8:12])[0]
+    elif data[36:40] == b'VBRI' and len(data) >= 54:
+        frame_count = struct.unpack('>I', data[50:54])[0]
+
+    audio_bytes = audio_end - first_frame
+    if frame_count:
+        duration = frame_count * frame['samples'] / frame['sample_rate']
+        bitrate = audio_bytes * 8 / duration if duration else frame['bitrate']
+    else:
+        bitrate = frame['bitrate']
+        duration = audio_bytes * 8 / bitrate
+    return _metadata(duration, bitrate, frame['sample_rate'], byte_size, frame['channels'])
+
+
+def probe_wav(f, byte_size):
+    header = f.read(12)
+    if header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+        return None
+    fmt = None
+    data_size = None
+    position = 12
+    while position + 8 <= byte_size and (fmt is None or data_size is None):
+        f.seek(position)
+        chunk_id, chunk_size = struct.unpack('<4sI', f.read(8))
+        if chunk_id == b'fmt ':
+            fmt = struct.unpack('<HHIIHH', f.read(16))
+        elif chunk_id == b'data':
+            # Streamed WAVs may leave the size unset; fall back to the rest of the file
+            data_size = min(chunk_size, byte_size - position - 8) or byte_size - position - 8
+        position += 8 + chunk_size + (chunk_size & 1)
+    if fmt is None or data_size is None:
+        return None
+    _, channels, sample_rate, byte_rate, _, _ = fmt
+    if not byte_rate:
+        return None
+    return _metadata(data_size / byte_rate, byte_rate * 8, sample_rate, byte_size, channels)
+
+
+def _mp4_atoms(f, start, end):
+    """Yield (type, payload_start, payload_end) for the atoms between start and end"""
+    position = start
+    while position + 8 <= end:
+        f.seek(position)
+        size, atom_type = struct.unpack('>I4s', f.read(8))
+        header_size = 8
+        if size == 1:
+            size = struct.unpack('>Q', f.read(8))[0]
+            header_size = 16
+        elif size == 0:
+            size = end - position
+        if size < header_size:
+            return
+        yield atom_type, position + header_size, min(position + size, end)
+        position += size
+
+
+def probe_mp4(f, byte_size):
+    f.seek(4)
+    if f.read(4) != b'ftyp':
+        return None
+    found = {}
+
+    def walk(start, end):
+        for atom_type, payload, atom_end in _mp4_atoms(f, start, end):
+            if atom_type in MP4_CONTAINERS:
+                walk(payload, atom_end)
+            elif atom_type == b'mvhd':
+                f.seek(payload)
+                version = f.read(4)[0]
+                if version == 1:
+                    f.seek(16, os.SEEK_CUR)
+                    found['timescale'], found['duration'] = struct.unpack('>IQ', f.read(12))
+                else:
+                    f.seek(8, os.SEEK_CUR)
+                    found['timescale'], found['duration'] = struct.unpack('>II', f.read(8))
+            elif atom_type == b'stsd' and 'sample_rate' not in found:
+                # First sample entry; audio entries keep channels at +24 and the 16.16 rate at +32
+                f.seek(payload + 8)
+                entry = f.read(36)
+                if len(entry) == 36 and entry[4:8] in (b'mp4a', b'alac', b'ac-3', b'Opus', b'fLaC'):
+                    found['channels'] = struct.unpack('>H', entry[24:26])[0]
+                    found['sample_rate'] = struct.unpack('>I', entry[32:36])[0] >> 16
+
+    walk(0, byte_size)
+    if not found.get('timescale') or not found.get('duration'):
+        return None
+    duration = found['duration'] / found['timescale']
+    return _metadata(duration, byte_size * 8 / duration, found.get('sample_rate'), byte_size, found.get('channels'))
+
+
+PROBES = {
+    '.mp3': probe_mp3,
+    '.wav': probe_wav,
+    '.m4a': probe_mp4,
+    '.mp4': probe_mp4,
+}
+
+
+def probe(path):
+    """Return duration (s), bitrate (bps), sample rate, channels and size of an audio file.
+
+    Returns None when the file is not a format we can read.
+    """
+    byte_size = os.path.getsize(path)
+    ext = os.path.splitext(path)[1].lower()
+    # Try the parser for the extension first, then the others in case it is mislabelled
+    candidates = [PROBES[ext]] if ext in PROBES else []
+    candidates += [p for p in (probe_mp4, probe_wav, probe_mp3) if p not in candidates]
+    with open(path, 'rb') as f:
+        for candidate in candidates:
+            f.seek(0)
+            try:
+                result = candidate(f, byte_size)
+            except (struct.error, IndexError, ValueError, ZeroDivisionError):
+                result = None
+            if result and result['duration_seconds'] is not None:
+                return result
+    return None
+
+
+def format_duration(seconds):
+    """Format a number of seconds as H:MM:SS (or M:SS under an hour)"""
+    if seconds is None:
+        return ''
+    hours, remainder = divmod(int(seconds), 3600)
+    minutes, seconds = divmod(remainder, 60)
+    if hours:
+        return f'{hours}:{minutes:02d}:{seconds:02d}'
+    return f'{minutes}:{seconds:02d}'
@@ -0,0 +1,159 @@
+# auth.py - User and admin registration, login and logout
+from flask import Blueprint, flash, redirect, render_template, request, session, url_for
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from extensions import rate_limiter
+from helpers import is_admin_registered, mark_admin_registered
+from models import db, Admin, User
+
+"""
+Auth blueprint: user accounts and the single admin account. Logins keep
+their rate limits here; the admin blueprint only checks the session.
+"""
+
+bp = Blueprint('auth', __name__)
+
+
+# User authentication routes
+@bp.route('/register', methods=['GET', 'POST'])
+@rate_limiter.limit('register', 'register.html', per_ip=(5, 3600), per_account=(10, 3600), per_account_ip=(3, 3600), account_field='email')
+def register():
+    """User registration"""
+    if request.method == 'POST':
+        username = request.form.get('username')
+        email = request.form.get('email')
+        password = request.form.get('password')
+        confirm_password = request.form.get('confirm_password')
+        
+        # Basic validation
+        if not all([username, email, password, confirm_password]):
+            flash('Please fill in all fields', 'error')
+            return redirect(url_for('auth.register'))
+        
+        if password != confirm_password:
+            flash('Passwords do not match', 'error')
+            return redirect(url_for('auth.register'))
+        
+        if User.query.filter_by(username=username).first():
+            flash('Username already exists', 'error')
+            return redirect(url_for('auth.register'))
+        
+        if User.query.filter_by(email=email).first():
+            flash('Email already registered', 'error')
+            return redirect(url_for('auth.register'))
+        
+        # Create new user
+        hashed_password = generate_password_hash(password)
+        new_user = User(
+            username=username,
+            email=email,
+            password=hashed_password
+        )
+        
+        try:
+            db.session.add(new_user)
+            db.session.commit()
+            flash('Registration successful! Please log in.', 'success')
+            return redirect(url_for('auth.login'))
+        except Exception as e:
+            db.session.rollback()
+            flash('There was an error creating your account. Please try again.', 'error')
+    
+    return render_template('register.html')
+
+@bp.route('/login', methods=['GET', 'POST'])
+@rate_limiter.limit('login', 'login.html', per_ip=(20, 600), per_account=(50, 3600), per_account_ip=(5, 300), account_field='username')
+def login():
+    """User login"""
+    if request.method == 'POST':
+        username = request.form.get('username')
+        password = request.form.get('password')
+        
+        user = User.query.filter_by(username=username).first()
+        
+        if user and check_password_hash(user.password, password):
+            session['user_id'] = user.id
+            session['username'] = user.username
+            flash('Login successful!', 'success')
+            return redirect(url_for('public.homepage'))
+        else:
+            flash('Invalid username or password', 'error')
+    
+    return render_template('login.html')
+
+@bp.route('/logout')
+def logout():
+    """User logout"""
+    session.pop('user_id', None)
+    session.pop('username', None)
+    flash('You have been logged out', 'success')
+    return redirect(url_for('public.homepage'))
+
+# Admin authentication routes
+@bp.route('/admin/register', methods=['GET', 'POST'])
+def admin_register():
+    """Admin registration (only works once)"""
+    # Check if admin already exists
+    if is_admin_registered():
+        flash('Admin registration is closed. Only one admin account can exist.', 'error')
+        return redirect(url_for('auth.admin_login'))
+    
+    if request.method == 'POST':
+        username = request.form.get('username')
+        pin = request.form.get('pin')
+        confirm_pin = request.form.get('confirm_pin')
+        
+        if not all([username, pin, confirm_pin]):
+            flash('Please fill in all fields', 'error')
+            return redirect(url_for('auth.admin_register'))
+        
+        if pin != confirm_pin:
+            flash('PINs do not match', 'error')
+            return redirect(url_for('auth.admin_register'))
+        
+        # Create admin
+        hashed_pin = generate_password_hash(pin)
+        new_admin = Admin(
+            username=username,
+            pin=hashed_pin
+        )
+        
+        try:
+            db.session.add(new_admin)
+            db.session.commit()
+            mark_admin_registered()
+            flash('Admin registration successful! Please log in.', 'success')
+            return redirect(url_for('auth.admin_login'))
+        except Exception as e:
+            db.session.rollback()
+            flash('There was an error creating the admin account.', 'error')
+    
+    return render_template('admin_register.html')
+
+@bp.route('/admin/login', methods=['GET', 'POST'])
+@rate_limiter.limit('admin_login', 'admin_login.html', per_ip=(10, 600), per_account=(30, 3600), per_account_ip=(5, 600), account_field='username')
+def admin_login():
+    """Admin login"""
+    if request.method == 'POST':
+        username = request.form.get('username')
+        pin = request.form.get('pin')
+        
+        admin = Admin.query.filter_by(username=username).first()
+        
+        if admin and check_password_hash(admin.pin, pin):
+            session['admin_id'] = admin.id
+            session['admin_username'] = admin.username
+            flash('Admin login successful!', 'success')
+            return redirect(url_for('admin.admin_dashboard'))
+        else:
+            flash('Invalid username or PIN', 'error')
+    
+    return render_template('admin_login.html')
+
+@bp.route('/admin/logout')
+def admin_logout():
+    """Admin logout"""
+    session.pop('admin_id', None)
+    session.pop('admin_username', None)
+    flash('Admin logout successful', 'success')
+    return redirect(url_for('public.homepage'))
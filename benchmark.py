@@ -0,0 +1,361 @@
+# benchmark.py
+"""
+Benchmark suite for the app's routes.
+
+Seeds a throwaway database with realistic volumes, then requests every GET
+route (public and admin) and reports throughput and p50/p99 latency, plus the
+number of SQL statements each route runs on a cold page cache. Results are
+written as JSON; when a baseline is given the run fails (exit status 1) if a
+route now runs more queries than the baseline, or its p99 latency grew by
+more than --latency-tolerance.
+
+    python benchmark.py --seed 5000 --save-baseline
+    python benchmark.py --seed 5000
+    python benchmark.py --mode gunicorn --workers 4 --concurrency 16 --seed 5000
+
+Without SQLALCHEMY_DATABASE_URI a temporary SQLite file is used. Routes that
+change data on GET (delete, toggle-read, retry, logout) are not requested.
+"""
+import argparse
+import http.cookiejar
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+BENCHMARK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks')
+
+# Endpoints that modify data or end the session when requested with GET
+SKIP_ENDPOINTS = {
+    'static', 'auth.logout', 'auth.admin_logout', 'admin.admin_delete_blog', 'admin.admin_delete_episode',
+    'admin.admin_delete_event', 'admin.admin_delete_upcoming', 'admin.admin_delete_video',
+    'admin.admin_delete_message', 'admin.admin_toggle_message_read', 'admin.admin_toggle_message_read_alt',
+    'admin.admin_retry_job', 'admin.admin_upload_chunk'
+}
+QUERY_STRINGS = {
+    'public.search': 'q=episode',
+    'public.api_search': 'q=episode',
+}
+ADMIN_USERNAME = 'bench-admin'
+ADMIN_PIN = '4321'
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mode', choices=('client', 'gunicorn'), default='client',
+                        help='request through the WSGI test client or a local gunicorn server')
+    parser.add_argument('--seed', type=int, default=2000, help='rows per content table to insert (0 to skip)')
+    parser.add_argument('--requests', type=int, default=200, help='timed requests per route')
+    parser.add_argument('--warmup', type=int, default=5, help='untimed requests per route before timing')
+    parser.add_argument('--concurrency', type=int, default=8, help='client threads (gunicorn mode)')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+    parser.add_argument('--worker-class', help='gunicorn worker class (default: the one in gunicorn.conf.py)')
+    parser.add_argument('--page-cache', choices=('memory', 'null'), default='memory',
+                        help='page cache backend while timing')
+    parser.add_argument('--route', action='append', help='only benchmark these endpoints')
+    parser.add_argument('--output', help='results file (default: benchmarks/results/<mode>-<timestamp>.json)')
+    parser.add_argument('--baseline', help='baseline to compare against (default: benchmarks/baseline-<mode>.json)')
+    parser.add_argument('--save-baseline', action='store_true', help='write the results as the new baseline')
+    parser.add_argument('--latency-tolerance', type=float, default=0.25,
+                        help='allowed relative p99 growth over the baseline')
+    parser.add_argument('--latency-slack-ms', type=float, default=2.0,
+                        help='p99 growth below this many ms is never a regression')
+    return parser.parse_args()
+
+
+def configure_environment(args, workdir):
+    """Settings must be in the environment before the app is created"""
+    os.environ.setdefault('SQLALCHEMY_DATABASE_URI', 'sqlite:///' + os.path.join(workdir, 'benchmark.db'))
+    os.environ.setdefault('SECRET_KEY', 'benchmark')
+    os.environ.setdefault('UPLOAD_FOLDER', os.path.join(workdir, 'uploads'))
+    os.environ.setdefault('FEED_DIR', os.path.join(workdir, 'feed'))
+    os.environ['PAGE_CACHE_BACKEND'] = args.page_cache
+    # Keep background jobs out of the timings
+    os.environ['JOBS_MODE'] = 'worker'
+
+
+def seed(models, count):
+    """Insert count episodes, posts, events, upcoming episodes, users and messages"""
+    A = models
+    db = A.db
+    from werkzeug.security import generate_password_hash
+
+    db.create_all()
+    if db.session.execute(db.select(A.PodcastEpisode.id).limit(1)).first() is not None:
+        print('Database already has content; not seeding')
+        return
+    os.makedirs(os.path.join(current_app.config['UPLOAD_FOLDER']), exist_ok=True)
+    with open(os.path.join(current_app.config['UPLOAD_FOLDER'], 'seed.mp3'), 'wb') as f:
+        f.write(b'\0' * 1024 * 1024)
+    db.session.add(A.Admin(username=ADMIN_USERNAME, pin=generate_password_hash(ADMIN_PIN)))
+    start = datetime(2015, 1, 1)
+    users = [A.User(username=f'listener{i}', email=f'listener{i}@example.com', password='x')
+             for i in range(max(1, count // 10))]
+    db.session.add_all(users)
+    db.session.flush()
+    for i in range(count):
+        day = start + timedelta(hours=i)
+        db.session.add(A.PodcastEpisode(
+            title=f'Episode {i}: conversations about craft', description='Seeded episode ' * 20,
+            duration='30:00', duration_seconds=1800, byte_size=1024 * 1024, episode_number=i,
+            image_url='/static/uploads/seed.jpg', audio_url='/static/uploads/seed.mp3',
+            publish_date=day, is_published=i % 10 != 0))
+        db.session.add(A.BlogPost(
+            title=f'Post {i}: notes from the studio', excerpt='Seeded post ' * 10,
+            content='<p>Seeded content paragraph.</p>' * 30, image='/static/uploads/seed.jpg',
+            author='Seed', publish_date=day, is_published=i % 10 != 0))
+        db.session.add(A.Event(
+            title=f'Event {i}', description='Seeded event ' * 10, event_date=day,
+            location='Seed Hall', image_url='/static/uploads/seed.jpg'))
+        db.session.add(A.ContactMessage(
+            user_id=users[i % len(users)].id if i % 2 else None, name='Seed', email='seed@example.com',
+            subject=f'Message {i}', message='Seeded message ' * 10, is_read=i % 3 == 0))
+        if i % 20 == 0:
+            db.session.add(A.UpcomingEpisode(
+                title=f'Upcoming {i}', description='Seeded upcoming', scheduled_date=day + timedelta(days=3650),
+                image_url='/static/uploads/seed.jpg'))
+            db.session.add(A.HomepageVideo(title=f'Video {i}', video_url='https://example.com/video'))
+        if i % 500 == 499:
+            db.session.commit()
+    db.session.commit()
+    A.rebuild_stat_counters()
+
+
+def route_urls(models, only=None):
+    """(endpoint, url) for every benchmarked GET route"""
+    A = models
+    db = A.db
+    sample_args = {
+        'post_id': db.session.execute(db.select(db.func.min(A.BlogPost.id)).where(A.BlogPost.is_published)).scalar(),
+        'episode_id': db.session.execute(
+            db.select(db.func.min(A.PodcastEpisode.id)).where(A.PodcastEpisode.is_published)).scalar(),
+        'event_id': db.session.execute(db.select(db.func.min(A.Event.id))).scalar(),
+        'upcoming_id': db.session.execute(db.select(db.func.min(A.UpcomingEpisode.id))).scalar(),
+        'video_id': db.session.execute(db.select(db.func.min(A.HomepageVideo.id))).scalar(),
+        'message_id': db.session.execute(db.select(db.func.min(A.ContactMessage.id))).scalar(),
+    }
+    adapter = current_app.url_map.bind('localhost')
+    urls = []
+    for rule in current_app.url_map.iter_rules():
+        if 'GET' not in rule.methods or rule.endpoint in SKIP_ENDPOINTS:
+            continue
+        if only and rule.endpoint not in only:
+            continue
+        required = rule.arguments - set(rule.defaults or ())
+        if any(sample_args.get(name) is None for name in required):
+            continue
+        url = adapter.build(rule.endpoint, {name: sample_args[name] for name in required})
+        if rule.endpoint in QUERY_STRINGS:
+            url += '?' + QUERY_STRINGS[rule.endpoint]
+        if url not in [existing for _, existing in urls]:
+            urls.append((rule.endpoint, url))
+    return urls
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def summarize(latencies, elapsed):
+    return {
+        'requests': len(latencies),
+        'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed else None,
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+    }
+
+
+def count_queries(client, url):
+    """Statements run by one request with an empty page cache"""
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    from extensions import page_cache
+
+    count = 0
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        nonlocal count
+        count += 1
+
+    page_cache.clear()
+    event.listen(Engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        status = client.get(url).status_code
+    finally:
+        event.remove(Engine, 'before_cursor_execute', before_cursor_execute)
+    return count, status
+
+
+def run_client(urls, args):
+    public = current_app.test_client()
+    admin = current_app.test_client()
+    admin.post('/admin/login', data={'username': ADMIN_USERNAME, 'pin': ADMIN_PIN})
+    results = {}
+    for endpoint, url in urls:
+        client = admin if endpoint.startswith('admin.') else public
+        queries, status = count_queries(client, url)
+        for _ in range(args.warmup):
+            client.get(url)
+        latencies = []
+        started = time.perf_counter()
+        for _ in range(args.requests):
+            t0 = time.perf_counter()
+            client.get(url)
+            latencies.append(time.perf_counter() - t0)
+        result = {'url': url, 'status': status, 'queries': queries}
+        result.update(summarize(latencies, time.perf_counter() - started))
+        results[endpoint] = result
+        print(f"{endpoint:32} {status}  {queries:3} queries  p50 {result['p50_ms']:8.2f} ms  "
+              f"p99 {result['p99_ms']:8.2f} ms  {result['throughput_rps']:8.1f} req/s")
+    return results
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def run_gunicorn(urls, args):
+    port = free_port()
+    base = f'http://127.0.0.1:{port}'
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--workers', str(args.workers), '--bind', f'127.0.0.1:{port}',
+         '--log-level', 'warning', 'app:create_app()'],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=dict(os.environ, **({'GUNICORN_WORKER_CLASS': args.worker_class} if args.worker_class else {}))
+    )
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                urllib.request.urlopen(base + '/health', timeout=1)
+                break
+            except (urllib.error.URLError, ConnectionError):
+                if server.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError('gunicorn did not start')
+                time.sleep(0.2)
+
+        public = urllib.request.build_opener()
+        admin = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+        admin.open(base + '/admin/login',
+                   urllib.parse.urlencode({'username': ADMIN_USERNAME, 'pin': ADMIN_PIN}).encode()).read()
+
+        def fetch(opener, url):
+            t0 = time.perf_counter()
+            try:
+                with opener.open(base + url, timeout=30) as response:
+                    response.read()
+                    status = response.status
+            except urllib.error.HTTPError as e:
+                status = e.code
+            return time.perf_counter() - t0, status
+
+        results = {}
+        with ThreadPoolExecutor(args.concurrency) as pool:
+            for endpoint, url in urls:
+                opener = admin if endpoint.startswith('admin.') else public
+                for _ in range(args.warmup):
+                    fetch(opener, url)
+                started = time.perf_counter()
+                timings = list(pool.map(lambda _: fetch(opener, url), range(args.requests)))
+                elapsed = time.perf_counter() - started
+                result = {'url': url, 'status': timings[0][1]}
+                result.update(summarize([t for t, _ in timings], elapsed))
+                results[endpoint] = result
+                print(f"{endpoint:32} {result['status']}  p50 {result['p50_ms']:8.2f} ms  "
+                      f"p99 {result['p99_ms']:8.2f} ms  {result['throughput_rps']:8.1f} req/s")
+        return results
+    finally:
+        server.terminate()
+        server.wait(10)
+
+
+def compare(results, baseline, args):
+    """Return a list of regression messages"""
+    regressions = []
+    for endpoint, before in baseline['routes'].items():
+        after = results['routes'].get(endpoint)
+        if after is None:
+            continue
+        if before.get('queries') is not None and after.get('queries') is not None \
+                and after['queries'] > before['queries']:
+            regressions.append(f"{endpoint}: {after['queries']} queries (baseline {before['queries']})")
+        limit = before['p99_ms'] * (1 + args.latency_tolerance)
+        if after['p99_ms'] > limit and after['p99_ms'] - before['p99_ms'] > args.latency_slack_ms:
+            regressions.append(f"{endpoint}: p99 {after['p99_ms']:.2f} ms (baseline {before['p99_ms']:.2f} ms)")
+    return regressions
+
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp(prefix='barz-benchmark-')
+    configure_environment(args, workdir)
+    import models
+    from app import create_app
+
+    with create_app().app_context():
+        if args.seed:
+            started = time.perf_counter()
+            seed(models, args.seed)
+            print(f'Seeded {args.seed} rows per table in {time.perf_counter() - started:.1f}s')
+        urls = route_urls(models, set(args.route) if args.route else None)
+        database = models.db.engine.dialect.name
+        runner = run_client if args.mode == 'client' else run_gunicorn
+        routes = runner(urls, args)
+
+    results = {
+        'mode': args.mode,
+        'created_at': datetime.utcnow().isoformat(),
+        'database': database,
+        'seed': args.seed,
+        'requests': args.requests,
+        'concurrency': args.concurrency if args.mode == 'gunicorn' else 1,
+        'workers': args.workers if args.mode == 'gunicorn' else None,
+        'page_cache': args.page_cache,
+        'python': platform.python_version(),
+        'routes': routes,
+    }
+    output = args.output or os.path.join(
+        BENCHMARK_DIR, 'results', f"{args.mode}-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    print(f'Results written to {output}')
+
+    failures = [f'{endpoint}: status {route["status"]}' for endpoint, route in routes.items()
+                if route['status'] >= 500]
+    baseline_path = args.baseline or os.path.join(BENCHMARK_DIR, f'baseline-{args.mode}.json')
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(baseline_path)), exist_ok=True)
+        with open(baseline_path, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f'Baseline written to {baseline_path}')
+    elif os.path.exists(baseline_path):
+        with open(baseline_path) as f:
+            failures += compare(results, json.load(f), args)
+    for failure in failures:
+        print(f'❌ {failure}')
+    if failures:
+        return 1
+    print(f'✅ {len(routes)} routes benchmarked')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
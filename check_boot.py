@@ -0,0 +1,105 @@
+# check_boot.py
+"""
+Boot cost check.
+
+Builds the app in fresh interpreters the way a gunicorn master does
+(`from app import create_app; create_app()`) and reports the median wall
+time, the peak RSS and the packages that cost the most to import
+(from `python -X importtime`).
+Exits with status 1 if building the app takes longer than --budget-ms, the
+process grows past --max-rss-mb, or a module that only the flask command or
+the job worker needs (Alembic, Pillow) is imported on the way.
+
+    python check_boot.py
+    python check_boot.py --runs 10 --budget-ms 800
+
+Without SQLALCHEMY_DATABASE_URI a temporary SQLite file is used; building
+the app does not connect to the database.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Modules that must stay off the serving path: migrations and image processing
+FORBIDDEN_MODULES = ('alembic', 'flask_migrate', 'mako', 'PIL')
+
+PROBE = '''
+import json, resource, sys, time
+started = time.perf_counter()
+from app import create_app
+create_app()
+elapsed = time.perf_counter() - started
+print(json.dumps({
+    'elapsed_ms': elapsed * 1000,
+    'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'modules': len(sys.modules),
+    'forbidden': sorted(name for name in %r if name in sys.modules),
+}))
+''' % (FORBIDDEN_MODULES,)
+
+
+def run_probe(env, importtime=False):
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', PROBE]
+    result = subprocess.run(command, env=env, capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    if result.returncode != 0:
+        sys.exit(f'❌ Building the app failed:\n{result.stderr}')
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def import_cost_by_package(importtime_output, count):
+    """(ms, package) of the packages whose own module code took longest to import"""
+    totals = {}
+    for line in importtime_output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        package = name.strip().split('.')[0]
+        totals[package] = totals.get(package, 0) + int(self_us) / 1000
+    return sorted(((ms, package) for package, ms in totals.items()), reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help='interpreters to time (the median is reported)')
+    parser.add_argument('--budget-ms', type=float, default=1000, help='maximum median time to build the app')
+    parser.add_argument('--max-rss-mb', type=float, default=80, help='maximum peak RSS after building the app')
+    parser.add_argument('--top', type=int, default=10, help='most expensive packages to list')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault('SQLALCHEMY_DATABASE_URI', 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='barz-boot-'), 'boot.db'))
+    env.setdefault('SECRET_KEY', 'check-boot')
+    # The first run also writes the bytecode caches, as a deploy's first boot would
+    run_probe(env)
+    samples = [run_probe(env)[0] for _ in range(args.runs)]
+    elapsed = statistics.median(sample['elapsed_ms'] for sample in samples)
+    rss = max(sample['rss_mb'] for sample in samples)
+    _, importtime = run_probe(env, importtime=True)
+
+    print(f"Built the app in {elapsed:.0f} ms (median of {args.runs}), peak RSS {rss:.1f} MB, "
+          f"{samples[0]['modules']} modules loaded")
+    for ms, package in import_cost_by_package(importtime, args.top):
+        print(f'  {ms:8.1f} ms  {package}')
+
+    failures = []
+    if elapsed > args.budget_ms:
+        failures.append(f'building the app took {elapsed:.0f} ms (budget {args.budget_ms:.0f} ms)')
+    if rss > args.max_rss_mb:
+        failures.append(f'peak RSS was {rss:.1f} MB (budget {args.max_rss_mb:.0f} MB)')
+    if samples[0]['forbidden']:
+        failures.append(f"imported {', '.join(samples[0]['forbidden'])} while building the app")
+    for failure in failures:
+        print(f'❌ {failure}')
+    if failures:
+        return 1
+    print('✅ Within the boot budget')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,116 @@
+# check_query_plans.py
+"""
+Query plan check for the public routes.
+
+Seeds the configured database (use a throwaway one!) with enough rows for the
+planner to prefer indexes, requests every public route through the test
+client, captures the SELECTs they run and EXPLAINs each one. Exits with
+status 1 if any plan falls back to a sequential scan of a content table.
+
+    SQLALCHEMY_DATABASE_URI=postgresql://localhost/barz_plans python check_query_plans.py --seed 5000
+"""
+import argparse
+import sys
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, text
+
+from app import create_app
+from extensions import page_cache
+from models import db, BlogPost, PodcastEpisode, UpcomingEpisode, Event, ContactMessage
+
+ROUTES = ['/', '/blog', '/events', '/blog/1', '/episode/1', '/api/episodes', '/api/blog', '/api/events']
+
+# Tables that stay tiny in practice, where a sequential scan is the right plan
+SMALL_TABLES = {'admin', 'homepage_video'}
+
+app = create_app()
+
+
+def seed(count):
+    start = datetime(2015, 1, 1)
+    for i in range(count):
+        day = start + timedelta(hours=i)
+        db.session.add(PodcastEpisode(title=f'Episode {i}', description='Seeded episode', duration='30:00',
+                                      episode_number=i, image_url='/static/uploads/seed.jpg',
+                                      audio_url='/static/uploads/seed.mp3', publish_date=day,
+                                      is_published=i % 10 != 0))
+        db.session.add(BlogPost(title=f'Post {i}', excerpt='Seeded post', content='Seeded content',
+                                image='/static/uploads/seed.jpg', author='Seed', publish_date=day,
+                                is_published=i % 10 != 0))
+        db.session.add(Event(title=f'Event {i}', description='Seeded event', event_date=day,
+                             location='Seed Hall', image_url='/static/uploads/seed.jpg'))
+        db.session.add(UpcomingEpisode(title=f'Upcoming {i}', description='Seeded upcoming',
+                                       scheduled_date=day, image_url='/static/uploads/seed.jpg'))
+        db.session.add(ContactMessage(name='Seed', email='seed@example.com', subject=f'Message {i}',
+                                      message='Seeded message', is_read=i % 3 == 0))
+    db.session.commit()
+    # Refresh planner statistics so the seeded volumes are taken into account
+    db.session.execute(text('ANALYZE'))
+    db.session.commit()
+
+
+def capture_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    client = app.test_client()
+    page_cache.clear()
+    for route in ROUTES:
+        response = client.get(route)
+        if response.status_code != 200:
+            print(f'❌ {route} returned {response.status_code}')
+    event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    return statements
+
+
+def sequential_scans(statement, parameters):
+    """Return the tables a statement's plan reads with a full scan"""
+    connection = db.session.connection()
+    dbapi_cursor = connection.connection.cursor()
+    if db.engine.dialect.name == 'postgresql':
+        dbapi_cursor.execute('EXPLAIN ' + statement, parameters)
+        plan = [row[0] for row in dbapi_cursor.fetchall()]
+        scans = [line.split('Seq Scan on ', 1)[1].split()[0] for line in plan if 'Seq Scan on ' in line]
+    else:
+        dbapi_cursor.execute('EXPLAIN QUERY PLAN ' + statement, parameters)
+        plan = [row[-1] for row in dbapi_cursor.fetchall()]
+        # SQLite reports "SCAN <table>" for full scans and "SCAN <table> USING INDEX ..." otherwise
+        scans = [line.split()[1] for line in plan if line.startswith('SCAN ') and ' USING ' not in line]
+    return [table.strip('"') for table in scans if table.strip('"') not in SMALL_TABLES], plan
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seed', type=int, default=0, help='create tables and insert this many rows per content table')
+    args = parser.parse_args()
+
+    with app.app_context():
+        if args.seed:
+            db.create_all()
+            seed(args.seed)
+        failures = 0
+        seen = set()
+        for statement, parameters in capture_queries():
+            if statement in seen:
+                continue
+            seen.add(statement)
+            tables, plan = sequential_scans(statement, parameters)
+            if tables:
+                failures += 1
+                print(f"❌ Sequential scan on {', '.join(tables)}:\n    {' '.join(statement.split())}")
+                for line in plan:
+                    print(f'      {line}')
+        if failures:
+            print(f'❌ {failures} query plan(s) fell back to a sequential scan')
+            return 1
+        print(f'✅ {len(seen)} queries checked, all use indexes')
+        return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,173 @@
+# db_pool.py - SQLAlchemy connection pool settings and statistics
+import os
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool, QueuePool
+
+"""
+Connection pool configuration.
+Pool sizing comes from DB_POOL_* environment variables so each deployment can
+size its workers against what the database (or PgBouncer) accepts:
+workers x (DB_POOL_SIZE + DB_MAX_OVERFLOW) is the most connections the app
+will ever open. PoolStats records checkouts, connects, invalidations and the
+time requests spend waiting for a free connection.
+"""
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that reports how long each checkout waited for a connection"""
+
+    stats = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            if self.stats is not None:
+                self.stats.record_timeout()
+            raise
+        finally:
+            if self.stats is not None:
+                self.stats.record_wait(time.perf_counter() - start)
+
+
+def _env_flag(environ, name, default):
+    value = environ.get(name)
+    if value is None or value == '':
+        return default
+    return value.lower() in ('1', 'true', 'yes', 'on')
+
+
+def engine_options_from_env(uri, environ=os.environ):
+    """Build SQLALCHEMY_ENGINE_OPTIONS for the given database URI.
+
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT (seconds to wait for a free
+    connection), DB_POOL_RECYCLE (seconds before a connection is replaced),
+    DB_POOL_PRE_PING (test connections on checkout, survives failovers),
+    DB_POOL_DISABLED (open a connection per checkout, for when PgBouncer does
+    the pooling) and DB_PGBOUNCER (transaction-pooling safe: no server-side
+    prepared statements).
+    """
+    if not uri:
+        return {}
+    url = make_url(uri)
+    if url.get_backend_name() == 'sqlite':
+        # SQLite connections are cheap and per-file; keep SQLAlchemy's defaults
+        return {}
+    options = {'pool_pre_ping': _env_flag(environ, 'DB_POOL_PRE_PING', True)}
+    if _env_flag(environ, 'DB_POOL_DISABLED', False):
+        options['poolclass'] = NullPool
+    else:
+        options.update({
+            'poolclass': TimedQueuePool,
+            'pool_size': int(environ.get('DB_POOL_SIZE', '5')),
+            'max_overflow': int(environ.get('DB_MAX_OVERFLOW', '10')),
+            'pool_timeout': float(environ.get('DB_POOL_TIMEOUT', '30')),
+            'pool_recycle': int(environ.get('DB_POOL_RECYCLE', '1800')),
+            # LIFO reuse lets surplus connections sit idle long enough for the server to reap them
+            'pool_use_lifo': _env_flag(environ, 'DB_POOL_LIFO', True),
+        })
+    if _env_flag(environ, 'DB_PGBOUNCER', False):
+        connect_args = {}
+        if url.get_driver_name() == 'psycopg':
+            # psycopg 3 prepares repeated statements server-side, which breaks
+            # when PgBouncer hands the next transaction to another server connection
+            connect_args['prepare_threshold'] = None
+        elif url.get_driver_name() == 'asyncpg':
+            connect_args['statement_cache_size'] = 0
+            connect_args['prepared_statement_cache_size'] = 0
+        # psycopg2 never uses server-side prepared statements, so needs nothing
+        if connect_args:
+            options['connect_args'] = connect_args
+    application_name = environ.get('DB_APPLICATION_NAME')
+    if application_name and url.get_backend_name() == 'postgresql':
+        options.setdefault('connect_args', {})['application_name'] = application_name
+    return options
+
+
+class PoolStats:
+    """Counters for one engine's connection pool, kept up to date by pool events"""
+
+    def __init__(self, engine=None):
+        self.lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_count = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.engine = None
+        if engine is not None:
+            self.attach(engine)
+
+    def attach(self, engine):
+        self.engine = engine
+        pool = engine.pool
+        if isinstance(pool, TimedQueuePool):
+            pool.stats = self
+        event.listen(engine, 'connect', self._on_connect)
+        event.listen(engine, 'checkout', self._on_checkout)
+        event.listen(engine, 'invalidate', self._on_invalidate)
+        event.listen(engine, 'soft_invalidate', self._on_invalidate)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self.lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self.lock:
+            self.checkouts += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self.lock:
+            self.invalidations += 1
+
+    def record_wait(self, seconds):
+        with self.lock:
+            self.wait_count += 1
+            self.wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def record_timeout(self):
+        with self.lock:
+            self.timeouts += 1
+
+    def snapshot(self):
+        """Current pool occupancy plus the counters since the process started"""
+        pool = self.engine.pool
+        with self.lock:
+            stats = {
+                'pid': os.getpid(),
+                'pool_class': type(pool).__name__,
+                'connects': self.connects,
+                'checkouts': self.checkouts,
+                'invalidations': self.invalidations,
+                'timeouts': self.timeouts,
+                'wait_seconds_total': round(self.wait_seconds, 6),
+                'wait_seconds_max': round(self.max_wait_seconds, 6),
+                'wait_seconds_avg': round(self.wait_seconds / self.wait_count, 6) if self.wait_count else 0.0,
+            }
+        if isinstance(pool, QueuePool):
+            stats.update({
+                'size': pool.size(),
+                'checked_out': pool.checkedout(),
+                'checked_in': pool.checkedin(),
+                'overflow': max(pool.overflow(), 0),
+                'max_overflow': pool._max_overflow,
+            })
+        return stats
+
+    def reset_after_fork(self):
+        """Drop connections inherited from the parent process (e.g. gunicorn --preload)"""
+        # close=False leaves the parent's sockets alone instead of closing them under it
+        if self.engine is not None:
+            self.engine.dispose(close=False)
+        with self.lock:
+            self.connects = self.checkouts = self.invalidations = self.timeouts = 0
+            self.wait_count = 0
+            self.wait_seconds = self.max_wait_seconds = 0.0
@@ -0,0 +1,46 @@
+# extensions.py - Extension instances shared by the blueprints, bound in create_app()
+import os
+
+from db_pool import PoolStats
+from http_cache import ConditionalPages
+from instrumentation import Instrumentation
+from jobs import JobQueue
+from models import db, Job, SEARCH_SOURCES, content_versions
+from page_cache import PageCache
+from rate_limit import RateLimiter
+from replicas import ReplicaRouter
+from search import FullTextSearch
+from static_assets import StaticAssets
+from storage import ContentStore
+from uploads import ChunkedUploads
+
+"""
+Extensions.
+Every extension is created here without an app and bound to one with
+init_app() in create_app(), so the views can import them at module level
+while nothing reads the configuration or touches the database until the app
+is built.
+"""
+
+pool_stats = PoolStats()
+# Workers forked after the app is built (gunicorn --preload) must not share the parent's connections
+os.register_at_fork(after_in_child=pool_stats.reset_after_fork)
+# Anonymous-friendly read-only pages that may be served from a replica
+REPLICA_READ_ENDPOINTS = (
+    'public.homepage', 'public.host', 'public.blog', 'public.blog_post', 'public.episode_detail',
+    'public.events', 'public.episode_audio', 'public.search', 'public.api_episodes', 'public.api_blog',
+    'public.api_events', 'public.api_search'
+)
+replica_router = ReplicaRouter(db, REPLICA_READ_ENDPOINTS)
+instrumentation = Instrumentation(
+    gauges=lambda: {f'app_db_pool_{name}': value for name, value in pool_stats.snapshot().items() if name != 'pid'}
+)
+# Pages about to be cached are rendered from the primary, never from a lagging replica
+page_cache = PageCache(content_versions, before_render=replica_router.use_primary)
+rate_limiter = RateLimiter()
+assets = StaticAssets()
+conditional_pages = ConditionalPages(content_versions)
+job_queue = JobQueue(db, Job)
+full_text_search = FullTextSearch(db, SEARCH_SOURCES)
+content_store = ContentStore()
+chunked_uploads = ChunkedUploads(content_store, {'episode_audio', 'episode_image'})
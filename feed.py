@@ -0,0 +1,110 @@
+# feed.py - iTunes-compatible podcast RSS feed
+import os
+import uuid
+from email.utils import format_datetime
+from datetime import timezone
+from xml.sax.saxutils import escape, quoteattr
+
+"""
+Podcast RSS feed rendering.
+The feed is rendered to static files when episodes change and served from
+disk, so directory polling never reaches the database. Large catalogues are
+split into pages linked with RFC 5005 rel="next"/"previous" links; page 1
+(feed.xml) always holds the newest episodes.
+"""
+
+ITUNES_NS = 'http://www.itunes.com/dtds/podcast-1.0.dtd'
+ATOM_NS = 'http://www.w3.org/2005/Atom'
+
+
+def rfc822(value):
+    """Format a naive UTC datetime as an RFC 822 date"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value)
+
+
+def _element(name, value, **attributes):
+    attrs = ''.join(f' {key}={quoteattr(str(val))}' for key, val in attributes.items())
+    if value is None:
+        return f'<{name}{attrs}/>'
+    return f'<{name}{attrs}>{escape(str(value))}</{name}>'
+
+
+def render_page(channel, items, self_url, next_url=None, previous_url=None):
+    """Render one feed page.
+
+    channel holds title, description, link, language, author, image and categories;
+    each item holds title, description, link, guid, pub_date, audio_url, audio_length,
+    audio_type, duration_seconds, episode_number and image.
+    """
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        f'<rss version="2.0" xmlns:itunes="{ITUNES_NS}" xmlns:atom="{ATOM_NS}">',
+        '<channel>',
+        _element('title', channel['title']),
+        _element('link', channel['link']),
+        _element('description', channel['description']),
+        _element('language', channel['language']),
+        _element('atom:link', None, href=self_url, rel='self', type='application/rss+xml'),
+    ]
+    if next_url:
+        parts.append(_element('atom:link', None, href=next_url, rel='next', type='application/rss+xml'))
+    if previous_url:
+        parts.append(_element('atom:link', None, href=previous_url, rel='previous', type='application/rss+xml'))
+    parts += [
+        _element('itunes:author', channel['author']),
+        _element('itunes:summary', channel['description']),
+        _element('itunes:explicit', 'false'),
+        _element('itunes:image', None, href=channel['image']),
+        '<image>',
+        _element('url', channel['image']),
+        _element('title', channel['title']),
+        _element('link', channel['link']),
+        '</image>',
+    ]
+    for category in channel['categories']:
+        parts.append(_element('itunes:category', None, text=category))
+
+    for item in items:
+        parts += [
+            '<item>',
+            _element('title', item['title']),
+            _element('itunes:title', item['title']),
+            _element('description', item['description']),
+            _element('itunes:summary', item['description']),
+            _element('link', item['link']),
+            _element('guid', item['guid'], isPermaLink='false'),
+            _element('pubDate', rfc822(item['pub_date'])),
+            _element('enclosure', None, url=item['audio_url'], length=item['audio_length'] or 0,
+                     type=item['audio_type']),
+            _element('itunes:episode', item['episode_number']),
+            _element('itunes:image', None, href=item['image']),
+        ]
+        if item['duration_seconds']:
+            parts.append(_element('itunes:duration', item['duration_seconds']))
+        parts.append('</item>')
+
+    parts += ['</channel>', '</rss>']
+    return '\n'.join(parts).encode('utf-8')
+
+
+def write_if_changed(path, data):
+    """Atomically replace path with data unless it already holds exactly those bytes.
+
+    Leaving unchanged pages alone keeps their ETag and Last-Modified stable.
+    Returns True if the file was written.
+    """
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Unique per call: gevent and thread workers share a pid
+    tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return True
@@ -0,0 +1,98 @@
+# gunicorn.conf.py
+"""
+Gunicorn settings, picked up automatically when gunicorn starts in this directory:
+
+    gunicorn 'app:create_app()'
+
+The default worker class is gevent. Each worker then serves up to
+GUNICORN_WORKER_CONNECTIONS clients at once on greenlets, so a listener
+trickling an upload or streaming an episode no longer pins a whole process.
+psycopg2 is made cooperative with a wait callback, so a greenlet waiting on
+Postgres yields to the others instead of blocking the worker.
+
+Tune through the environment:
+- GUNICORN_WORKER_CLASS: gevent (default), gthread or sync.
+- GUNICORN_WORKERS: defaults to one per CPU for gevent, 2 x CPUs + 1 otherwise.
+- GUNICORN_WORKER_CONNECTIONS and GUNICORN_THREADS.
+
+With gevent, size DB_POOL_SIZE/DB_MAX_OVERFLOW (or put PgBouncer in front)
+for the number of greenlets that hit the database at once. Background jobs
+must then run in a separate `flask run-jobs` process: the gevent profile
+defaults JOBS_MODE to worker and refuses to start with JOBS_MODE=thread,
+because the in-process job thread would be a greenlet and Pillow or audio
+probing would stall the worker's event loop.
+"""
+import multiprocessing
+import os
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gevent')
+
+if worker_class == 'gevent':
+    # After monkey patching the job thread would be a greenlet, so jobs need their own process
+    os.environ.setdefault('JOBS_MODE', 'worker')
+    if os.environ['JOBS_MODE'] == 'thread':
+        raise RuntimeError('JOBS_MODE=thread cannot be used with gevent workers; '
+                           'set JOBS_MODE=worker and run `flask run-jobs` separately')
+
+    # Patch before anything (including the preloaded app) imports socket, ssl or threading
+    from gevent import monkey
+    monkey.patch_all()
+
+    try:
+        import psycopg2
+        from psycopg2 import extensions
+    except ImportError:  # SQLite-only installs have nothing to make cooperative
+        psycopg2 = None
+
+    if psycopg2 is not None:
+        from gevent.socket import wait_read, wait_write
+
+        def gevent_wait_callback(connection, timeout=None):
+            """Let other greenlets run while psycopg2 waits on the server"""
+            while True:
+                state = connection.poll()
+                if state == extensions.POLL_OK:
+                    break
+                elif state == extensions.POLL_READ:
+                    wait_read(connection.fileno(), timeout=timeout)
+                elif state == extensions.POLL_WRITE:
+                    wait_write(connection.fileno(), timeout=timeout)
+                else:
+                    raise psycopg2.OperationalError(f'Bad result from poll: {state!r}')
+
+        extensions.set_wait_callback(gevent_wait_callback)
+
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', '8000')}")
+# Async workers multiplex connections, so one per core is enough; sync workers need spares for slow clients
+workers = int(os.environ.get('GUNICORN_WORKERS',
+                             multiprocessing.cpu_count() if worker_class == 'gevent'
+                             else multiprocessing.cpu_count() * 2 + 1))
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', '1000'))
+threads = int(os.environ.get('GUNICORN_THREADS', '4' if worker_class == 'gthread' else '1'))
+backlog = int(os.environ.get('GUNICORN_BACKLOG', '2048'))
+
+# Import the app once in the master so workers share its memory copy-on-write;
+# each worker drops the inherited database connections after the fork (see db_pool.py)
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+# Keep client connections open between requests; must be longer than the load balancer's idle timeout
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', '5'))
+# Recycle workers now and then so slow leaks cannot grow without bound; jitter avoids restarting all at once
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '5000'))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', '500'))
+# Heartbeat files on tmpfs, so a slow disk cannot make the master kill healthy workers
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+forwarded_allow_ips = os.environ.get('FORWARDED_ALLOW_IPS', '127.0.0.1')
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG')  # e.g. '-' for stdout; off by default
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def when_ready(server):
+    cfg = server.cfg
+    server.log.info('Serving with %d %s worker(s)%s, JOBS_MODE=%s', cfg.workers, cfg.worker_class_str,
+                    f', {cfg.worker_connections} connections each' if cfg.worker_class_str == 'gevent' else '',
+                    os.environ.get('JOBS_MODE', 'thread'))
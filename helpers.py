@@ -0,0 +1,220 @@
+# helpers.py - Helpers, hooks and template globals shared by the blueprints
+import base64
+import json
+import os
+import re
+from datetime import datetime
+
+from flask import abort, current_app, request, url_for
+from markupsafe import Markup
+from werkzeug.security import safe_join
+
+import config
+import images
+from extensions import chunked_uploads, content_store, job_queue, page_cache
+from models import db, Admin, HomepageVideo, content_versions, upload_reference_count
+
+"""
+View helpers.
+Pagination, upload bookkeeping and the process-local caches used by more
+than one blueprint, plus the request hooks, template globals and context
+processors that create_app() registers on the app.
+"""
+
+
+def allowed_file(filename):
+    return '.' in filename and \
+           filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_EXTENSIONS']
+
+def encode_cursor(date_value, row_id):
+    """Encode a (date, id) position into an opaque URL-safe cursor"""
+    raw = f'{date_value.isoformat()}|{row_id}'.encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """Decode a cursor made by encode_cursor; aborts with 400 if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8')
+        date_part, id_part = raw.rsplit('|', 1)
+        return datetime.fromisoformat(date_part), int(id_part)
+    except (ValueError, UnicodeDecodeError):
+        abort(400)
+
+def keyset_page(query, date_column, id_column, cursor=None, per_page=None):
+    """Return one page of query ordered newest first by (date_column, id_column).
+
+    Rows after the cursor are selected with a keyset condition instead of
+    OFFSET, so every page costs the same no matter how deep it is. Returns
+    (items, next_cursor); next_cursor is None on the last page.
+    """
+    per_page = per_page or current_app.config['ITEMS_PER_PAGE']
+    if cursor:
+        after_date, after_id = decode_cursor(cursor)
+        query = query.filter(db.or_(
+            date_column < after_date,
+            db.and_(date_column == after_date, id_column < after_id)
+        ))
+    rows = query.order_by(date_column.desc(), id_column.desc()).limit(per_page + 1).all()
+    items = rows[:per_page]
+    next_cursor = None
+    if len(rows) > per_page:
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, date_column.key), getattr(last, id_column.key))
+    return items, next_cursor
+
+# Content-addressed names never change meaning, so they can be cached for a year
+CONTENT_ADDRESSED_NAME = re.compile(r'^[0-9a-f]{64}(-\d+w)?(\.[a-z0-9]+)?$')
+
+def upload_path_from_url(url):
+    """Map a /static/uploads/... URL to its path under UPLOAD_FOLDER, or None"""
+    prefix = '/static/uploads/'
+    if not url or not url.startswith(prefix):
+        return None
+    return safe_join(current_app.config['UPLOAD_FOLDER'], url[len(prefix):])
+
+def cache_content_addressed_static(response):
+    """Let browsers and CDNs keep content-addressed uploads forever"""
+    if request.endpoint == 'static' and response.status_code in (200, 206, 304) \
+            and CONTENT_ADDRESSED_NAME.match(os.path.basename(request.path)):
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = 365 * 24 * 3600
+        response.cache_control.immutable = True
+    return response
+
+def image_variants(url):
+    """srcset data for an uploaded image: the original plus whichever variants exist"""
+    result = {'src': url, 'srcset': '', 'webp_srcset': ''}
+    path = content_store.path_from_url(url)
+    if path is None:
+        return result
+    base_url = url.rsplit('/', 1)[0]
+    found = images.variants_for(path)
+    for key, attribute in (('original', 'srcset'), ('webp', 'webp_srcset')):
+        result[attribute] = ', '.join(
+            f'{base_url}/{os.path.basename(variant)} {width}w' for variant, width in found[key]
+        )
+    return result
+
+# Manifest of the self-hosted fonts, icons and images, filled by create_app()
+vendored_assets = {}
+
+def load_vendored_assets(static_folder):
+    """Manifest of the self-hosted fonts, icons and images (see vendor_assets.py), or {} if not vendored"""
+    try:
+        with open(os.path.join(static_folder, 'vendor', 'vendor.json')) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def vendored_url(url):
+    """Our own copy of a third-party image when it has been vendored, else the original URL"""
+    path = vendored_assets.get('images', {}).get(url)
+    return url_for('static', filename=path) if path else url
+
+def icon(name):
+    """An Ionicon: a <use> of the self-hosted sprite, or the CDN web component when not vendored"""
+    if name in vendored_assets.get('icon_names', ()):
+        sprite = url_for('static', filename=vendored_assets['icons'])
+        return Markup('<ion-icon name="{0}" aria-hidden="true"><svg><use href="{1}#{0}"></use></svg></ion-icon>').format(name, sprite)
+    return Markup('<ion-icon name="{}"></ion-icon>').format(name)
+
+def utility_processor():
+    return dict(datetime=datetime)
+
+# Process-local cache for the homepage videos and the admin flag. The videos are
+# kept with the 'videos' content version they were loaded at, so an edit made
+# through any worker is picked up on the next homepage render.
+_globals_cache = {
+    'homepage_videos': None,
+    'videos_version': None,
+    'admin_registered': False
+}
+
+def invalidate_global_vars():
+    """Drop the cached homepage videos so the next render reloads them"""
+    _globals_cache['videos_version'] = None
+    page_cache.invalidate('videos')
+
+def get_homepage_videos():
+    """Return the active homepage videos as plain dicts, reloaded when the 'videos' version moves"""
+    versions = content_versions(['videos'])
+    version = versions['videos'] if versions else None
+    if _globals_cache['homepage_videos'] is None or version is None or version != _globals_cache['videos_version']:
+        videos = HomepageVideo.query.filter_by(is_active=True).all()
+        # Store plain values so nothing is tied to the request's session
+        _globals_cache['homepage_videos'] = [
+            {'id': v.id, 'title': v.title, 'description': v.description, 'video_url': v.video_url}
+            for v in videos
+        ]
+        _globals_cache['videos_version'] = version
+    return _globals_cache['homepage_videos']
+
+def is_admin_registered():
+    """Whether an admin exists; memoized for good once it becomes true"""
+    if not _globals_cache['admin_registered']:
+        _globals_cache['admin_registered'] = Admin.query.first() is not None
+    return _globals_cache['admin_registered']
+
+def mark_admin_registered():
+    _globals_cache['admin_registered'] = True
+
+# Context processor to make global variables available to all templates
+def inject_global_vars():
+    return {
+        'podcast': config.PODCAST_CONFIG,
+        'social_links': config.SOCIAL_LINKS,
+        'contact_info': config.CONTACT_INFO,
+        'admin_registered': is_admin_registered()
+    }
+
+def upload_in_use(url):
+    """Whether a row, or a completed upload waiting to be claimed, points at a stored file"""
+    return upload_reference_count(url) > 0 or url in chunked_uploads.unclaimed_urls()
+
+def release_uploads(*urls):
+    """Delete stored files that are no longer referenced by any row (call after commit).
+
+    Files stored within UPLOAD_RELEASE_GRACE are kept, since a row saving the
+    same file may not be committed yet; sweep_uploads() removes them later.
+    Returns how many files were deleted.
+    """
+    released = 0
+    unclaimed = chunked_uploads.unclaimed_urls()
+    for url in set(urls):
+        path = content_store.path_from_url(url)
+        if path and url not in unclaimed and upload_reference_count(url) == 0 \
+                and content_store.release(url, lambda: upload_in_use(url)):
+            images.delete_variants(path)
+            released += 1
+    return released
+
+def sweep_uploads():
+    """Delete every stored file nothing references once its grace period is over; returns how many"""
+    return release_uploads(*content_store.urls())
+
+def enqueue_post_save_jobs(upload_urls=(), pages=(), jobs=()):
+    """Queue processing for saved uploads and re-warm the affected pages.
+
+    jobs is a list of extra (name, payload) pairs to run before the pages are warmed.
+    Pages are only warmed into a shared page cache: with per-process caches the job
+    would fill its own process's copy and no visitor would ever hit it.
+    Queueing problems are logged rather than raised: the content is already saved.
+    """
+    try:
+        for url in upload_urls:
+            if url:
+                job_queue.enqueue('verify_upload', url=url)
+                if os.path.splitext(url)[1].lower() in images.RASTER_EXTENSIONS:
+                    job_queue.enqueue('generate_image_variants', url=url)
+        for name, payload in jobs:
+            job_queue.enqueue(name, **payload)
+        if pages and page_cache.shared:
+            job_queue.enqueue('warm_pages', paths=list(pages))
+    except Exception:
+        db.session.rollback()
+        current_app.logger.exception('Could not queue post-save jobs')
+
+def start_job_worker():
+    if current_app.config['JOBS_MODE'] == 'thread':
+        job_queue.ensure_worker_thread()
@@ -0,0 +1,167 @@
+# http_cache.py - Response compression and conditional GETs for rendered pages
+import glob
+import gzip
+import hashlib
+import os
+from functools import wraps
+
+from flask import Response, make_response, request, session
+from werkzeug.datastructures import Headers
+from werkzeug.http import parse_accept_header
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip is always available
+    brotli = None
+
+"""
+HTTP caching for dynamic responses.
+CompressionMiddleware gzip/Brotli-compresses HTML and JSON bodies above a size
+threshold on the way out of the WSGI app. ConditionalPages gives each page a
+weak ETag derived from the deploy and the versions of the content it shows,
+which are read with one small query; a matching If-None-Match is answered
+with 304 before the page cache or the template is touched.
+"""
+
+COMPRESSIBLE_TYPES = {'text/html', 'application/json'}
+
+
+def _chain(written, iterable):
+    # Bodies passed to the legacy write() callable come before the returned iterable
+    if not written:
+        return iterable
+    try:
+        return written + list(iterable)
+    finally:
+        if hasattr(iterable, 'close'):
+            iterable.close()
+
+
+class CompressionMiddleware:
+    """Compress HTML and JSON responses for clients that accept br or gzip"""
+
+    def __init__(self, app, min_size=1024, gzip_level=6, brotli_quality=5):
+        self.app = app
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _encoding(self, environ):
+        accepted = parse_accept_header(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        if brotli is not None and accepted['br']:
+            return 'br'
+        if accepted['gzip']:
+            return 'gzip'
+        return None
+
+    def _compressible(self, status, headers):
+        mimetype = headers.get('Content-Type', '').split(';')[0].strip().lower()
+        return (status.startswith('200') and mimetype in COMPRESSIBLE_TYPES
+                and 'Content-Encoding' not in headers
+                and 'no-transform' not in headers.get('Cache-Control', ''))
+
+    def __call__(self, environ, start_response):
+        captured = {}
+        written = []
+
+        def capture(status, headers, exc_info=None):
+            captured['status'], captured['headers'] = status, headers
+            return written.append
+
+        iterable = self.app(environ, capture)
+        headers = Headers(captured['headers'])
+        if not self._compressible(captured['status'], headers):
+            start_response(captured['status'], captured['headers'])
+            return _chain(written, iterable)
+        vary = [value.strip() for value in headers.get('Vary', '').split(',') if value.strip()]
+        if 'Accept-Encoding' not in vary:
+            headers['Vary'] = ', '.join(vary + ['Accept-Encoding'])
+        encoding = self._encoding(environ)
+        length = headers.get('Content-Length', type=int)
+        if encoding is None or environ.get('REQUEST_METHOD') == 'HEAD' or (length is not None and length < self.min_size):
+            start_response(captured['status'], headers.to_wsgi_list())
+            return _chain(written, iterable)
+        try:
+            body = b''.join(written) + b''.join(iterable)
+        finally:
+            if hasattr(iterable, 'close'):
+                iterable.close()
+        if len(body) >= self.min_size:
+            if encoding == 'br':
+                body = brotli.compress(body, quality=self.brotli_quality)
+            else:
+                body = gzip.compress(body, self.gzip_level)
+            headers['Content-Encoding'] = encoding
+            # The compressed bytes differ from the identity ones, so a strong validator must become weak
+            etag = headers.get('ETag')
+            if etag and not etag.startswith('W/'):
+                headers['ETag'] = 'W/' + etag
+        headers['Content-Length'] = str(len(body))
+        start_response(captured['status'], headers.to_wsgi_list())
+        return [body]
+
+
+def source_fingerprint(*patterns):
+    """Hash of every file matching the glob patterns, for versioning what templates and code render"""
+    digest = hashlib.sha1()
+    for path in sorted(set(p for pattern in patterns for p in glob.glob(pattern, recursive=True))):
+        if os.path.isfile(path):
+            digest.update(path.encode('utf-8'))
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+class ConditionalPages:
+    """Weak ETags and early 304s for pages built from versioned content.
+
+    versions is a callable taking the content tags of a page (e.g. 'blog')
+    and returning {tag: version}, or None when the versions are unknown, in
+    which case the page is served without a validator.
+    """
+
+    def __init__(self, versions, app=None):
+        self.versions = versions
+        self.enabled = True
+        self.deploy_version = ''
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = bool(app.config.get('CONDITIONAL_PAGES', True))
+        self.deploy_version = app.config.get('DEPLOY_VERSION') or source_fingerprint(
+            os.path.join(app.root_path, '*.py'),
+            os.path.join(app.root_path, app.template_folder, '**', '*.html'),
+            os.path.join(app.static_folder, 'dist', 'manifest.json'),
+            os.path.join(app.static_folder, 'vendor', 'vendor.json')
+        )
+
+    def etag(self, *tags):
+        """Validate a GET view's response against the versions of the given content tags"""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(**view_args):
+                # Pending flash messages are rendered into the page, so it cannot be revalidated
+                if not self.enabled or request.method not in ('GET', 'HEAD') or '_flashes' in session:
+                    return view(**view_args)
+                versions = self.versions(tags)
+                if versions is None:
+                    return view(**view_args)
+                # Logged-in pages show the username in the navbar, so the identity is part of the tag
+                identity = f"u{session.get('user_id') or ''}:a{session.get('admin_id') or ''}"
+                key = '|'.join([self.deploy_version, request.full_path, identity]
+                               + [f'{tag}={versions[tag]}' for tag in sorted(versions)])
+                etag = hashlib.sha1(key.encode('utf-8')).hexdigest()[:20]
+                if request.if_none_match.contains_weak(etag):
+                    response = Response(status=304)
+                else:
+                    response = make_response(view(**view_args))
+                    if response.status_code != 200:
+                        return response
+                response.set_etag(etag, weak=True)
+                response.cache_control.no_cache = True
+                if identity != 'u:a':
+                    response.cache_control.private = True
+                return response
+            return wrapper
+        return decorator
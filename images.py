@@ -0,0 +1,101 @@
+# images.py - Resized and recompressed variants of uploaded images
+import glob
+import os
+import uuid
+
+"""
+Responsive image variants.
+For an original stored as <hash>.<ext> the pipeline writes
+<hash>-<width>w.<ext> and <hash>-<width>w.webp beside it for each width in
+VARIANT_WIDTHS that is smaller than the original (plus a full-width WebP).
+Templates pick them up through variants_for() to build srcset attributes.
+"""
+
+# thumbnail, card and hero widths in CSS pixels
+VARIANT_WIDTHS = {
+    'thumb': 160,
+    'card': 480,
+    'hero': 1200,
+}
+JPEG_QUALITY = 82
+WEBP_QUALITY = 78
+RASTER_EXTENSIONS = {'.jpg', '.jpeg', '.png'}
+
+
+def variant_path(path, width, ext=None):
+    stem, original_ext = os.path.splitext(path)
+    return f'{stem}-{width}w{ext or original_ext}'
+
+
+def _save(image, path, ext):
+    # A unique name per writer, so two workers generating the same variant never share a temp file
+    tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+    try:
+        if ext == '.webp':
+            image.save(tmp_path, 'WEBP', quality=WEBP_QUALITY, method=6)
+        elif ext in ('.jpg', '.jpeg'):
+            image.convert('RGB').save(tmp_path, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+        else:
+            image.save(tmp_path, 'PNG', optimize=True)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def generate_variants(path):
+    """Write the resized JPEG/PNG and WebP variants of an image; returns the paths written"""
+    # Pillow is only needed here, in the job worker; web requests just list the files on disk
+    from PIL import Image, ImageOps
+
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in RASTER_EXTENSIONS:
+        return []
+    written = []
+    with Image.open(path) as original:
+        # Apply EXIF rotation so phone photos come out the right way up
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+        widths = sorted({w for w in VARIANT_WIDTHS.values() if w < image.width} | {image.width})
+        for width in widths:
+            if width == image.width:
+                resized = image
+            else:
+                height = max(1, round(image.height * width / image.width))
+                resized = image.resize((width, height), Image.LANCZOS)
+            for variant_ext in (ext, '.webp'):
+                target = variant_path(path, width, variant_ext)
+                if not os.path.exists(target):
+                    _save(resized, target, variant_ext)
+                    written.append(target)
+    return written
+
+
+def variants_for(path):
+    """Return {'original': [(path, width)], 'webp': [(path, width)]} for the variants on disk"""
+    found = {'original': [], 'webp': []}
+    stem, ext = os.path.splitext(path)
+    for candidate in glob.glob(f'{glob.escape(stem)}-*w.*'):
+        name, candidate_ext = os.path.splitext(candidate)
+        width = name.rsplit('-', 1)[1][:-1]
+        if not width.isdigit():
+            continue
+        if candidate_ext == '.webp':
+            found['webp'].append((candidate, int(width)))
+        elif candidate_ext == ext:
+            found['original'].append((candidate, int(width)))
+    for key in found:
+        found[key].sort(key=lambda item: item[1])
+    return found
+
+
+def delete_variants(path):
+    """Remove every variant written for an original"""
+    stem = os.path.splitext(path)[0]
+    for candidate in glob.glob(f'{glob.escape(stem)}-*w.*'):
+        try:
+            os.remove(candidate)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,209 @@
+# instrumentation.py - Per-request timing, SQL metrics and a Prometheus endpoint
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import defaultdict
+
+from flask import Response, abort, before_render_template, g, has_request_context, request, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+"""
+Opt-in request instrumentation (INSTRUMENTATION_ENABLED=1).
+For every request it records wall time, template render time and the number
+and duration of SQL statements (from SQLAlchemy cursor events on every
+engine, replicas included). A statement run INSTRUMENTATION_N_PLUS_ONE times
+or more in one request is logged and counted as a likely N+1. Each response
+gets a Server-Timing header, and /metrics serves the totals in the Prometheus
+text format. Metrics are kept per process: scrape each worker, or run the
+metrics endpoint on a single-worker deployment.
+"""
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PLACEHOLDER_LIST = re.compile(r'\(\s*(?:\?|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|:\w+))+\s*\)')
+WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_statement(statement):
+    """Collapse whitespace and expanded IN (...) lists so repeated queries share one fingerprint"""
+    return PLACEHOLDER_LIST.sub('(...)', WHITESPACE.sub(' ', statement).strip())
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{_escape_label(value)}"' for name, value in labels.items()) + '}'
+
+
+class Instrumentation:
+    """Collect request, template and SQL timings and expose them as metrics"""
+
+    def __init__(self, app=None, gauges=None):
+        # gauges: optional callable returning {name: value} sampled at scrape time (e.g. pool stats)
+        self.gauges = gauges
+        self.lock = threading.Lock()
+        self.enabled = False
+        self.requests = defaultdict(int)  # (endpoint, method, status) -> count
+        self.durations = defaultdict(lambda: [0] * (len(DURATION_BUCKETS) + 1))  # endpoint -> bucket counts
+        self.duration_sums = defaultdict(float)
+        self.template_seconds = defaultdict(float)
+        self.query_counts = defaultdict(int)
+        self.query_seconds = defaultdict(float)
+        self.statement_calls = defaultdict(int)  # (endpoint, fingerprint) -> count
+        self.statement_seconds = defaultdict(float)
+        self.n_plus_one = defaultdict(int)
+        self.statements = {}  # fingerprint -> normalized SQL
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = bool(app.config.get('INSTRUMENTATION_ENABLED'))
+        self.n_plus_one_threshold = int(app.config.get('INSTRUMENTATION_N_PLUS_ONE', 5))
+        self.token = app.config.get('METRICS_TOKEN')
+        if not self.enabled:
+            return
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        before_render_template.connect(self._start_template, app)
+        template_rendered.connect(self._finish_template, app)
+        event.listen(Engine, 'before_cursor_execute', self._start_query)
+        event.listen(Engine, 'after_cursor_execute', self._finish_query)
+        app.add_url_rule('/metrics', 'metrics', self.metrics_view)
+
+    # Collection
+
+    def _start_request(self):
+        g.instrumentation = {
+            'start': time.perf_counter(),
+            'template_seconds': 0.0,
+            'template_start': [],
+            'query_count': 0,
+            'query_seconds': 0.0,
+            'statements': defaultdict(lambda: [0, 0.0])
+        }
+
+    def _start_template(self, sender, template, context, **extra):
+        if 'instrumentation' in g:
+            g.instrumentation['template_start'].append(time.perf_counter())
+
+    def _finish_template(self, sender, template, context, **extra):
+        if 'instrumentation' in g and g.instrumentation['template_start']:
+            # Nested renders (includes) are counted once, by the outermost template
+            start = g.instrumentation['template_start'].pop()
+            if not g.instrumentation['template_start']:
+                g.instrumentation['template_seconds'] += time.perf_counter() - start
+
+    def _start_query(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('instrumentation_start', []).append(time.perf_counter())
+
+    def _finish_query(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('instrumentation_start')
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        # Background jobs and CLI commands have no request to attribute the query to
+        if not has_request_context() or 'instrumentation' not in g:
+            return
+        data = g.instrumentation
+        data['query_count'] += 1
+        data['query_seconds'] += elapsed
+        entry = data['statements'][normalize_statement(statement)]
+        entry[0] += 1
+        entry[1] += elapsed
+
+    def _finish_request(self, response):
+        data = g.pop('instrumentation', None)
+        if data is None:
+            return response
+        elapsed = time.perf_counter() - data['start']
+        endpoint = request.endpoint or 'none'
+        flagged = []
+        with self.lock:
+            self.requests[(endpoint, request.method, response.status_code)] += 1
+            buckets = self.durations[endpoint]
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if elapsed <= bound:
+                    buckets[i] += 1
+                    break
+            else:
+                buckets[-1] += 1
+            self.duration_sums[endpoint] += elapsed
+            self.template_seconds[endpoint] += data['template_seconds']
+            self.query_counts[endpoint] += data['query_count']
+            self.query_seconds[endpoint] += data['query_seconds']
+            for statement, (calls, seconds) in data['statements'].items():
+                fingerprint = hashlib.sha1(statement.encode('utf-8')).hexdigest()[:12]
+                self.statements.setdefault(fingerprint, statement)
+                self.statement_calls[(endpoint, fingerprint)] += calls
+                self.statement_seconds[(endpoint, fingerprint)] += seconds
+                if statement.startswith('SELECT') and calls >= self.n_plus_one_threshold:
+                    self.n_plus_one[(endpoint, fingerprint)] += 1
+                    flagged.append((calls, statement))
+        for calls, statement in flagged:
+            logger.warning('Possible N+1 in %s: %d runs of %s', endpoint, calls, statement[:300])
+        response.headers.add(
+            'Server-Timing',
+            f'app;dur={elapsed * 1000:.1f}, '
+            f'db;dur={data["query_seconds"] * 1000:.1f};desc="{data["query_count"]} queries", '
+            f'tpl;dur={data["template_seconds"] * 1000:.1f}'
+        )
+        return response
+
+    # Exposition
+
+    def metrics_view(self):
+        if self.token and request.headers.get('Authorization') != f'Bearer {self.token}':
+            abort(403)
+        return Response(self.render(), mimetype='text/plain; version=0.0.4')
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in samples:
+                lines.append(f'{name}{labels} {value}')
+
+        with self.lock:
+            metric('app_requests_total', 'counter', 'Requests handled.',
+                   [(_labels(endpoint=e, method=m, status=s), n) for (e, m, s), n in sorted(self.requests.items())])
+            histogram = []
+            for endpoint, buckets in sorted(self.durations.items()):
+                cumulative = 0
+                for bound, count in zip(DURATION_BUCKETS + ('+Inf',), buckets):
+                    cumulative += count
+                    histogram.append((_labels(endpoint=endpoint, le=bound), cumulative))
+            lines.append('# HELP app_request_duration_seconds Request wall time.')
+            lines.append('# TYPE app_request_duration_seconds histogram')
+            for labels, value in histogram:
+                lines.append(f'app_request_duration_seconds_bucket{labels} {value}')
+            for endpoint, total in sorted(self.duration_sums.items()):
+                lines.append(f'app_request_duration_seconds_sum{_labels(endpoint=endpoint)} {total:.6f}')
+                lines.append(f'app_request_duration_seconds_count{_labels(endpoint=endpoint)} {sum(self.durations[endpoint])}')
+            metric('app_template_render_seconds_total', 'counter', 'Time spent rendering templates.',
+                   [(_labels(endpoint=e), f'{v:.6f}') for e, v in sorted(self.template_seconds.items())])
+            metric('app_sql_queries_total', 'counter', 'SQL statements executed.',
+                   [(_labels(endpoint=e), v) for e, v in sorted(self.query_counts.items())])
+            metric('app_sql_query_seconds_total', 'counter', 'Time spent executing SQL.',
+                   [(_labels(endpoint=e), f'{v:.6f}') for e, v in sorted(self.query_seconds.items())])
+            metric('app_sql_statement_calls_total', 'counter', 'Executions of each SQL statement.',
+                   [(_labels(endpoint=e, statement=f), v) for (e, f), v in sorted(self.statement_calls.items())])
+            metric('app_sql_statement_seconds_total', 'counter', 'Execution time of each SQL statement.',
+                   [(_labels(endpoint=e, statement=f), f'{v:.6f}') for (e, f), v in sorted(self.statement_seconds.items())])
+            metric('app_sql_n_plus_one_total', 'counter', 'Requests that repeated a SELECT often enough to suggest an N+1.',
+                   [(_labels(endpoint=e, statement=f), v) for (e, f), v in sorted(self.n_plus_one.items())])
+            metric('app_sql_statement_info', 'gauge', 'SQL text of each statement fingerprint.',
+                   [(_labels(statement=f, sql=s[:500]), 1) for f, s in sorted(self.statements.items())])
+        if self.gauges is not None:
+            for name, value in sorted(self.gauges().items()):
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    metric(name, 'gauge', name.replace('_', ' ').capitalize() + '.', [('', value)])
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,167 @@
+# jobs.py - Database-backed background job queue
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+
+"""
+Background jobs without an external broker.
+Jobs are rows in the `job` table of the app's own database (Postgres in
+production, SQLite in development). Web handlers enqueue them after saving
+content; a worker thread inside each web process, or a separate
+`flask run-jobs` process, claims them one at a time, runs the registered
+task and retries failures with exponential backoff.
+"""
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueue:
+    """Enqueue, claim and run jobs stored through the given model"""
+
+    def __init__(self, db, model, app=None):
+        self.db = db
+        self.model = model
+        self.tasks = {}
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._next_recovery = 0.0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.mode = app.config.get('JOBS_MODE', 'thread')
+        self.poll_interval = float(app.config.get('JOBS_POLL_INTERVAL', 2))
+        self.max_attempts = int(app.config.get('JOBS_MAX_ATTEMPTS', 5))
+        self.retry_delay = float(app.config.get('JOBS_RETRY_DELAY', 10))
+        # Jobs stuck in 'running' longer than this belonged to a worker that died
+        self.stale_after = float(app.config.get('JOBS_STALE_AFTER', 600))
+
+    def task(self, name):
+        """Register a function as the task run for jobs called name"""
+        def decorator(func):
+            self.tasks[name] = func
+            return func
+        return decorator
+
+    def enqueue(self, name, delay=0, **payload):
+        """Add a job and commit it; returns the job row"""
+        if name not in self.tasks:
+            raise ValueError(f'Unknown job: {name}')
+        job = self.model(
+            name=name,
+            payload=json.dumps(payload),
+            status='queued',
+            attempts=0,
+            max_attempts=self.max_attempts,
+            run_at=datetime.utcnow() + timedelta(seconds=delay)
+        )
+        self.db.session.add(job)
+        self.db.session.commit()
+        if self.mode == 'thread':
+            self.ensure_worker_thread()
+            self._wakeup.set()
+        return job
+
+    def retry(self, job):
+        """Put a failed job back in the queue with a fresh set of attempts"""
+        job.status = 'queued'
+        job.attempts = 0
+        job.run_at = datetime.utcnow()
+        job.last_error = None
+        self.db.session.commit()
+        self._wakeup.set()
+
+    def recover_stale(self):
+        """Requeue jobs whose worker disappeared mid-run; returns how many"""
+        Job = self.model
+        result = self.db.session.execute(
+            self.db.update(Job)
+            .where(Job.status == 'running', Job.updated_at < datetime.utcnow() - timedelta(seconds=self.stale_after))
+            .values(status='queued', locked_by=None)
+        )
+        self.db.session.commit()
+        return result.rowcount
+
+    def _claim(self):
+        """Atomically move one due job to 'running' and return it, or None"""
+        Job = self.model
+        now = datetime.utcnow()
+        candidates = self.db.session.execute(
+            self.db.select(Job.id)
+            .where(Job.status == 'queued', Job.run_at <= now)
+            .order_by(Job.run_at, Job.id)
+            .limit(10)
+        ).scalars().all()
+        for job_id in candidates:
+            # The status condition makes the claim safe between competing workers
+            result = self.db.session.execute(
+                self.db.update(Job)
+                .where(Job.id == job_id, Job.status == 'queued')
+                .values(status='running', locked_by=self.worker_id,
+                        attempts=Job.attempts + 1, updated_at=now)
+            )
+            self.db.session.commit()
+            if result.rowcount == 1:
+                return self.db.session.get(Job, job_id)
+        return None
+
+    def run_next(self):
+        """Claim and run one job; returns False when nothing was due"""
+        job = self._claim()
+        if job is None:
+            return False
+        try:
+            self.tasks[job.name](**json.loads(job.payload))
+        except Exception:
+            self.db.session.rollback()
+            job = self.db.session.get(self.model, job.id)
+            job.last_error = traceback.format_exc()[-4000:]
+            if job.attempts < job.max_attempts:
+                job.status = 'queued'
+                job.run_at = datetime.utcnow() + timedelta(seconds=self.retry_delay * 2 ** (job.attempts - 1))
+            else:
+                job.status = 'failed'
+            logger.exception('Job %s (%s) failed on attempt %s', job.id, job.name, job.attempts)
+        else:
+            job.status = 'done'
+            job.last_error = None
+        job.locked_by = None
+        job.updated_at = datetime.utcnow()
+        self.db.session.commit()
+        return True
+
+    def work(self, stop_event=None, burst=False):
+        """Run jobs until stop_event is set (or, with burst, until the queue is empty)"""
+        while stop_event is None or not stop_event.is_set():
+            with self.app.app_context():
+                try:
+                    # A job only goes stale after stale_after seconds, so checking every poll is wasted writes
+                    if time.monotonic() >= self._next_recovery:
+                        self._next_recovery = time.monotonic() + self.stale_after
+                        self.recover_stale()
+                    ran = self.run_next()
+                except Exception:
+                    logger.exception('Job worker error')
+                    ran = False
+            if not ran:
+                if burst:
+                    return
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+    def ensure_worker_thread(self):
+        """Start the in-process worker thread once per process (safe after a fork)"""
+        with self._thread_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self.worker_id = f'{socket.gethostname()}:{os.getpid()}'
+            self._thread = threading.Thread(target=self.work, name='job-worker', daemon=True)
+            self._thread.start()
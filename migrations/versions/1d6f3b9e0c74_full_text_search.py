@@ -0,0 +1,45 @@
+"""full text search
+
+Revision ID: 1d6f3b9e0c74
+Revises: e5c0b8a4d217
+Create Date: 2026-10-17 16:02:11.408223
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1d6f3b9e0c74'
+down_revision = 'e5c0b8a4d217'
+branch_labels = None
+depends_on = None
+
+# Generated tsvector columns (PostgreSQL 12+); other databases search with the
+# in-memory index in search.py and need no schema changes.
+SEARCH_VECTORS = {
+    'blog_post': "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+                 "setweight(to_tsvector('english', coalesce(excerpt, '')), 'B') || "
+                 "setweight(to_tsvector('english', regexp_replace(coalesce(content, ''), '<[^>]+>', ' ', 'g')), 'C')",
+    'podcast_episode': "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+                       "setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+    'event': "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+             "setweight(to_tsvector('english', coalesce(description, '')), 'B') || "
+             "setweight(to_tsvector('english', coalesce(location, '')), 'C')",
+}
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for table, expression in SEARCH_VECTORS.items():
+        op.execute(f'ALTER TABLE {table} ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ({expression}) STORED')
+        op.create_index(f'ix_{table}_search_vector', table, ['search_vector'], postgresql_using='gin')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for table in SEARCH_VECTORS:
+        op.drop_index(f'ix_{table}_search_vector', table_name=table)
+        op.drop_column(table, 'search_vector')
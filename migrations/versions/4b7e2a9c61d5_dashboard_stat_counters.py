@@ -0,0 +1,35 @@
+"""dashboard stat counters
+
+Revision ID: 4b7e2a9c61d5
+Revises: c3d8e1f04a27
+Create Date: 2026-10-17 11:02:17.554310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b7e2a9c61d5'
+down_revision = 'c3d8e1f04a27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('stat_counter',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('value', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    # Seed the counters from the current row counts
+    op.execute('INSERT INTO stat_counter (name, value) SELECT \'users\', count(*) FROM "user"')
+    op.execute("INSERT INTO stat_counter (name, value) SELECT 'messages', count(*) FROM contact_message")
+    op.execute("INSERT INTO stat_counter (name, value) SELECT 'unread_messages', count(*) FROM contact_message "
+               "WHERE is_read IS NULL OR NOT is_read")
+    op.execute("INSERT INTO stat_counter (name, value) SELECT 'blog_posts', count(*) FROM blog_post")
+    op.execute("INSERT INTO stat_counter (name, value) SELECT 'episodes', count(*) FROM podcast_episode")
+
+
+def downgrade():
+    op.drop_table('stat_counter')
@@ -0,0 +1,31 @@
+"""inbox unread index
+
+Revision ID: 8c2a6e1f5b93
+Revises: 1d6f3b9e0c74
+Create Date: 2026-10-17 16:41:27.193354
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c2a6e1f5b93'
+down_revision = '1d6f3b9e0c74'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The inbox now pages by id, so the unread filter needs its partial index on id
+    with op.batch_alter_table('contact_message', schema=None) as batch_op:
+        batch_op.drop_index('ix_contact_message_unread_created_at')
+        batch_op.create_index('ix_contact_message_unread_id', ['id'], unique=False,
+                              postgresql_where=sa.text('NOT is_read'), sqlite_where=sa.text('is_read = 0'))
+
+
+def downgrade():
+    with op.batch_alter_table('contact_message', schema=None) as batch_op:
+        batch_op.drop_index('ix_contact_message_unread_id')
+        batch_op.create_index('ix_contact_message_unread_created_at', ['created_at'], unique=False,
+                              postgresql_where=sa.text('NOT is_read'), sqlite_where=sa.text('is_read = 0'))
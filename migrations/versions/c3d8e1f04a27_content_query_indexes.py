@@ -0,0 +1,72 @@
+"""content query indexes
+
+Revision ID: c3d8e1f04a27
+Revises: 9f94abd877cf
+Create Date: 2026-10-17 10:12:41.381245
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3d8e1f04a27'
+down_revision = '9f94abd877cf'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Published listings: WHERE is_published ORDER BY publish_date DESC, id DESC
+    with op.batch_alter_table('blog_post', schema=None) as batch_op:
+        batch_op.create_index('ix_blog_post_published_publish_date', ['publish_date', 'id'], unique=False,
+                              postgresql_where=sa.text('is_published'), sqlite_where=sa.text('is_published = 1'))
+        batch_op.create_index('ix_blog_post_created_at', ['created_at'], unique=False)
+
+    with op.batch_alter_table('podcast_episode', schema=None) as batch_op:
+        batch_op.create_index('ix_podcast_episode_published_publish_date', ['publish_date', 'id'], unique=False,
+                              postgresql_where=sa.text('is_published'), sqlite_where=sa.text('is_published = 1'))
+        batch_op.create_index('ix_podcast_episode_episode_number', ['episode_number'], unique=False)
+
+    with op.batch_alter_table('upcoming_episode', schema=None) as batch_op:
+        batch_op.create_index('ix_upcoming_episode_scheduled_date', ['scheduled_date'], unique=False)
+
+    with op.batch_alter_table('event', schema=None) as batch_op:
+        batch_op.create_index('ix_event_event_date', ['event_date', 'id'], unique=False)
+
+    with op.batch_alter_table('homepage_video', schema=None) as batch_op:
+        batch_op.create_index('ix_homepage_video_active', ['id'], unique=False,
+                              postgresql_where=sa.text('is_active'), sqlite_where=sa.text('is_active = 1'))
+        batch_op.create_index('ix_homepage_video_created_at', ['created_at'], unique=False)
+
+    # Inbox: ORDER BY created_at DESC, optionally only unread messages
+    with op.batch_alter_table('contact_message', schema=None) as batch_op:
+        batch_op.create_index('ix_contact_message_created_at', ['created_at'], unique=False)
+        batch_op.create_index('ix_contact_message_unread_created_at', ['created_at'], unique=False,
+                              postgresql_where=sa.text('NOT is_read'), sqlite_where=sa.text('is_read = 0'))
+        batch_op.create_index('ix_contact_message_user_id', ['user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('contact_message', schema=None) as batch_op:
+        batch_op.drop_index('ix_contact_message_user_id')
+        batch_op.drop_index('ix_contact_message_unread_created_at')
+        batch_op.drop_index('ix_contact_message_created_at')
+
+    with op.batch_alter_table('homepage_video', schema=None) as batch_op:
+        batch_op.drop_index('ix_homepage_video_created_at')
+        batch_op.drop_index('ix_homepage_video_active')
+
+    with op.batch_alter_table('event', schema=None) as batch_op:
+        batch_op.drop_index('ix_event_event_date')
+
+    with op.batch_alter_table('upcoming_episode', schema=None) as batch_op:
+        batch_op.drop_index('ix_upcoming_episode_scheduled_date')
+
+    with op.batch_alter_table('podcast_episode', schema=None) as batch_op:
+        batch_op.drop_index('ix_podcast_episode_episode_number')
+        batch_op.drop_index('ix_podcast_episode_published_publish_date')
+
+    with op.batch_alter_table('blog_post', schema=None) as batch_op:
+        batch_op.drop_index('ix_blog_post_published_publish_date')
+        batch_op.drop_index('ix_blog_post_created_at')
@@ -0,0 +1,39 @@
+"""audio metadata
+
+Revision ID: e5c0b8a4d217
+Revises: 7a1f5d3e9b82
+Create Date: 2026-10-17 15:21:48.032516
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5c0b8a4d217'
+down_revision = '7a1f5d3e9b82'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('podcast_episode', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('duration_seconds', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('bitrate', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('sample_rate', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('byte_size', sa.BigInteger(), nullable=True))
+        batch_op.alter_column('duration',
+               existing_type=sa.String(length=20),
+               nullable=True)
+
+
+def downgrade():
+    op.execute("UPDATE podcast_episode SET duration = '' WHERE duration IS NULL")
+    with op.batch_alter_table('podcast_episode', schema=None) as batch_op:
+        batch_op.alter_column('duration',
+               existing_type=sa.String(length=20),
+               nullable=False)
+        batch_op.drop_column('byte_size')
+        batch_op.drop_column('sample_rate')
+        batch_op.drop_column('bitrate')
+        batch_op.drop_column('duration_seconds')
@@ -0,0 +1,317 @@
+# models.py - Database models and the counters kept alongside them
+from datetime import datetime
+
+from flask import has_request_context, request
+from flask_sqlalchemy import SQLAlchemy
+
+from replicas import RoutingSession
+
+"""
+Database models.
+db is created unbound here and attached to the app by create_app(), so the
+models can be imported by the blueprints, the job tasks and `flask db`
+without building an app first. The mapper listeners below keep the dashboard
+counters and the content versions in step with every ORM write.
+"""
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+
+class User(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(80), unique=True, nullable=False)
+    email = db.Column(db.String(255), unique=True, nullable=False)
+    password = db.Column(db.String(255), nullable=False)
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
+    messages = db.relationship('ContactMessage', backref='user', lazy=True)
+    
+    def __repr__(self):
+        return f'<User {self.username}>'
+
+
+
+
+
+class Admin(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(80), unique=True, nullable=False)
+    pin = db.Column(db.String(255), nullable=False)
+    created_at = db.Column(db.DateTime, server_default=db.func.now())  
+    def __repr__(self):
+        return f'<Admin {self.username}>'
+
+
+class ContactMessage(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    name = db.Column(db.String(100), nullable=False)
+    email = db.Column(db.String(120), nullable=False)
+    subject = db.Column(db.String(200), nullable=False)
+    message = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
+    is_read = db.Column(db.Boolean, default=False)  
+    __table_args__ = (
+        db.Index('ix_contact_message_created_at', 'created_at'),
+        db.Index('ix_contact_message_unread_id', 'id',
+                 postgresql_where=db.text('NOT is_read'), sqlite_where=db.text('is_read = 0')),
+        db.Index('ix_contact_message_user_id', 'user_id'),
+    )
+    def __repr__(self):
+        return f'<ContactMessage {self.subject}>'
+
+
+class BlogPost(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(200), nullable=False)
+    excerpt = db.Column(db.Text, nullable=False)
+    content = db.Column(db.Text, nullable=False)
+    image = db.Column(db.String(200), nullable=False)
+    author = db.Column(db.String(100), nullable=False)
+    publish_date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    is_published = db.Column(db.Boolean, default=True)
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
+    updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())  
+    __table_args__ = (
+        db.Index('ix_blog_post_published_publish_date', 'publish_date', 'id',
+                 postgresql_where=db.text('is_published'), sqlite_where=db.text('is_published = 1')),
+        db.Index('ix_blog_post_created_at', 'created_at'),
+    )
+    def __repr__(self):
+        return f'<BlogPost {self.title}>'
+
+
+class PodcastEpisode(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(200), nullable=False)
+    description = db.Column(db.Text, nullable=False)
+    duration = db.Column(db.String(20), nullable=True)  # display form of duration_seconds
+    duration_seconds = db.Column(db.Integer, nullable=True)
+    bitrate = db.Column(db.Integer, nullable=True)
+    sample_rate = db.Column(db.Integer, nullable=True)
+    byte_size = db.Column(db.BigInteger, nullable=True)
+    episode_number = db.Column(db.Integer, nullable=False)
+    image_url = db.Column(db.String(200), nullable=False)
+    audio_url = db.Column(db.String(200), nullable=False)
+    publish_date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    is_published = db.Column(db.Boolean, default=True)
+    created_at = db.Column(db.DateTime, server_default=db.func.now())  
+    __table_args__ = (
+        db.Index('ix_podcast_episode_published_publish_date', 'publish_date', 'id',
+                 postgresql_where=db.text('is_published'), sqlite_where=db.text('is_published = 1')),
+        db.Index('ix_podcast_episode_episode_number', 'episode_number'),
+    )
+    def __repr__(self):
+        return f'<PodcastEpisode {self.title}>'
+
+class UpcomingEpisode(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(200), nullable=False)
+    description = db.Column(db.Text, nullable=False)
+    scheduled_date = db.Column(db.DateTime, nullable=False)
+    image_url = db.Column(db.String(200), nullable=False)
+    created_at = db.Column(db.DateTime, server_default=db.func.now())  
+    __table_args__ = (
+        db.Index('ix_upcoming_episode_scheduled_date', 'scheduled_date'),
+    )
+    def __repr__(self):
+        return f'<UpcomingEpisode {self.title}>'
+
+class Event(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(200), nullable=False)
+    description = db.Column(db.Text, nullable=False)
+    event_date = db.Column(db.DateTime, nullable=False)
+    location = db.Column(db.String(200), nullable=False)
+    image_url = db.Column(db.String(200), nullable=False)
+    created_at = db.Column(db.DateTime, server_default=db.func.now())  
+    __table_args__ = (
+        db.Index('ix_event_event_date', 'event_date', 'id'),
+    )
+    def __repr__(self):
+        return f'<Event {self.title}>'
+
+class HomepageVideo(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(200), nullable=False)
+    description = db.Column(db.Text, nullable=True)
+    video_url = db.Column(db.String(200), nullable=False)
+    is_active = db.Column(db.Boolean, default=True)
+    created_at = db.Column(db.DateTime, server_default=db.func.now())  
+    __table_args__ = (
+        db.Index('ix_homepage_video_active', 'id',
+                 postgresql_where=db.text('is_active'), sqlite_where=db.text('is_active = 1')),
+        db.Index('ix_homepage_video_created_at', 'created_at'),
+    )
+    def __repr__(self):
+        return f'<HomepageVideo {self.title}>'
+
+class Job(db.Model):
+    """A unit of background work (see jobs.py)"""
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text, nullable=False, default='{}')
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_by = db.Column(db.String(100), nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
+    updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
+    __table_args__ = (
+        db.Index('ix_job_status_run_at', 'status', 'run_at'),
+    )
+    def __repr__(self):
+        return f'<Job {self.name} {self.status}>'
+
+class StatCounter(db.Model):
+    """Row counts for the admin dashboard, kept in step with inserts/deletes"""
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+    def __repr__(self):
+        return f'<StatCounter {self.name}={self.value}>'
+
+
+# Dashboard counters: model -> counter name. The counters are bumped on the
+# flushing connection, so they commit or roll back together with the rows.
+COUNTED_MODELS = {
+    User: 'users',
+    ContactMessage: 'messages',
+    BlogPost: 'blog_posts',
+    PodcastEpisode: 'episodes'
+}
+STAT_COUNTERS = ('users', 'messages', 'unread_messages', 'blog_posts', 'episodes')
+
+def bump_counter(connection, name, delta):
+    """Add delta to a dashboard counter using the given connection"""
+    counters = StatCounter.__table__
+    connection.execute(
+        counters.update()
+        .where(counters.c.name == name)
+        .values(value=counters.c.value + delta)
+    )
+
+def _count_insert(mapper, connection, target):
+    bump_counter(connection, COUNTED_MODELS[mapper.class_], 1)
+    if isinstance(target, ContactMessage) and not target.is_read:
+        bump_counter(connection, 'unread_messages', 1)
+
+def _count_delete(mapper, connection, target):
+    bump_counter(connection, COUNTED_MODELS[mapper.class_], -1)
+    if isinstance(target, ContactMessage) and not target.is_read:
+        bump_counter(connection, 'unread_messages', -1)
+
+def _count_read_toggle(mapper, connection, target):
+    history = db.inspect(target).attrs.is_read.history
+    if history.has_changes() and bool(history.deleted and history.deleted[0]) != bool(target.is_read):
+        bump_counter(connection, 'unread_messages', -1 if target.is_read else 1)
+
+for counted_model in COUNTED_MODELS:
+    db.event.listen(counted_model, 'after_insert', _count_insert)
+    db.event.listen(counted_model, 'after_delete', _count_delete)
+db.event.listen(ContactMessage, 'after_update', _count_read_toggle)
+
+def rebuild_stat_counters():
+    """Recount every dashboard counter from its table (used when rows are missing)"""
+    counts = db.session.execute(db.select(
+        db.select(db.func.count()).select_from(User).scalar_subquery(),
+        db.select(db.func.count()).select_from(ContactMessage).scalar_subquery(),
+        db.select(db.func.count()).select_from(ContactMessage)
+            .where(db.or_(ContactMessage.is_read.is_(False), ContactMessage.is_read.is_(None))).scalar_subquery(),
+        db.select(db.func.count()).select_from(BlogPost).scalar_subquery(),
+        db.select(db.func.count()).select_from(PodcastEpisode).scalar_subquery()
+    )).one()
+    for name, value in zip(STAT_COUNTERS, counts):
+        db.session.merge(StatCounter(name=name, value=value))
+    db.session.commit()
+    return dict(zip(STAT_COUNTERS, counts))
+
+# Content versions: model -> page cache tag. Every write bumps the 'version:<tag>'
+# counter in the same transaction, and the public pages derive their ETags from it.
+CONTENT_VERSION_MODELS = {
+    BlogPost: 'blog',
+    PodcastEpisode: 'episodes',
+    UpcomingEpisode: 'upcoming',
+    Event: 'events',
+    HomepageVideo: 'videos',
+    Admin: 'admins'
+}
+
+def bump_content_version(connection, tag):
+    bump_counter(connection, f'version:{tag}', 1)
+
+def _bump_content_version(mapper, connection, target):
+    bump_content_version(connection, CONTENT_VERSION_MODELS[mapper.class_])
+
+for versioned_model in CONTENT_VERSION_MODELS:
+    for event_name in ('after_insert', 'after_update', 'after_delete'):
+        db.event.listen(versioned_model, event_name, _bump_content_version)
+
+def content_versions(tags):
+    """Current {tag: version} for the given tags, or None if a counter row is missing.
+
+    Versions are remembered for the rest of the request, so the ETag and the
+    page cache key of one response are built from the same reading.
+    """
+    if not tags:
+        return {}
+    known = request.environ.setdefault('content_versions', {}) if has_request_context() else {}
+    names = [f'version:{tag}' for tag in tags if tag not in known]
+    if names:
+        versions = dict(db.session.execute(
+            db.select(StatCounter.name, StatCounter.value).where(StatCounter.name.in_(names))
+        ).all())
+        missing = [name for name in names if name not in versions]
+        if missing:
+            # Writes made before the row existed were not counted, so start it now and skip validation once
+            try:
+                for name in missing:
+                    db.session.add(StatCounter(name=name, value=0))
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+            return None
+        known.update((name.split(':', 1)[1], value) for name, value in versions.items())
+    return {tag: known[tag] for tag in tags}
+
+# Every column that stores a URL from the content store
+UPLOAD_URL_COLUMNS = (
+    BlogPost.image,
+    PodcastEpisode.image_url,
+    PodcastEpisode.audio_url,
+    UpcomingEpisode.image_url,
+    Event.image_url
+)
+
+def upload_reference_count(url):
+    """Count the rows that point at an uploaded file, in a single query"""
+    counts = db.session.execute(db.select(*[
+        db.select(db.func.count()).where(column == url).scalar_subquery()
+        for column in UPLOAD_URL_COLUMNS
+    ])).one()
+    return sum(counts)
+
+# Searchable content; weights mirror the generated search_vector columns on Postgres
+SEARCH_SOURCES = {
+    'blog': {
+        'model': BlogPost,
+        'fields': {'title': 'A', 'excerpt': 'B', 'content': 'C'},
+        'snippet': ['excerpt', 'content'],
+        'date': 'publish_date',
+        'published_only': True
+    },
+    'episode': {
+        'model': PodcastEpisode,
+        'fields': {'title': 'A', 'description': 'B'},
+        'snippet': 'description',
+        'date': 'publish_date',
+        'published_only': True
+    },
+    'event': {
+        'model': Event,
+        'fields': {'title': 'A', 'description': 'B', 'location': 'C'},
+        'snippet': 'description',
+        'date': 'event_date',
+        'published_only': False
+    }
+}
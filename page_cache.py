@@ -0,0 +1,250 @@
+# page_cache.py - Rendered page cache for the public routes
+import hashlib
+import os
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import wraps
+
+from flask import request, session, make_response
+
+"""
+Full-page cache for public pages.
+Rendered HTML is stored under a key made of the endpoint, its arguments, the
+query string, the logged-in state and the current versions of the content
+types it was built from, and every entry is tagged with that content (e.g.
+'blog', 'episode:12') so admin handlers can invalidate exactly the pages an
+edit touches. Because the versions are part of the key, a page rendered
+before an edit is never served, or paired with a new ETag, after it.
+"""
+
+
+class NullPageCache:
+    """Backend that never stores anything (PAGE_CACHE_BACKEND=null)"""
+
+    shared = False
+
+    def get(self, key):
+        return None
+
+    def set(self, key, body, tags, ttl):
+        pass
+
+    def invalidate(self, *tags):
+        pass
+
+    def clear(self):
+        pass
+
+
+class MemoryPageCache:
+    """In-process LRU cache bounded by the total size of the stored pages.
+
+    Each worker keeps its own entries and invalidate() only reaches this one;
+    the content versions in every key are what stop other workers serving a
+    page from before an edit.
+    """
+
+    shared = False
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries = OrderedDict()  # key -> (body, tags, expires_at)
+        self.tags = {}  # tag -> set of keys
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[2] <= time.monotonic():
+                self._remove(key)
+                return None
+            self.entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, body, tags, ttl):
+        if len(body) > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (body, tags, time.monotonic() + ttl)
+            self.size += len(body)
+            for tag in tags:
+                self.tags.setdefault(tag, set()).add(key)
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self.entries)))
+
+    def invalidate(self, *tags):
+        with self.lock:
+            for tag in tags:
+                for key in self.tags.pop(tag, ()):
+                    self._remove(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.tags.clear()
+            self.size = 0
+
+    def _remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        self.size -= len(entry[0])
+        for tag in entry[1]:
+            keys = self.tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.tags[tag]
+
+
+class FileSystemPageCache:
+    """On-disk cache shared by every worker on the host.
+
+    Entries live in <directory>/pages/<hash>; each tag is a directory under
+    <directory>/tags/ holding one empty marker file per tagged entry.
+    """
+
+    shared = True
+
+    def __init__(self, directory):
+        self.pages_dir = os.path.join(directory, 'pages')
+        self.tags_dir = os.path.join(directory, 'tags')
+        os.makedirs(self.pages_dir, exist_ok=True)
+        os.makedirs(self.tags_dir, exist_ok=True)
+
+    def _page_path(self, key):
+        return os.path.join(self.pages_dir, hashlib.sha1(key.encode('utf-8')).hexdigest())
+
+    def get(self, key):
+        try:
+            with open(self._page_path(key), 'rb') as f:
+                expires_at, body = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if expires_at <= time.time():
+            return None
+        return body
+
+    def set(self, key, body, tags, ttl):
+        path = self._page_path(key)
+        name = os.path.basename(path)
+        for tag in tags:
+            tag_dir = os.path.join(self.tags_dir, tag.replace(os.sep, '_'))
+            os.makedirs(tag_dir, exist_ok=True)
+            open(os.path.join(tag_dir, name), 'a').close()
+        # Write to a temporary file and rename so readers never see a partial page
+        tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump((time.time() + ttl, body), f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def invalidate(self, *tags):
+        for tag in tags:
+            tag_dir = os.path.join(self.tags_dir, tag.replace(os.sep, '_'))
+            try:
+                names = os.listdir(tag_dir)
+            except FileNotFoundError:
+                continue
+            for name in names:
+                for path in (os.path.join(self.pages_dir, name), os.path.join(tag_dir, name)):
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+
+    def clear(self):
+        for root, dirs, files in os.walk(self.pages_dir):
+            for name in files:
+                os.remove(os.path.join(root, name))
+        for root, dirs, files in os.walk(self.tags_dir, topdown=False):
+            for name in files:
+                os.remove(os.path.join(root, name))
+            for name in dirs:
+                os.rmdir(os.path.join(root, name))
+
+
+class PageCache:
+    """Front end used by the app: builds the backend from config and exposes the view decorator"""
+
+    def __init__(self, versions=None, before_render=None, app=None):
+        self.versions = versions
+        # Called before a miss is rendered, e.g. to read from the primary rather than a replica
+        self.before_render = before_render
+        self.backend = NullPageCache()
+        self.ttl = 300
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        backend = app.config.get('PAGE_CACHE_BACKEND', 'memory')
+        self.ttl = int(app.config.get('PAGE_CACHE_TTL', 300))
+        if backend == 'memory':
+            self.backend = MemoryPageCache(int(app.config.get('PAGE_CACHE_MAX_BYTES', 32 * 1024 * 1024)))
+        elif backend == 'filesystem':
+            self.backend = FileSystemPageCache(app.config['PAGE_CACHE_DIR'])
+        elif backend == 'null':
+            self.backend = NullPageCache()
+        else:
+            raise ValueError(f'Unknown PAGE_CACHE_BACKEND: {backend}')
+
+    @property
+    def shared(self):
+        """Whether every worker reads the same entries, so a page rendered by one (e.g. warmed by a job) serves the rest"""
+        return self.backend.shared
+
+    def invalidate(self, *tags):
+        self.backend.invalidate(*tags)
+
+    def clear(self):
+        self.backend.clear()
+
+    @staticmethod
+    def make_key(endpoint, view_args, versions=None):
+        args = ','.join(f'{k}={view_args[k]}' for k in sorted(view_args))
+        # Logged-in pages show the username in the navbar, so each session identity gets its own entry
+        identity = f"u{session.get('user_id') or ''}:a{session.get('admin_id') or ''}"
+        content = ','.join(f'{tag}={versions[tag]}' for tag in sorted(versions or {}))
+        return f"{endpoint}|{args}|{request.query_string.decode('latin-1')}|{identity}|{content}"
+
+    def cached(self, *tags):
+        """Cache a GET view's rendered body under the given tags.
+
+        Tags may reference view arguments, e.g. 'blog:{post_id}'. The plain
+        tags name content types whose versions are read before rendering and
+        made part of the key; if they are unknown the page is not cached.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(**view_args):
+                # Pending flash messages are rendered into the page, so skip the cache entirely
+                if request.method != 'GET' or '_flashes' in session:
+                    return view(**view_args)
+                versions = self.versions([tag for tag in tags if '{' not in tag]) if self.versions else {}
+                if versions is None:
+                    return view(**view_args)
+                key = self.make_key(request.endpoint, view_args, versions)
+                # In-process callers (e.g. cache warming) can force a fresh render via the WSGI environ
+                refresh = request.environ.get('page_cache.refresh', False)
+                body = None if refresh else self.backend.get(key)
+                if body is not None:
+                    response = make_response(body)
+                    response.headers['X-Page-Cache'] = 'HIT'
+                    return response
+                if self.before_render is not None:
+                    self.before_render()
+                response = make_response(view(**view_args))
+                if response.status_code == 200 and not response.direct_passthrough:
+                    entry_tags = [tag.format(**view_args) for tag in tags]
+                    self.backend.set(key, response.get_data(), entry_tags, self.ttl)
+                    response.headers['X-Page-Cache'] = 'MISS'
+                return response
+            return wrapper
+        return decorator
@@ -0,0 +1,272 @@
+# public.py - Public pages, feeds and the JSON API
+import mimetypes
+import os
+
+from flask import Blueprint, abort, current_app, flash, jsonify, redirect, render_template, request, send_file, session, url_for
+
+import config
+from extensions import conditional_pages, full_text_search, page_cache, rate_limiter
+from helpers import CONTENT_ADDRESSED_NAME, get_homepage_videos, keyset_page, upload_path_from_url
+from models import db, BlogPost, ContactMessage, Event, PodcastEpisode, UpcomingEpisode
+from tasks import build_feed, feed_page_path
+
+"""
+Public blueprint: the pages anyone can read, the podcast feed, search and
+the paged JSON API. These are the endpoints REPLICA_READ_ENDPOINTS routes to
+read replicas and the page cache and ETags cover.
+"""
+
+bp = Blueprint('public', __name__)
+
+# Content the shared layout and the context processors draw from (the admin flag, the
+# homepage videos), so every page revalidates when it changes, even pages with no content of their own
+LAYOUT_TAGS = ('admins', 'videos')
+
+
+def search_result_url(hit):
+    if hit['type'] == 'blog':
+        return url_for('public.blog_post', post_id=hit['id'])
+    if hit['type'] == 'episode':
+        return url_for('public.episode_detail', episode_id=hit['id'])
+    return url_for('public.events', _anchor=f"event-{hit['id']}")
+
+# Routes for main pages
+@bp.route('/')
+@conditional_pages.etag('episodes', 'upcoming', 'blog', 'events', *LAYOUT_TAGS)
+@page_cache.cached('episodes', 'upcoming', 'blog', 'events', *LAYOUT_TAGS)
+def homepage():
+    """Render the podcast homepage"""
+    # Get one page of published episodes
+    episodes, next_cursor = keyset_page(
+        PodcastEpisode.query.filter_by(is_published=True),
+        PodcastEpisode.publish_date, PodcastEpisode.id,
+        cursor=request.args.get('after')
+    )
+    # Get the next few upcoming episodes
+    upcoming_episodes = UpcomingEpisode.query.order_by(UpcomingEpisode.scheduled_date.asc()).limit(current_app.config['HOMEPAGE_UPCOMING_LIMIT']).all()  
+    # Get blog posts
+    blog_posts = BlogPost.query.filter_by(is_published=True).order_by(BlogPost.publish_date.desc()).limit(3).all()  
+    # Get events
+    events = Event.query.order_by(Event.event_date.desc()).limit(3).all()  
+    return render_template('index.html', 
+                         episodes=episodes, 
+                         next_cursor=next_cursor,
+                         upcoming_episodes=upcoming_episodes,
+                         blog_posts=blog_posts,
+                         events=events,
+                         homepage_videos=get_homepage_videos()
+    )
+@bp.route('/host')
+@conditional_pages.etag(*LAYOUT_TAGS)
+@page_cache.cached(*LAYOUT_TAGS)
+def host():
+    """Render the host page"""
+    return render_template('host.html', hosts=config.HOSTS)
+@bp.route('/blog')
+@conditional_pages.etag('blog', *LAYOUT_TAGS)
+@page_cache.cached('blog', *LAYOUT_TAGS)
+def blog():
+    """Render the blog page"""
+    # Get one page of published blog posts
+    blog_posts, next_cursor = keyset_page(
+        BlogPost.query.filter_by(is_published=True),
+        BlogPost.publish_date, BlogPost.id,
+        cursor=request.args.get('after')
+    )
+    return render_template('blog.html', blog_posts=blog_posts, next_cursor=next_cursor)
+@bp.route('/blog/<int:post_id>')
+@conditional_pages.etag('blog', *LAYOUT_TAGS)
+@page_cache.cached('blog', 'blog:{post_id}', *LAYOUT_TAGS)
+def blog_post(post_id):
+    """Render individual blog post"""
+    post = BlogPost.query.get_or_404(post_id)
+    return render_template('blog_post.html', post=post)
+@bp.route('/contact', methods=['GET', 'POST'])
+@rate_limiter.limit('contact', 'contact.html', per_ip=(5, 600), per_account=(10, 600), per_account_ip=(3, 600), account_field='email')
+def contact():
+    """Render the contact page and handle form submissions"""
+    if request.method == 'POST':
+        # Check if user is logged in
+        user_id = session.get('user_id') if 'user_id' in session else None      
+        name = request.form.get('name')
+        email = request.form.get('email')
+        subject = request.form.get('subject')
+        message = request.form.get('message')      
+        # Create new message
+        new_message = ContactMessage(
+            user_id=user_id,
+            name=name,
+            email=email,
+            subject=subject,
+            message=message
+        )      
+        try:
+            db.session.add(new_message)
+            db.session.commit()
+            flash('Your message has been sent successfully!', 'success')
+        except Exception as e:
+            db.session.rollback()
+            flash('There was an error sending your message. Please try again.', 'error')      
+        return redirect(url_for('public.contact'))  
+    return render_template('contact.html')
+@bp.route('/episode/<int:episode_id>')
+@conditional_pages.etag('episodes', *LAYOUT_TAGS)
+@page_cache.cached('episodes', 'episode:{episode_id}', *LAYOUT_TAGS)
+def episode_detail(episode_id):
+    """Route for individual episode pages"""
+    episode = PodcastEpisode.query.get_or_404(episode_id)
+    return render_template('episode.html', episode=episode)
+@bp.route('/events')
+@conditional_pages.etag('events', *LAYOUT_TAGS)
+@page_cache.cached('events', *LAYOUT_TAGS)
+def events():
+    """Render events page"""
+    events, next_cursor = keyset_page(
+        Event.query, Event.event_date, Event.id,
+        cursor=request.args.get('after')
+    )
+    return render_template('events.html', events=events, next_cursor=next_cursor)
+
+@bp.route('/episode/<int:episode_id>/audio')
+def episode_audio(episode_id):
+    """Serve an episode's audio with Range, ETag and conditional GET support"""
+    row = db.session.execute(
+        db.select(PodcastEpisode.audio_url, PodcastEpisode.is_published)
+        .where(PodcastEpisode.id == episode_id)
+    ).first()
+    if row is None or (not row.is_published and 'admin_id' not in session):
+        abort(404)
+    path = upload_path_from_url(row.audio_url)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    immutable = CONTENT_ADDRESSED_NAME.match(os.path.basename(path)) is not None
+    max_age = 365 * 24 * 3600 if immutable else current_app.config['AUDIO_MAX_AGE']
+    accel_prefix = current_app.config['AUDIO_ACCEL_REDIRECT_PREFIX']
+    if accel_prefix:
+        # nginx serves the file from its internal location and handles Range and validators itself
+        relative = os.path.relpath(path, current_app.config['UPLOAD_FOLDER']).replace(os.sep, '/')
+        response = current_app.response_class(mimetype=mimetypes.guess_type(path)[0] or 'application/octet-stream')
+        response.headers['X-Accel-Redirect'] = f"{accel_prefix.rstrip('/')}/{relative}"
+    else:
+        # send_file answers Range (206), If-None-Match and If-Modified-Since itself,
+        # and emits X-Sendfile instead of the body when USE_X_SENDFILE is on
+        response = send_file(os.path.abspath(path), conditional=True, etag=True, max_age=max_age)
+        response.headers['Accept-Ranges'] = 'bytes'
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    if immutable:
+        response.cache_control.immutable = True
+    return response
+
+@bp.route('/feed.xml', defaults={'page': 1})
+@bp.route('/feed-<int:page>.xml')
+def podcast_feed(page):
+    """Serve the pre-rendered podcast feed (conditional GETs get a 304)"""
+    path = feed_page_path(page)
+    if page == 1 and not os.path.isfile(path):
+        # First request after a deploy: render it now rather than serve nothing
+        build_feed()
+    if page < 1 or not os.path.isfile(path):
+        abort(404)
+    return send_file(path, mimetype='application/rss+xml', conditional=True, etag=True,
+                     max_age=current_app.config['FEED_MAX_AGE'])
+
+# Paged JSON API
+@bp.route('/api/episodes')
+def api_episodes():
+    """Published episodes, newest first, one keyset page at a time"""
+    episodes, next_cursor = keyset_page(
+        PodcastEpisode.query.filter_by(is_published=True),
+        PodcastEpisode.publish_date, PodcastEpisode.id,
+        cursor=request.args.get('after')
+    )
+    return jsonify({
+        'items': [{
+            'id': episode.id,
+            'title': episode.title,
+            'description': episode.description,
+            'duration': episode.duration,
+            'duration_seconds': episode.duration_seconds,
+            'byte_size': episode.byte_size,
+            'episode_number': episode.episode_number,
+            'image_url': episode.image_url,
+            'audio_url': episode.audio_url,
+            'publish_date': episode.publish_date.isoformat(),
+            'url': url_for('public.episode_detail', episode_id=episode.id)
+        } for episode in episodes],
+        'next_cursor': next_cursor
+    })
+@bp.route('/api/blog')
+def api_blog():
+    """Published blog posts, newest first, one keyset page at a time"""
+    blog_posts, next_cursor = keyset_page(
+        BlogPost.query.filter_by(is_published=True),
+        BlogPost.publish_date, BlogPost.id,
+        cursor=request.args.get('after')
+    )
+    return jsonify({
+        'items': [{
+            'id': post.id,
+            'title': post.title,
+            'excerpt': post.excerpt,
+            'image': post.image,
+            'author': post.author,
+            'publish_date': post.publish_date.isoformat(),
+            'url': url_for('public.blog_post', post_id=post.id)
+        } for post in blog_posts],
+        'next_cursor': next_cursor
+    })
+@bp.route('/api/events')
+def api_events():
+    """Events, latest first, one keyset page at a time"""
+    events, next_cursor = keyset_page(
+        Event.query, Event.event_date, Event.id,
+        cursor=request.args.get('after')
+    )
+    return jsonify({
+        'items': [{
+            'id': event.id,
+            'title': event.title,
+            'description': event.description,
+            'event_date': event.event_date.isoformat(),
+            'location': event.location,
+            'image_url': event.image_url
+        } for event in events],
+        'next_cursor': next_cursor
+    })
+
+@bp.route('/search')
+@page_cache.cached('blog', 'episodes', 'events', *LAYOUT_TAGS)
+def search():
+    """Search blog posts, episodes and events"""
+    query = request.args.get('q', '').strip()
+    kind = request.args.get('type')
+    results = full_text_search.search(
+        query, [kind] if kind else None, current_app.config['SEARCH_RESULTS_LIMIT']
+    ) if query else []
+    for hit in results:
+        hit['url'] = search_result_url(hit)
+    return render_template('search.html', query=query, kind=kind, results=results)
+
+@bp.route('/api/search')
+def api_search():
+    """Search results as JSON; snippets are HTML with matches wrapped in <mark>"""
+    kind = request.args.get('type')
+    results = full_text_search.search(
+        request.args.get('q', ''), [kind] if kind else None, current_app.config['SEARCH_RESULTS_LIMIT']
+    )
+    return jsonify({
+        'items': [{
+            'type': hit['type'],
+            'id': hit['id'],
+            'title': hit['title'],
+            'date': hit['date'].isoformat() if hit['date'] else None,
+            'url': search_result_url(hit),
+            'snippet': str(hit['snippet']),
+            'rank': hit['rank']
+        } for hit in results]
+    })
+
+@bp.route('/health')
+def health_check():
+    return '', 200
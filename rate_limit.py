@@ -0,0 +1,188 @@
+# rate_limit.py - Token-bucket rate limiting for the form and login endpoints
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from functools import wraps
+
+from flask import flash, make_response, render_template, request, session
+
+"""
+Rate limiting for the endpoints that write to the database or hash a password.
+Each limited endpoint gets one token bucket per client IP, one per account
+and client IP (the username or email the form is about) and one per account
+across all addresses. Guessing at one account from one address is held to the
+tight per-address limit, so a single address cannot lock the account out for
+everybody else; the global account bucket has a much larger burst, so guesses
+spread over many addresses still hit a ceiling. A request spends a token from
+every bucket before the view runs, and none of them if any bucket is empty; an
+empty bucket re-renders the form with a 429 and a Retry-After header, so
+abusive traffic never reaches the INSERT or the PBKDF2 check. The shared
+backend (the default) keeps the buckets in a SQLite file every worker on the
+host updates under one write lock; the memory backend keeps them per process,
+which multiplies the limits by the number of workers.
+"""
+
+
+class NullBucketStore:
+    """Backend that allows everything (RATE_LIMIT_BACKEND=null)"""
+
+    def take(self, buckets):
+        return 0.0
+
+    def clear(self):
+        pass
+
+
+class MemoryBucketStore:
+    """In-process buckets; refilled ones are dropped once the table grows past max_keys"""
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self.buckets = {}  # key -> (tokens, updated_at, full_at)
+        self.lock = threading.Lock()
+
+    def take(self, buckets):
+        """Spend one token from each (key, capacity, rate) bucket.
+
+        Returns 0 if every bucket had a token, else the seconds until they all
+        do; a rejected request spends nothing.
+        """
+        now = time.monotonic()
+        with self.lock:
+            levels = []
+            for key, capacity, rate in buckets:
+                tokens, updated_at, _ = self.buckets.get(key, (capacity, now, now))
+                levels.append(min(capacity, tokens + (now - updated_at) * rate))
+            wait = max((1 - tokens) / rate if tokens < 1 else 0.0
+                       for tokens, (_, _, rate) in zip(levels, buckets))
+            if wait:
+                return wait
+            for tokens, (key, capacity, rate) in zip(levels, buckets):
+                self.buckets[key] = (tokens - 1, now, now + (capacity - tokens + 1) / rate)
+            if len(self.buckets) > self.max_keys:
+                # A bucket that has refilled completely is the same as a missing one
+                self.buckets = {key: bucket for key, bucket in self.buckets.items() if bucket[2] > now}
+            return 0.0
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+class SharedBucketStore:
+    """Buckets in a SQLite file shared by every worker process on the host"""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.local = threading.local()
+        self.calls = 0
+        with self._connect() as connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS buckets '
+                '(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL, full_at REAL NOT NULL)'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS ix_buckets_full_at ON buckets (full_at)')
+
+    def _connect(self):
+        # One connection per thread, reopened in forked workers
+        connection = getattr(self.local, 'connection', None)
+        if connection is None or self.local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self.local.connection = connection
+            self.local.pid = os.getpid()
+        return connection
+
+    def take(self, buckets):
+        """Spend one token from each (key, capacity, rate) bucket, or none if any is empty (see MemoryBucketStore)"""
+        now = time.time()
+        connection = self._connect()
+        # BEGIN IMMEDIATE takes the write lock up front, so read-modify-write is atomic across workers
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            levels = []
+            for key, capacity, rate in buckets:
+                key = hashlib.sha1(key.encode('utf-8')).hexdigest()
+                row = connection.execute('SELECT tokens, updated_at FROM buckets WHERE key = ?', (key,)).fetchone()
+                tokens = capacity if row is None else min(capacity, row[0] + (now - row[1]) * rate)
+                levels.append((key, tokens, capacity, rate))
+            wait = max((1 - tokens) / rate if tokens < 1 else 0.0 for _, tokens, _, rate in levels)
+            if not wait:
+                for key, tokens, capacity, rate in levels:
+                    connection.execute(
+                        'INSERT INTO buckets (key, tokens, updated_at, full_at) VALUES (?, ?, ?, ?) '
+                        'ON CONFLICT (key) DO UPDATE SET tokens = excluded.tokens, '
+                        'updated_at = excluded.updated_at, full_at = excluded.full_at',
+                        (key, tokens - 1, now, now + (capacity - tokens + 1) / rate)
+                    )
+            self.calls += 1
+            if self.calls % 1000 == 0:
+                connection.execute('DELETE FROM buckets WHERE full_at < ?', (now,))
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        return wait
+
+    def clear(self):
+        self._connect().execute('DELETE FROM buckets')
+
+
+class RateLimiter:
+    """Front end used by the app: builds the backend from config and exposes the view decorator"""
+
+    def __init__(self, app=None):
+        self.store = NullBucketStore()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        backend = app.config.get('RATE_LIMIT_BACKEND', 'shared')
+        if backend == 'memory':
+            self.store = MemoryBucketStore()
+        elif backend == 'shared':
+            self.store = SharedBucketStore(app.config['RATE_LIMIT_STORE'])
+        elif backend == 'null':
+            self.store = NullBucketStore()
+        else:
+            raise ValueError(f'Unknown RATE_LIMIT_BACKEND: {backend}')
+
+    def clear(self):
+        self.store.clear()
+
+    def limit(self, name, template, per_ip, per_account=None, per_account_ip=None, account_field=None):
+        """Limit POSTs to a view.
+
+        per_ip, per_account and per_account_ip are (burst, seconds): up to burst
+        requests at once, refilled at burst per seconds. per_account is shared by
+        every address, per_account_ip is per account and address. The account is
+        the form field account_field, or the logged-in user when the field is empty.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(**view_args):
+                if request.method != 'POST':
+                    return view(**view_args)
+                limits = [(f'{name}:ip:{request.remote_addr}', per_ip)]
+                if per_account is not None or per_account_ip is not None:
+                    account = (request.form.get(account_field) or '').strip().lower() if account_field else ''
+                    if not account and session.get('user_id'):
+                        account = f"user:{session['user_id']}"
+                    if account and per_account is not None:
+                        limits.append((f'{name}:account:{account}', per_account))
+                    if account and per_account_ip is not None:
+                        limits.append((f'{name}:account:{account}:{request.remote_addr}', per_account_ip))
+                wait = self.store.take([(key, burst, burst / seconds) for key, (burst, seconds) in limits])
+                if wait:
+                    retry_after = int(wait) + 1
+                    flash(f'Too many attempts. Please try again in {retry_after} seconds.', 'error')
+                    response = make_response(render_template(template), 429)
+                    response.headers['Retry-After'] = str(retry_after)
+                    return response
+                return view(**view_args)
+            return wrapper
+        return decorator
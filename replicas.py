@@ -0,0 +1,129 @@
+# replicas.py - Route read-only public requests to database replicas
+import logging
+import random
+import threading
+import time
+
+from flask import g, has_app_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+
+"""
+Read-replica routing.
+Replica URIs are registered as Flask-SQLAlchemy binds named replica_0,
+replica_1, ... A GET to one of the public read endpoints picks a healthy
+replica in before_request and RoutingSession sends that request's SELECTs
+to it; flushes, DML and every other request use the primary, and so does a
+render that will be stored in the page cache, so a lagging replica can never
+leave a pre-edit page cached under the post-edit versions. After a
+request writes, the visitor's session is pinned to the primary for
+REPLICA_READ_AFTER_WRITE seconds so they read their own writes, and replicas
+whose replication lag exceeds REPLICA_MAX_LAG are skipped until they catch up.
+"""
+
+logger = logging.getLogger(__name__)
+
+# Seconds of replay lag on a Postgres standby; 0 when it has replayed all it received
+POSTGRES_LAG_QUERY = text(
+    'SELECT CASE WHEN NOT pg_is_in_recovery() '
+    'OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+    'ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END'
+)
+
+
+class RoutingSession(Session):
+    """Session that reads from the replica chosen for the current request"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_app_context():
+            replica = g.get('db_replica')
+            if replica is not None and not (clause is not None and getattr(clause, 'is_dml', False)):
+                return self._db.engines[replica]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def replica_binds(uris):
+    """SQLALCHEMY_BINDS entries for a comma-separated list of replica URIs"""
+    return {f'replica_{i}': uri.strip() for i, uri in enumerate(uris.split(',')) if uri.strip()}
+
+
+class ReplicaRouter:
+    """Choose a replica for public GET requests and remember recent writes per visitor"""
+
+    def __init__(self, db, endpoints, app=None):
+        self.db = db
+        self.endpoints = set(endpoints)
+        self.lag = {}  # bind name -> (lag in seconds or None if unreachable, checked at)
+        self.lock = threading.Lock()
+        event.listen(RoutingSession, 'after_flush', self._mark_write)
+        event.listen(RoutingSession, 'do_orm_execute', self._mark_dml)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.replicas = sorted(name for name in app.config.get('SQLALCHEMY_BINDS') or {}
+                               if name.startswith('replica_'))
+        self.read_after_write = float(app.config.get('REPLICA_READ_AFTER_WRITE', 10))
+        self.max_lag = float(app.config.get('REPLICA_MAX_LAG', 5))
+        self.check_interval = float(app.config.get('REPLICA_CHECK_INTERVAL', 5))
+        if self.replicas:
+            app.before_request(self.choose_bind)
+            app.after_request(self.remember_write)
+
+    def _mark_write(self, session, flush_context):
+        if has_app_context():
+            g.db_wrote = True
+
+    def _mark_dml(self, orm_execute_state):
+        if has_app_context() and (orm_execute_state.is_update or orm_execute_state.is_delete
+                                  or orm_execute_state.is_insert):
+            g.db_wrote = True
+
+    def replica_lag(self, name):
+        """Replication lag of a replica in seconds (None if unreachable), re-checked every check_interval"""
+        now = time.monotonic()
+        with self.lock:
+            cached = self.lag.get(name)
+        if cached is not None and now - cached[1] < self.check_interval:
+            return cached[0]
+        engine = self.db.engines[name]
+        try:
+            with engine.connect() as connection:
+                lag = float(connection.execute(POSTGRES_LAG_QUERY).scalar()) \
+                    if engine.dialect.name == 'postgresql' else 0.0
+        except Exception:
+            logger.warning('Replica %s is unreachable; reading from the primary', name, exc_info=True)
+            lag = None
+        with self.lock:
+            self.lag[name] = (lag, now)
+        return lag
+
+    def pick(self):
+        """A random replica within the lag budget, or None to use the primary"""
+        candidates = list(self.replicas)
+        random.shuffle(candidates)
+        for name in candidates:
+            lag = self.replica_lag(name)
+            if lag is not None and lag <= self.max_lag:
+                return name
+        return None
+
+    def choose_bind(self):
+        g.db_replica = None
+        if request.method not in ('GET', 'HEAD') or request.endpoint not in self.endpoints:
+            return
+        # In-process callers (e.g. cache warming right after a save) ask for the primary explicitly
+        if request.environ.get('db.use_primary'):
+            return
+        if time.time() - session.get('db_write_at', 0) < self.read_after_write:
+            return
+        g.db_replica = self.pick()
+
+    def use_primary(self):
+        """Send the rest of this request's reads to the primary"""
+        g.db_replica = None
+
+    def remember_write(self, response):
+        if g.get('db_wrote'):
+            session['db_write_at'] = time.time()
+        return response
@@ -0,0 +1,283 @@
+# search.py - Full-text search over published content
+import math
+import re
+import threading
+import time
+
+from markupsafe import Markup, escape
+from sqlalchemy import event, inspect, text
+
+"""
+Full-text search.
+On PostgreSQL each searchable table carries a generated `search_vector`
+tsvector column (title weighted A, the other fields B/C) with a GIN index, so
+a search is one indexed @@ match per table ranked with ts_rank_cd and
+highlighted with ts_headline. Other databases (the SQLite files used in
+development and tests) fall back to an in-process inverted index built from
+the same fields and rebuilt after content changes.
+"""
+
+TOKEN = re.compile(r'\w+', re.UNICODE)
+TAG = re.compile(r'<[^>]+>')
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'is', 'it',
+    'of', 'on', 'or', 'that', 'the', 'this', 'to', 'was', 'with'
+}
+# Matches ts_rank's default {D, C, B, A} weights
+WEIGHTS = {'A': 1.0, 'B': 0.4, 'C': 0.2, 'D': 0.1}
+# Sentinels that never occur in content, swapped for <mark> after escaping
+HIGHLIGHT_START = '\x01'
+HIGHLIGHT_STOP = '\x02'
+HEADLINE_OPTIONS = (f'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, '
+                    'MaxWords=35, MinWords=15, MaxFragments=2, FragmentDelimiter=" … "')
+
+
+def stem(word):
+    """Very small suffix stripper so plurals and simple verb forms match"""
+    if word.endswith('ies') and len(word) > 4:
+        return word[:-3] + 'y'
+    # 'es' is only a suffix after a sibilant (boxes, classes); microphones loses just the 's'
+    if word.endswith('es') and word[:-2].endswith(('s', 'x', 'z', 'ch', 'sh')) and len(word) >= 5:
+        return word[:-2]
+    if word.endswith('ss'):
+        return word
+    for suffix in ('ing', 'ed', 's'):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(value):
+    """Lower-cased, stemmed terms of a text with stop words removed"""
+    return [stem(word) for word in TOKEN.findall(TAG.sub(' ', value or '').lower()) if word not in STOPWORDS]
+
+
+def parse_query(query):
+    """Split a search box query into required and excluded terms ('-word' excludes)"""
+    required, excluded = [], []
+    for word in query.split():
+        target = excluded if word.startswith('-') and len(word) > 1 else required
+        target.extend(tokenize(word))
+    return required, excluded
+
+
+def render_headline(value):
+    """Escape a headline and turn the highlight sentinels into <mark> tags"""
+    return Markup(str(escape(value)).replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_STOP, '</mark>'))
+
+
+def highlight(value, terms, words=30):
+    """Return an escaped snippet of value around the first matching term with matches marked"""
+    value = ' '.join(TAG.sub(' ', value or '').split())
+    matches = list(TOKEN.finditer(value))
+    terms = set(terms)
+    hits = [i for i, m in enumerate(matches) if stem(m.group().lower()) in terms]
+    if not matches:
+        return Markup('')
+    start = max(0, (hits[0] if hits else 0) - words // 3)
+    window = matches[start:start + words]
+    parts = []
+    position = window[0].start()
+    for match in window:
+        parts.append(value[position:match.start()])
+        if stem(match.group().lower()) in terms:
+            parts.append(f'{HIGHLIGHT_START}{match.group()}{HIGHLIGHT_STOP}')
+        else:
+            parts.append(match.group())
+        position = match.end()
+    snippet = ''.join(parts)
+    if start > 0:
+        snippet = '… ' + snippet
+    if start + words < len(matches):
+        snippet += ' …'
+    return render_headline(snippet)
+
+
+def _snippet_columns(source):
+    snippet = source['snippet']
+    return list(snippet) if isinstance(snippet, (list, tuple)) else [snippet]
+
+
+class InvertedIndex:
+    """In-memory term -> document postings scored with BM25 over weighted fields"""
+
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self):
+        self.postings = {}  # term -> {key: weighted term frequency}
+        self.lengths = {}  # key -> weighted document length
+        self.documents = {}  # key -> stored fields for rendering results
+
+    def add(self, key, fields, stored):
+        """Index a document; fields is a list of (text, weight letter)"""
+        length = 0.0
+        for value, weight in fields:
+            for term in tokenize(value):
+                postings = self.postings.setdefault(term, {})
+                postings[key] = postings.get(key, 0.0) + WEIGHTS[weight]
+                length += WEIGHTS[weight]
+        self.lengths[key] = length
+        self.documents[key] = stored
+
+    def search(self, required, excluded=(), kinds=None, limit=20):
+        """Return [(key, score)] of documents holding every required term, best first"""
+        if not required:
+            return []
+        candidates = None
+        for term in required:
+            keys = set(self.postings.get(term, ()))
+            candidates = keys if candidates is None else candidates & keys
+            if not candidates:
+                return []
+        for term in excluded:
+            candidates -= set(self.postings.get(term, ()))
+        if kinds:
+            candidates = {key for key in candidates if key[0] in kinds}
+        count = len(self.lengths)
+        average = sum(self.lengths.values()) / count if count else 1.0
+        scores = []
+        for key in candidates:
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * self.lengths[key] / (average or 1.0))
+            for term in required:
+                postings = self.postings[term]
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                frequency = postings[key]
+                score += idf * frequency * (self.k1 + 1) / (frequency + norm)
+            scores.append((key, score))
+        scores.sort(key=lambda item: (-item[1], item[0]))
+        return scores[:limit]
+
+
+class FullTextSearch:
+    """Search the configured sources with Postgres full-text search or the in-memory fallback.
+
+    sources maps a result type to a dict with the model, the indexed fields as
+    {column: weight}, the column the snippet is taken from (a list is joined),
+    the date column, and whether only is_published rows are searchable.
+    """
+
+    def __init__(self, db, sources, app=None):
+        self.db = db
+        self.sources = sources
+        self.index = None
+        self.built_at = 0.0
+        self.max_age = 300.0
+        self.lock = threading.Lock()
+        self._use_postgres = None
+        for source in sources.values():
+            for name in ('after_insert', 'after_update', 'after_delete'):
+                event.listen(source['model'], name, self._mark_stale)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        # Other processes' edits are not seen by this one's listeners, so also rebuild on a timer
+        self.max_age = float(app.config.get('SEARCH_INDEX_TTL', 300))
+
+    def _mark_stale(self, mapper, connection, target):
+        self.invalidate()
+
+    def invalidate(self):
+        """Rebuild the fallback index on the next search (bulk statements skip the mapper events)"""
+        self.index = None
+
+    def uses_postgres(self):
+        """True when every source table has its search_vector column"""
+        if self._use_postgres is None:
+            engine = self.db.engine
+            if engine.dialect.name != 'postgresql':
+                self._use_postgres = False
+            else:
+                inspector = inspect(engine)
+                self._use_postgres = all(
+                    any(column['name'] == 'search_vector'
+                        for column in inspector.get_columns(source['model'].__tablename__))
+                    for source in self.sources.values()
+                )
+        return self._use_postgres
+
+    def search(self, query, kinds=None, limit=20):
+        """Return up to limit hits as dicts (type, id, title, date, rank, snippet), best first"""
+        query = (query or '').strip()
+        if not query:
+            return []
+        kinds = [kind for kind in (kinds or self.sources) if kind in self.sources]
+        if self.uses_postgres():
+            hits = []
+            for kind in kinds:
+                hits.extend(self._search_postgres(kind, query, limit))
+        else:
+            hits = self._search_fallback(query, kinds, limit)
+        hits.sort(key=lambda hit: -hit['rank'])
+        return hits[:limit]
+
+    def _search_postgres(self, kind, query, limit):
+        source = self.sources[kind]
+        table = source['model'].__tablename__
+        snippet = " || ' ' || ".join(f"coalesce({column}, '')" for column in _snippet_columns(source))
+        published = 'AND is_published' if source['published_only'] else ''
+        # Headlines are expensive, so only compute them for the rows that made the cut
+        sql = text(f"""
+            SELECT id, title, date, rank,
+                   ts_headline('english', regexp_replace(snippet, '<[^>]+>', ' ', 'g'), query, :options) AS headline
+            FROM (
+                SELECT id, title, {source['date']} AS date, ts_rank_cd(search_vector, query) AS rank,
+                       query, {snippet} AS snippet
+                FROM {table}, websearch_to_tsquery('english', :query) AS query
+                WHERE search_vector @@ query {published}
+                ORDER BY rank DESC, id DESC
+                LIMIT :limit
+            ) AS top
+            ORDER BY rank DESC, id DESC
+        """)
+        rows = self.db.session.execute(sql, {'query': query, 'limit': limit, 'options': HEADLINE_OPTIONS})
+        return [{
+            'type': kind,
+            'id': row.id,
+            'title': row.title,
+            'date': row.date,
+            'rank': float(row.rank),
+            'snippet': render_headline(row.headline)
+        } for row in rows]
+
+    def _build_index(self):
+        index = InvertedIndex()
+        for kind, source in self.sources.items():
+            model = source['model']
+            statement = self.db.select(model)
+            if source['published_only']:
+                statement = statement.where(model.is_published.is_(True))
+            snippet_columns = _snippet_columns(source)
+            for row in self.db.session.execute(statement).scalars():
+                index.add(
+                    (kind, row.id),
+                    [(getattr(row, column), weight) for column, weight in source['fields'].items()],
+                    {
+                        'title': row.title,
+                        'date': getattr(row, source['date']),
+                        'snippet': ' '.join(getattr(row, column) or '' for column in snippet_columns)
+                    }
+                )
+        return index
+
+    def _search_fallback(self, query, kinds, limit):
+        with self.lock:
+            index = self.index
+            if index is None or time.monotonic() - self.built_at > self.max_age:
+                index = self.index = self._build_index()
+                self.built_at = time.monotonic()
+        required, excluded = parse_query(query)
+        hits = []
+        for key, score in index.search(required, excluded, set(kinds), limit):
+            stored = index.documents[key]
+            hits.append({
+                'type': key[0],
+                'id': key[1],
+                'title': stored['title'],
+                'date': stored['date'],
+                'rank': score,
+                'snippet': highlight(stored['snippet'], required)
+            })
+        return hits
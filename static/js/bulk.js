@@ -0,0 +1,31 @@
+'use strict';
+
+// Bulk action bars on the admin lists: a header checkbox selects every row
+// checkbox that belongs to the same form, and deletes ask for confirmation.
+
+document.querySelectorAll('[data-select-all]').forEach(function (toggle) {
+  toggle.addEventListener('change', function () {
+    document.querySelectorAll('input[name="ids"][form="' + toggle.dataset.selectAll + '"]').forEach(function (box) {
+      box.checked = toggle.checked;
+    });
+  });
+});
+
+document.querySelectorAll('[data-bulk-form]').forEach(function (form) {
+  form.addEventListener('submit', function (event) {
+    const scope = form.querySelector('[name="scope"]');
+    const everything = scope && scope.value === 'filter';
+    const selected = document.querySelectorAll('input[name="ids"][form="' + form.id + '"]:checked').length;
+    if (!everything && selected === 0) {
+      event.preventDefault();
+      alert('Select at least one row first.');
+      return;
+    }
+    if (form.elements.action.value === 'delete') {
+      const what = everything ? 'all matching items' : selected + ' selected item(s)';
+      if (!confirm('Are you sure you want to delete ' + what + '?')) {
+        event.preventDefault();
+      }
+    }
+  });
+});
@@ -0,0 +1,85 @@
+'use strict';
+
+// Resumable chunked uploads for forms marked with data-chunked-upload.
+// Each file input with data-upload-kind is sent in chunks to /admin/uploads
+// before the form is submitted; the form then only carries the upload id.
+
+const uploadForm = document.querySelector('[data-chunked-upload]');
+const uploadProgress = document.querySelector('[data-upload-progress]');
+const maxChunkRetries = 5;
+
+const showProgress = function (text) {
+    if (uploadProgress) { uploadProgress.textContent = text; }
+}
+
+const jsonRequest = async function (method, url, body) {
+    const response = await fetch(url, {
+        method: method,
+        headers: { 'Content-Type': 'application/json' },
+        body: body ? JSON.stringify(body) : undefined,
+        credentials: 'same-origin'
+    });
+    const data = await response.json();
+    if (!response.ok) { throw new Error(data.error || 'Upload failed'); }
+    return data;
+}
+
+const uploadFile = async function (file, kind) {
+    const upload = await jsonRequest('POST', '/admin/uploads', { kind: kind, filename: file.name, size: file.size });
+    let offset = upload.offset;
+    let retries = 0;
+
+    while (offset < file.size) {
+        const end = Math.min(offset + upload.chunk_size, file.size);
+        try {
+            const response = await fetch('/admin/uploads/' + upload.id, {
+                method: 'PUT',
+                headers: { 'Content-Range': 'bytes ' + offset + '-' + (end - 1) + '/' + file.size },
+                body: file.slice(offset, end),
+                credentials: 'same-origin'
+            });
+            const data = await response.json();
+            if (response.ok) {
+                offset = data.offset;
+                retries = 0;
+            } else if (response.status === 409 && data.offset !== null) {
+                // The server has a different offset (e.g. after a dropped response); resume from there
+                offset = data.offset;
+            } else {
+                throw new Error(data.error || 'Upload failed');
+            }
+        } catch (error) {
+            if (++retries > maxChunkRetries) { throw error; }
+            // Ask the server how much it received before retrying
+            offset = (await jsonRequest('GET', '/admin/uploads/' + upload.id)).offset;
+        }
+        showProgress(file.name + ': ' + Math.floor(offset * 100 / file.size) + '%');
+    }
+
+    await jsonRequest('POST', '/admin/uploads/' + upload.id + '/complete');
+    return upload.id;
+}
+
+if (uploadForm) {
+    uploadForm.addEventListener('submit', async function (event) {
+        event.preventDefault();
+        const inputs = uploadForm.querySelectorAll('input[type="file"][data-upload-kind]');
+
+        try {
+            for (let i = 0; i < inputs.length; i++) {
+                const input = inputs[i];
+                if (!input.files.length) { continue; }
+                const uploadId = await uploadFile(input.files[0], input.dataset.uploadKind);
+                uploadForm.querySelector('input[name="' + input.name + '_upload_id"]').value = uploadId;
+                // The file is already on the server; don't send it again with the form
+                input.required = false;
+                input.removeAttribute('name');
+            }
+        } catch (error) {
+            showProgress('Upload failed: ' + error.message);
+            return;
+        }
+
+        uploadForm.submit();
+    });
+}
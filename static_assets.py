@@ -0,0 +1,201 @@
+# static_assets.py - Fingerprinted, precompressed static files
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import posixpath
+import re
+import uuid
+
+from flask import request, send_file
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip siblings are still written
+    brotli = None
+
+"""
+Static asset pipeline.
+`flask build-static` (or STATIC_BUILD_ON_STARTUP=1) copies every file under
+static/ except uploads into static/dist/ under a content-hashed name
+(css/style.css -> dist/css/style.1a2b3c4d5e6f.css), rewrites relative url()
+references inside stylesheets to the hashed names, and writes .gz and .br
+siblings for text formats. The manifest it leaves behind makes
+url_for('static', filename='css/style.css') point at the hashed file, which
+is served precompressed with a one-year immutable Cache-Control, so a
+returning visitor never asks for it again until its content changes.
+On startup the manifest is checked against the sources, and files edited
+since the last build are served from their unhashed URLs until it runs again.
+"""
+
+logger = logging.getLogger(__name__)
+
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+SKIP_DIRS = {DIST_DIR, 'uploads'}
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.svg', '.json', '.txt', '.xml', '.map', '.ico', '.ttf', '.otf', '.eot'}
+# Served encodings in order of preference: (Accept-Encoding token, file suffix)
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+HASH_LENGTH = 12
+HASHED_NAME = re.compile(r'\.[0-9a-f]{%d}\.[A-Za-z0-9]+$' % HASH_LENGTH)
+CSS_URL = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)''')
+YEAR = 365 * 24 * 3600
+
+
+def hashed_name(path, data):
+    stem, ext = posixpath.splitext(path)
+    return f'{stem}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{ext}'
+
+
+def _write(path, data):
+    # Hashed names never change content, so an existing file is already correct
+    if os.path.exists(path):
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Unique per call: gevent and thread workers share a pid
+    tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _rewrite_css(path, data, manifest):
+    """Point relative url() references of a stylesheet at the hashed files"""
+    directory = posixpath.dirname(path)
+
+    def replace(match):
+        quote, url = match.groups()
+        if re.match(r'^([a-z]+:|/|#)', url):
+            return match.group(0)
+        # Cache-busting query strings are dropped: the hashed name already does that job
+        target, hash_sep, fragment = url.split('?')[0].partition('#')
+        resolved = posixpath.normpath(posixpath.join(directory, target))
+        if resolved not in manifest:
+            return match.group(0)
+        relative = posixpath.relpath(manifest[resolved], directory)
+        return f'url({quote}{relative}{hash_sep}{fragment}{quote})'
+
+    return CSS_URL.sub(replace, data.decode('utf-8')).encode('utf-8')
+
+
+def build(static_folder):
+    """Fingerprint and compress every static file; returns the manifest {source: hashed name}"""
+    dist = os.path.join(static_folder, DIST_DIR)
+    sources = []
+    for root, dirs, files in os.walk(static_folder):
+        if root == static_folder:
+            dirs[:] = [name for name in dirs if name not in SKIP_DIRS]
+        for name in files:
+            sources.append(os.path.relpath(os.path.join(root, name), static_folder).replace(os.sep, '/'))
+    # Stylesheets last, so the files they reference already have hashed names
+    sources.sort(key=lambda path: (path.endswith('.css'), path))
+    manifest = {}
+    for path in sources:
+        with open(os.path.join(static_folder, path), 'rb') as f:
+            data = f.read()
+        if path.endswith('.css'):
+            data = _rewrite_css(path, data, manifest)
+        name = hashed_name(path, data)
+        target = os.path.join(dist, name)
+        _write(target, data)
+        if posixpath.splitext(path)[1].lower() in COMPRESSIBLE_EXTENSIONS:
+            variants = {'.gz': gzip.compress(data, 9, mtime=0)}
+            if brotli is not None:
+                variants['.br'] = brotli.compress(data, quality=11)
+            for suffix, compressed in variants.items():
+                # Not worth a sibling if compression barely helps
+                if len(compressed) < len(data) * 0.9:
+                    _write(target + suffix, compressed)
+        manifest[path] = name
+    # Workers building on startup at the same time each write their own copy
+    tmp_path = os.path.join(dist, f'{MANIFEST_NAME}.{uuid.uuid4().hex}.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, os.path.join(dist, MANIFEST_NAME))
+    return manifest
+
+
+def verify(static_folder, manifest):
+    """Split a manifest into the entries that still match their source and the stale ones.
+
+    Returns (fresh manifest, stale source paths). A stylesheet referencing a
+    stale file is stale too, since its built copy points at the old name.
+    """
+    fresh, stale = {}, []
+    for path in sorted(manifest, key=lambda path: (path.endswith('.css'), path)):
+        try:
+            with open(os.path.join(static_folder, path), 'rb') as f:
+                data = f.read()
+        except (FileNotFoundError, IsADirectoryError):
+            stale.append(path)
+            continue
+        if path.endswith('.css'):
+            data = _rewrite_css(path, data, fresh)
+        if hashed_name(path, data) == manifest[path]:
+            fresh[path] = manifest[path]
+        else:
+            stale.append(path)
+    return fresh, stale
+
+
+class StaticAssets:
+    """Rewrites static URLs to the hashed build and serves its precompressed variants"""
+
+    def __init__(self, app=None):
+        self.manifest = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.static_folder = app.static_folder
+        self.dist = os.path.join(self.static_folder, DIST_DIR)
+        if not app.config.get('STATIC_ASSETS_HASHED', True):
+            return
+        if app.config.get('STATIC_BUILD_ON_STARTUP'):
+            self.manifest = build(self.static_folder)
+        else:
+            self.load()
+        app.url_defaults(self.hashed_url)
+        app.before_request(self.serve_hashed)
+
+    def load(self):
+        try:
+            with open(os.path.join(self.dist, MANIFEST_NAME)) as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            manifest = {}
+        # A deploy that changed static files without rebuilding would otherwise serve the old bytes for a year
+        self.manifest, stale = verify(self.static_folder, manifest)
+        if stale:
+            logger.warning('%d static file(s) changed since the last `flask build-static`, serving them unhashed: %s',
+                           len(stale), ', '.join(stale))
+
+    def hashed_url(self, endpoint, values):
+        if endpoint == 'static' and values.get('filename') in self.manifest:
+            values['filename'] = f"{DIST_DIR}/{self.manifest[values['filename']]}"
+
+    def serve_hashed(self):
+        """Send a hashed file, precompressed if the client accepts it, before the default static view"""
+        if request.endpoint != 'static':
+            return None
+        filename = request.view_args.get('filename', '')
+        if not filename.startswith(DIST_DIR + '/') or not HASHED_NAME.search(filename):
+            return None
+        path = safe_join(self.dist, filename[len(DIST_DIR) + 1:])
+        if path is None or not os.path.isfile(path):
+            return None
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        available = [(token, path + suffix) for token, suffix in ENCODINGS if os.path.isfile(path + suffix)]
+        encoding = next(((token, variant) for token, variant in available if request.accept_encodings[token]), None)
+        response = send_file(encoding[1] if encoding else path, mimetype=mimetype,
+                             conditional=True, etag=True, max_age=YEAR)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding[0]
+        if available:
+            response.vary.add('Accept-Encoding')
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
@@ -0,0 +1,156 @@
+# storage.py - Content-addressed storage for uploaded files
+import errno
+import hashlib
+import os
+import re
+import shutil
+import time
+import uuid
+
+"""
+Content-addressed upload storage.
+Files are stored as <UPLOAD_FOLDER>/objects/<aa>/<sha256>.<ext>, where the
+hash is computed while the upload is copied to disk. Identical uploads share
+one file, two different files can never overwrite each other, and because a
+URL only ever points at one set of bytes it can be cached forever. Files
+being written are kept in a staging directory outside the served folder
+until they are hashed and adopted. Releasing an object moves it aside before
+the caller's last reference check, and anything stored or adopted within the
+grace period is kept, so a row being saved with the same file at the same
+moment never ends up pointing at a deleted object.
+"""
+
+CHUNK_SIZE = 64 * 1024
+OBJECT_NAME = re.compile(r'^[0-9a-f]{2}/[0-9a-f]{64}(\.[a-z0-9]+)?$')
+
+
+class ContentStore:
+    """Stores files by the SHA-256 of their content"""
+
+    def __init__(self, root=None, url_prefix='/static/uploads', subdir='objects', staging_dir=None, grace=600):
+        self.subdir = subdir
+        self.grace = grace
+        self.url_prefix = f"{url_prefix.rstrip('/')}/{subdir}/"
+        if root is not None:
+            self.set_root(root, staging_dir)
+
+    def init_app(self, app):
+        self.set_root(app.config['UPLOAD_FOLDER'], app.config.get('UPLOAD_STAGING_DIR'))
+        self.grace = float(app.config.get('UPLOAD_RELEASE_GRACE', self.grace))
+
+    def set_root(self, root, staging_dir=None):
+        self.objects_dir = os.path.join(root, self.subdir)
+        # The app passes UPLOAD_STAGING_DIR, outside the served folder, so half-written files have no URL
+        self.tmp_dir = os.path.join(staging_dir or os.path.join(root, '.staging'), 'tmp')
+
+    @staticmethod
+    def extension(filename):
+        ext = os.path.splitext(filename or '')[1].lower()
+        return ext if re.fullmatch(r'\.[a-z0-9]+', ext) else ''
+
+    def _relative(self, digest, ext):
+        return f'{digest[:2]}/{digest}{ext}'
+
+    def temp_path(self):
+        """A fresh path in the staging directory, for writing uploads into"""
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        return os.path.join(self.tmp_dir, uuid.uuid4().hex)
+
+    def adopt(self, path, digest, ext):
+        """Move an already hashed file into the store and return its URL.
+
+        If the object exists the file is a duplicate and is simply removed.
+        """
+        relative = self._relative(digest, ext)
+        final_path = os.path.join(self.objects_dir, relative)
+        try:
+            # Touching the object starts its grace period, so a concurrent release() keeps it
+            os.utime(final_path)
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            try:
+                os.replace(path, final_path)
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    raise
+                # Staging is on another filesystem: copy beside the object, then rename into place
+                tmp_path = f'{final_path}.{uuid.uuid4().hex}.tmp'
+                shutil.copyfile(path, tmp_path)
+                os.replace(tmp_path, final_path)
+                os.remove(path)
+        else:
+            os.remove(path)
+        return self.url_prefix + relative
+
+    def save(self, file):
+        """Hash and store a werkzeug FileStorage in one pass; returns its URL"""
+        hasher = hashlib.sha256()
+        tmp_path = self.temp_path()
+        try:
+            with open(tmp_path, 'wb') as f:
+                for data in iter(lambda: file.stream.read(CHUNK_SIZE), b''):
+                    hasher.update(data)
+                    f.write(data)
+            return self.adopt(tmp_path, hasher.hexdigest(), self.extension(file.filename))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def path_from_url(self, url):
+        """Return the file path of a store URL, or None for anything outside the store"""
+        if not url or not url.startswith(self.url_prefix):
+            return None
+        relative = url[len(self.url_prefix):]
+        if not OBJECT_NAME.match(relative):
+            return None
+        return os.path.join(self.objects_dir, relative)
+
+    def urls(self):
+        """Yield the URL of every stored object"""
+        try:
+            prefixes = os.listdir(self.objects_dir)
+        except FileNotFoundError:
+            return
+        for prefix in sorted(prefixes):
+            try:
+                names = os.listdir(os.path.join(self.objects_dir, prefix))
+            except NotADirectoryError:
+                continue
+            for name in sorted(names):
+                if OBJECT_NAME.match(f'{prefix}/{name}'):
+                    yield self.url_prefix + f'{prefix}/{name}'
+
+    def release(self, url, in_use):
+        """Delete the object behind a store URL unless it is still needed; returns whether it was deleted.
+
+        Objects stored or adopted within the grace period are kept. Otherwise
+        the object is moved aside and in_use() is asked once more: an adopt()
+        racing the release either finds it gone and stores its own copy, or
+        touched it first, and either way the object is put back.
+        """
+        path = self.path_from_url(url)
+        if path is None:
+            return False
+        try:
+            if time.time() - os.path.getmtime(path) < self.grace:
+                return False
+            aside = f'{path}.{uuid.uuid4().hex}.released'
+            os.replace(path, aside)
+        except FileNotFoundError:
+            return False
+        if time.time() - os.path.getmtime(aside) < self.grace or in_use():
+            # Same name, same bytes: replacing a copy adopt() stored meanwhile changes nothing
+            os.replace(aside, path)
+            return False
+        os.remove(aside)
+        return True
+
+    def delete(self, url):
+        """Remove the object behind a store URL if it exists"""
+        path = self.path_from_url(url)
+        if path is not None:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,180 @@
+# tasks.py - Background job tasks and the CLI commands that drive them
+import hashlib
+import mimetypes
+import os
+
+import click
+from flask import current_app, url_for
+from flask.cli import with_appcontext
+
+import audio_meta
+import config
+import feed
+import images
+import static_assets
+from extensions import assets, chunked_uploads, content_store, job_queue, page_cache
+from helpers import release_uploads, sweep_uploads, upload_path_from_url
+from models import db, PodcastEpisode
+
+"""
+Job tasks and CLI commands.
+Importing this module registers the tasks with job_queue; create_app() does
+that and adds COMMANDS to the flask command. Tasks run inside the worker's
+app context, so they reach the app through current_app.
+"""
+
+@job_queue.task('verify_upload')
+def verify_upload(url):
+    """Check a stored upload exists and its bytes still match the hash in its name"""
+    path = content_store.path_from_url(url)
+    if path is None:
+        return
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for data in iter(lambda: f.read(64 * 1024), b''):
+            hasher.update(data)
+    if not os.path.basename(path).startswith(hasher.hexdigest()):
+        raise ValueError(f'Stored file {path} does not match its content hash')
+
+@job_queue.task('warm_pages')
+def warm_pages(paths):
+    """Re-render public pages into the cache so the first visitor after an edit gets a hit"""
+    client = current_app.test_client()
+    for path in paths:
+        # Refresh rather than read: earlier jobs (e.g. image variants) may change the output.
+        # Render from the primary, since a replica may not have replayed the save yet.
+        client.get(path, environ_base={'page_cache.refresh': True, 'db.use_primary': True})
+
+@job_queue.task('generate_image_variants')
+def generate_image_variants(url):
+    """Write the thumbnail/card/hero and WebP variants of an uploaded image"""
+    path = content_store.path_from_url(url)
+    if path is None:
+        return
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f'Image not found: {url}')
+    images.generate_variants(path)
+
+@job_queue.task('extract_audio_metadata')
+def extract_audio_metadata(episode_id):
+    """Fill an episode's duration, bitrate, sample rate and size from its audio file"""
+    episode = db.session.get(PodcastEpisode, episode_id)
+    if episode is None:
+        return
+    path = upload_path_from_url(episode.audio_url)
+    if path is None or not os.path.isfile(path):
+        raise FileNotFoundError(f'Audio for episode {episode_id} not found: {episode.audio_url}')
+    metadata = audio_meta.probe(path)
+    if metadata is None:
+        current_app.logger.warning('Could not read audio metadata for episode %s', episode_id)
+        build_feed()
+        return
+    episode.duration_seconds = metadata['duration_seconds']
+    episode.duration = audio_meta.format_duration(metadata['duration_seconds'])
+    episode.bitrate = metadata['bitrate']
+    episode.sample_rate = metadata['sample_rate']
+    episode.byte_size = metadata['byte_size']
+    db.session.commit()
+    page_cache.invalidate('episodes', f'episode:{episode_id}')
+    # The enclosure length and itunes:duration come from this metadata
+    build_feed()
+
+@job_queue.task('build_feed')
+def build_feed():
+    """Render the podcast feed pages into FEED_DIR; returns the number of pages"""
+    site_url = current_app.config['SITE_URL'].rstrip('/')
+    page_size = current_app.config['FEED_PAGE_SIZE']
+    episodes = PodcastEpisode.query.filter_by(is_published=True).order_by(
+        PodcastEpisode.publish_date.desc(), PodcastEpisode.id.desc()).all()
+    channel = {
+        'title': config.PODCAST_CONFIG['title'],
+        'description': config.PODCAST_CONFIG['description'],
+        'link': site_url + '/',
+        'language': config.PODCAST_CONFIG['language'],
+        'author': config.PODCAST_CONFIG['host'],
+        'image': config.PODCAST_CONFIG['cover_image'],
+        'categories': config.PODCAST_CONFIG['categories']
+    }
+    # url_for needs a request context to build external URLs outside a request
+    with current_app.test_request_context(base_url=site_url):
+        items = [{
+            'title': episode.title,
+            'description': episode.description,
+            'link': url_for('public.episode_detail', episode_id=episode.id, _external=True),
+            'guid': f'episode-{episode.id}',
+            'pub_date': episode.publish_date,
+            'audio_url': url_for('public.episode_audio', episode_id=episode.id, _external=True),
+            'audio_length': episode.byte_size,
+            'audio_type': mimetypes.guess_type(episode.audio_url)[0] or 'audio/mpeg',
+            'duration_seconds': episode.duration_seconds,
+            'episode_number': episode.episode_number,
+            'image': site_url + episode.image_url if episode.image_url.startswith('/') else episode.image_url
+        } for episode in episodes]
+        chunks = [items[i:i + page_size] for i in range(0, len(items), page_size)] if page_size else [items]
+        chunks = chunks or [[]]
+        page_urls = [url_for('public.podcast_feed', page=page, _external=True) for page in range(1, len(chunks) + 1)]
+    for index, chunk in enumerate(chunks):
+        data = feed.render_page(
+            channel, chunk, page_urls[index],
+            next_url=page_urls[index + 1] if index + 1 < len(chunks) else None,
+            previous_url=page_urls[index - 1] if index else None
+        )
+        feed.write_if_changed(feed_page_path(index + 1), data)
+    # Drop pages left over from a longer catalogue
+    page = len(chunks) + 1
+    while os.path.exists(feed_page_path(page)):
+        os.remove(feed_page_path(page))
+        page += 1
+    return len(chunks)
+
+def feed_page_path(page):
+    name = 'feed.xml' if page == 1 else f'feed-{page}.xml'
+    return os.path.join(current_app.config['FEED_DIR'], name)
+
+@click.command('build-feed')
+@with_appcontext
+def build_feed_command():
+    """Render the podcast RSS feed."""
+    click.echo(f'Wrote {build_feed()} feed page(s)')
+
+@click.command('build-static')
+@with_appcontext
+def build_static_command():
+    """Fingerprint and precompress the static files into static/dist."""
+    manifest = static_assets.build(current_app.static_folder)
+    assets.load()
+    click.echo(f'Built {len(manifest)} static file(s)')
+
+@click.command('probe-audio')
+@click.option('--all', 'probe_all', is_flag=True, help='Re-probe episodes that already have metadata.')
+@with_appcontext
+def probe_audio_command(probe_all):
+    """Queue audio metadata extraction for existing episodes."""
+    query = db.select(PodcastEpisode.id)
+    if not probe_all:
+        query = query.where(PodcastEpisode.duration_seconds.is_(None))
+    episode_ids = db.session.execute(query).scalars().all()
+    for episode_id in episode_ids:
+        job_queue.enqueue('extract_audio_metadata', episode_id=episode_id)
+    click.echo(f'Queued {len(episode_ids)} episode(s)')
+
+@click.command('expire-uploads')
+@click.option('--max-age', type=int, default=None, help='Seconds (default UPLOAD_SESSION_MAX_AGE).')
+@with_appcontext
+def expire_uploads_command(max_age):
+    """Remove abandoned chunked uploads and every unreferenced stored file."""
+    abandoned = chunked_uploads.expire(max_age)
+    release_uploads(*abandoned)
+    click.echo(f'Expired {len(abandoned)} completed upload(s) nobody claimed')
+    # Including files a release kept because they had only just been stored
+    click.echo(f'Deleted {sweep_uploads()} unreferenced file(s)')
+
+@click.command('run-jobs')
+@click.option('--burst', is_flag=True, help='Exit once the queue is empty.')
+@with_appcontext
+def run_jobs_command(burst):
+    """Run background jobs in this process."""
+    job_queue.work(burst=burst)
+
+COMMANDS = (build_feed_command, build_static_command, probe_audio_command, expire_uploads_command,
+            run_jobs_command)
@@ -1,6 +1,8 @@
 # test_db.py
-from app import app, db
-from app import User, Admin  # Import your models
+from app import create_app
+from models import db, User, Admin  # Import your models
+
+app = create_app()
 
 with app.app_context():
     try:
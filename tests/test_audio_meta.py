@@ -0,0 +1,116 @@
+# test_audio_meta.py - Audio duration and format probing
+import struct
+import wave
+
+import audio_meta
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz, stereo: 417-byte frames of 1152 samples
+MP3_HEADER = b'\xff\xfb\x90\x00'
+MP3_FRAME_LENGTH = 417
+
+
+def mp3_frames(count, first=None):
+    frames = [MP3_HEADER + bytes(MP3_FRAME_LENGTH - 4)] * count
+    if first is not None:
+        frames[0] = (MP3_HEADER + first).ljust(MP3_FRAME_LENGTH, b'\x00')
+    return b''.join(frames)
+
+
+def id3_tag(size):
+    syncsafe = bytes((size >> shift) & 0x7F for shift in (21, 14, 7, 0))
+    return b'ID3\x04\x00\x00' + syncsafe + bytes(size)
+
+
+def atom(kind, payload):
+    return struct.pack('>I4s', 8 + len(payload), kind) + payload
+
+
+def mp4_file(timescale, duration, sample_rate, channels):
+    mvhd = atom(b'mvhd', bytes(12) + struct.pack('>II', timescale, duration) + bytes(80))
+    entry = atom(b'mp4a', bytes(6) + struct.pack('>H', 1) + bytes(8)
+                 + struct.pack('>HHHHI', channels, 16, 0, 0, sample_rate << 16))
+    stsd = atom(b'stsd', struct.pack('>II', 0, 1) + entry)
+    trak = atom(b'trak', atom(b'mdia', atom(b'minf', atom(b'stbl', stsd))))
+    return atom(b'ftyp', b'M4A \x00\x00\x00\x00') + atom(b'moov', mvhd + trak) + atom(b'mdat', bytes(1000))
+
+
+def test_cbr_mp3_after_an_id3_tag(tmp_path):
+    path = tmp_path / 'episode.mp3'
+    # 384 frames of 417 bytes at 128 kbps: 160128 bytes, ten seconds
+    path.write_bytes(id3_tag(2000) + mp3_frames(384))
+    meta = audio_meta.probe(str(path))
+    assert meta == {'duration_seconds': 10, 'bitrate': 128000, 'sample_rate': 44100,
+                    'channels': 2, 'byte_size': 2010 + 384 * MP3_FRAME_LENGTH}
+
+
+def test_vbr_mp3_uses_the_xing_frame_count(tmp_path):
+    path = tmp_path / 'episode.mp3'
+    # Side info of an MPEG-1 stereo frame is 32 bytes; the Xing header follows it
+    xing = bytes(32) + b'Xing' + struct.pack('>II', 1, 2297)
+    path.write_bytes(mp3_frames(50, first=xing))
+    meta = audio_meta.probe(str(path))
+    # 2297 frames of 1152 samples at 44.1 kHz
+    assert meta['duration_seconds'] == 60
+    assert meta['sample_rate'] == 44100
+
+
+def test_wav(tmp_path):
+    path = tmp_path / 'episode.wav'
+    with wave.open(str(path), 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(8000)
+        f.writeframes(bytes(2 * 8000 * 3))
+    meta = audio_meta.probe(str(path))
+    assert (meta['duration_seconds'], meta['bitrate'], meta['sample_rate'], meta['channels']) == (3, 128000, 8000, 1)
+
+
+def test_m4a(tmp_path):
+    path = tmp_path / 'episode.m4a'
+    path.write_bytes(mp4_file(timescale=1000, duration=95_400, sample_rate=48000, channels=2))
+    meta = audio_meta.probe(str(path))
+    assert (meta['duration_seconds'], meta['sample_rate'], meta['channels']) == (95, 48000, 2)
+    assert meta['byte_size'] == path.stat().st_size
+
+
+def test_mislabelled_file_is_probed_by_its_content(tmp_path):
+    path = tmp_path / 'episode.mp3'
+    path.write_bytes(mp4_file(timescale=600, duration=6000, sample_rate=44100, channels=1))
+    assert audio_meta.probe(str(path))['duration_seconds'] == 10
+
+
+def test_unknown_content_gives_no_metadata(tmp_path):
+    path = tmp_path / 'notes.mp3'
+    path.write_bytes(b'not audio at all' * 100)
+    assert audio_meta.probe(str(path)) is None
+
+
+def test_format_duration():
+    assert audio_meta.format_duration(None) == ''
+    assert audio_meta.format_duration(59) == '0:59'
+    assert audio_meta.format_duration(3725) == '1:02:05'
+
+
+def test_metadata_job_fills_in_the_episode(app, database, tmp_path):
+    from extensions import content_store
+    from models import PodcastEpisode
+    from tasks import extract_audio_metadata
+
+    source = tmp_path / 'episode.wav'
+    with wave.open(str(source), 'wb') as f:
+        f.setnchannels(2)
+        f.setsampwidth(2)
+        f.setframerate(44100)
+        f.writeframes(bytes(4 * 44100 * 65))
+    with app.app_context():
+        staged = content_store.temp_path()
+        source.replace(staged)
+        audio_url = content_store.adopt(staged, 'ab' * 32, '.wav')
+        episode = PodcastEpisode(title='Episode', description='About it', episode_number=1,
+                                 image_url='/static/images/cover.jpg', audio_url=audio_url)
+        database.session.add(episode)
+        database.session.commit()
+        extract_audio_metadata(episode.id)
+        episode = database.session.get(PodcastEpisode, episode.id)
+        assert (episode.duration_seconds, episode.duration, episode.sample_rate) == (65, '1:05', 44100)
+        assert episode.bitrate == 1411200
@@ -0,0 +1,57 @@
+# test_audio_serving.py - Episode audio with ranges and validators
+import hashlib
+from datetime import datetime
+
+from extensions import content_store
+from models import PodcastEpisode
+
+AUDIO = bytes(range(256)) * 40
+
+
+def add_episode(app, database, is_published=True):
+    with app.app_context():
+        staged = content_store.temp_path()
+        with open(staged, 'wb') as f:
+            f.write(AUDIO)
+        audio_url = content_store.adopt(staged, hashlib.sha256(AUDIO).hexdigest(), '.mp3')
+        episode = PodcastEpisode(title='Episode', description='About it', episode_number=1,
+                                 image_url='/static/images/cover.jpg', audio_url=audio_url,
+                                 publish_date=datetime(2024, 1, 1), is_published=is_published)
+        database.session.add(episode)
+        database.session.commit()
+        return episode.id
+
+
+def test_range_request_gets_partial_content(app, database, client):
+    episode_id = add_episode(app, database)
+    response = client.get(f'/episode/{episode_id}/audio', headers={'Range': 'bytes=100-199'})
+    assert response.status_code == 206
+    assert response.headers['Content-Range'] == f'bytes 100-199/{len(AUDIO)}'
+    assert response.data == AUDIO[100:200]
+    assert response.headers['Accept-Ranges'] == 'bytes'
+    assert response.mimetype == 'audio/mpeg'
+
+
+def test_content_addressed_audio_is_cached_for_good_and_revalidates(app, database, client):
+    episode_id = add_episode(app, database)
+    response = client.get(f'/episode/{episode_id}/audio')
+    assert response.data == AUDIO
+    assert 'immutable' in response.headers['Cache-Control']
+    revalidated = client.get(f'/episode/{episode_id}/audio', headers={'If-None-Match': response.headers['ETag']})
+    assert revalidated.status_code == 304
+
+
+def test_unpublished_audio_is_only_served_to_admins(app, database, client, admin_client):
+    episode_id = add_episode(app, database, is_published=False)
+    assert client.get(f'/episode/{episode_id}/audio').status_code == 404
+    assert admin_client.get(f'/episode/{episode_id}/audio').status_code == 200
+    assert client.get('/episode/999/audio').status_code == 404
+
+
+def test_accel_redirect_hands_the_file_to_nginx(app, database, client, monkeypatch):
+    monkeypatch.setitem(app.config, 'AUDIO_ACCEL_REDIRECT_PREFIX', '/protected-uploads/')
+    episode_id = add_episode(app, database)
+    response = client.get(f'/episode/{episode_id}/audio')
+    digest = hashlib.sha256(AUDIO).hexdigest()
+    assert response.headers['X-Accel-Redirect'] == f'/protected-uploads/objects/{digest[:2]}/{digest}.mp3'
+    assert response.data == b''
@@ -0,0 +1,56 @@
+# test_bulk_actions.py - Bulk admin actions on messages and content
+from datetime import datetime
+
+from admin import get_dashboard_stats
+from models import STAT_COUNTERS, BlogPost, ContactMessage, content_versions, rebuild_stat_counters
+
+
+def dashboard_stats(app):
+    with app.app_context():
+        stats = get_dashboard_stats()
+    return {name: stats[name] for name in STAT_COUNTERS}
+
+
+def recounted_stats(app):
+    with app.app_context():
+        return rebuild_stat_counters()
+
+
+def add_rows(app, database):
+    with app.app_context():
+        for i in range(4):
+            database.session.add(ContactMessage(name='Visitor', email=f'visitor{i % 2}@example.com',
+                                                subject=f'Subject {i}', message='Hello'))
+            database.session.add(BlogPost(title=f'Post {i}', excerpt='excerpt', content='content',
+                                          image='/static/images/post.jpg', author='author',
+                                          publish_date=datetime(2024, 1, 1 + i)))
+        database.session.commit()
+        return [message.id for message in ContactMessage.query.order_by(ContactMessage.id)], \
+            [post.id for post in BlogPost.query.order_by(BlogPost.id)]
+
+
+def test_bulk_message_actions_keep_the_counters_exact(app, database, admin_client):
+    dashboard_stats(app)
+    message_ids, _ = add_rows(app, database)
+    admin_client.post('/admin/messages/bulk', data={'action': 'mark_read', 'ids': message_ids[:3]})
+    # Already read rows must not be counted twice
+    admin_client.post('/admin/messages/bulk', data={'action': 'mark_read', 'ids': message_ids[:2]})
+    assert dashboard_stats(app)['unread_messages'] == 1
+    admin_client.post('/admin/messages/bulk', data={'action': 'delete', 'scope': 'filter',
+                                                    'email': 'visitor0@example.com'})
+    stats = dashboard_stats(app)
+    assert (stats['messages'], stats['unread_messages']) == (2, 1)
+    assert stats == recounted_stats(app)
+
+
+def test_bulk_delete_updates_counters_versions_and_pages(app, database, admin_client, client):
+    dashboard_stats(app)
+    _, post_ids = add_rows(app, database)
+    assert b'Post 0' in client.get('/blog').data
+    with app.app_context():
+        version = content_versions(['blog'])['blog']
+    admin_client.post('/admin/blog/bulk', data={'action': 'delete', 'ids': post_ids[:1]})
+    with app.app_context():
+        assert content_versions(['blog'])['blog'] == version + 1
+    assert dashboard_stats(app)['blog_posts'] == 3
+    assert b'Post 0' not in client.get('/blog').data
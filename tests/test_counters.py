@@ -0,0 +1,59 @@
+# test_counters.py - Cached dashboard counters
+from datetime import datetime
+
+from admin import get_dashboard_stats
+from models import STAT_COUNTERS, BlogPost, ContactMessage, rebuild_stat_counters
+
+
+def dashboard_stats(app):
+    with app.app_context():
+        stats = get_dashboard_stats()
+    return {name: stats[name] for name in STAT_COUNTERS}
+
+
+def recounted_stats(app):
+    with app.app_context():
+        return rebuild_stat_counters()
+
+
+def test_counters_follow_orm_writes(app, database, admin_client):
+    dashboard_stats(app)  # starts the counters
+    with app.app_context():
+        for i in range(4):
+            database.session.add(ContactMessage(name='Visitor', email='visitor@example.com',
+                                                subject=f'Subject {i}', message='Hello'))
+            database.session.add(BlogPost(title=f'Post {i}', excerpt='excerpt', content='content',
+                                          image='/static/images/post.jpg', author='author',
+                                          publish_date=datetime(2024, 1, 1 + i)))
+        database.session.commit()
+    stats = dashboard_stats(app)
+    assert (stats['messages'], stats['unread_messages'], stats['blog_posts']) == (4, 4, 4)
+    assert stats == recounted_stats(app)
+
+
+def test_reading_and_deleting_messages_moves_the_unread_count(app, database, admin_client):
+    dashboard_stats(app)
+    with app.app_context():
+        for i in range(3):
+            database.session.add(ContactMessage(name='Visitor', email='visitor@example.com',
+                                                subject=f'Subject {i}', message='Hello'))
+        database.session.commit()
+        first, second, _ = ContactMessage.query.order_by(ContactMessage.id).all()
+        first.is_read = True
+        database.session.commit()
+        # Saving a read message again, or deleting one, must not count it as unread twice
+        first.subject = 'Edited'
+        database.session.delete(second)
+        database.session.commit()
+    stats = dashboard_stats(app)
+    assert (stats['messages'], stats['unread_messages']) == (2, 1)
+    assert stats == recounted_stats(app)
+
+
+def test_missing_counters_are_rebuilt_from_the_tables(app, database, admin_client):
+    with app.app_context():
+        database.session.add(ContactMessage(name='Visitor', email='visitor@example.com',
+                                            subject='Subject', message='Hello'))
+        database.session.commit()
+    # No counter rows yet, as on the first dashboard view after a deploy
+    assert dashboard_stats(app)['messages'] == 1
@@ -0,0 +1,35 @@
+# test_cursors.py - Keyset cursors and the paged JSON API
+from datetime import datetime, timedelta
+
+from helpers import decode_cursor, encode_cursor
+from models import BlogPost
+
+
+def test_cursor_round_trip(app):
+    position = (datetime(2024, 5, 1, 12, 30), 42)
+    with app.test_request_context():
+        assert decode_cursor(encode_cursor(*position)) == position
+
+
+def test_malformed_cursor_is_a_bad_request(client):
+    assert client.get('/api/blog?after=not-a-cursor').status_code == 400
+    assert client.get('/blog?after=%%%').status_code == 400
+
+
+def test_pages_cover_every_post_once_newest_first(app, database, client, monkeypatch):
+    monkeypatch.setitem(app.config, 'ITEMS_PER_PAGE', 4)
+    with app.app_context():
+        # Several posts share a publish date, so the id breaks the tie
+        for i in range(10):
+            database.session.add(BlogPost(title=f'Post {i}', excerpt='excerpt', content='content',
+                                          image='/static/images/post.jpg', author='author',
+                                          publish_date=datetime(2024, 1, 1) + timedelta(days=i // 3)))
+        database.session.commit()
+    titles, cursor = [], None
+    while True:
+        page = client.get('/api/blog', query_string={'after': cursor} if cursor else {}).get_json()
+        titles += [item['title'] for item in page['items']]
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    assert titles == [f'Post {i}' for i in (9, 8, 7, 6, 5, 4, 3, 2, 1, 0)]
@@ -0,0 +1,51 @@
+# test_db_pool.py - Pool settings from the environment and pool statistics
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import NullPool
+
+from db_pool import PoolStats, TimedQueuePool, engine_options_from_env
+
+POSTGRES = 'postgresql+psycopg://app@db/barz'
+
+
+def test_sqlite_keeps_sqlalchemy_defaults():
+    assert engine_options_from_env('sqlite:///app.db', {'DB_POOL_SIZE': '50'}) == {}
+
+
+def test_pool_is_sized_from_the_environment():
+    options = engine_options_from_env(POSTGRES, {'DB_POOL_SIZE': '3', 'DB_MAX_OVERFLOW': '2',
+                                                 'DB_POOL_TIMEOUT': '1.5', 'DB_POOL_PRE_PING': 'off'})
+    assert options['poolclass'] is TimedQueuePool
+    assert (options['pool_size'], options['max_overflow'], options['pool_timeout']) == (3, 2, 1.5)
+    assert options['pool_pre_ping'] is False
+    assert options['pool_use_lifo'] is True
+
+
+def test_pgbouncer_mode_disables_prepared_statements():
+    options = engine_options_from_env(POSTGRES, {'DB_POOL_DISABLED': '1', 'DB_PGBOUNCER': '1',
+                                                 'DB_APPLICATION_NAME': 'barz-web'})
+    assert options['poolclass'] is NullPool
+    assert options['connect_args'] == {'prepare_threshold': None, 'application_name': 'barz-web'}
+
+
+def test_stats_count_checkouts_waits_and_timeouts(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=TimedQueuePool,
+                           pool_size=1, max_overflow=0, pool_timeout=0.05)
+    stats = PoolStats(engine)
+    with engine.connect() as connection:
+        connection.execute(text('select 1'))
+        assert stats.snapshot()['checked_out'] == 1
+        with pytest.raises(PoolTimeout):
+            engine.connect()
+    snapshot = stats.snapshot()
+    assert (snapshot['connects'], snapshot['checkouts'], snapshot['timeouts']) == (1, 1, 1)
+    assert snapshot['wait_seconds_max'] >= 0.05
+    assert (snapshot['size'], snapshot['checked_out'], snapshot['checked_in']) == (1, 0, 1)
+    stats.reset_after_fork()
+    assert stats.snapshot()['checkouts'] == 0
+
+
+def test_admin_can_read_the_pool_stats(admin_client, client):
+    assert admin_client.get('/admin/pool-stats').get_json()['pid'] > 0
+    assert client.get('/admin/pool-stats').status_code == 401
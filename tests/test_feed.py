@@ -0,0 +1,78 @@
+# test_feed.py - The pre-rendered podcast feed
+import os
+import xml.etree.ElementTree as ET
+from datetime import datetime
+
+from models import PodcastEpisode
+from tasks import build_feed, feed_page_path
+
+ATOM = '{http://www.w3.org/2005/Atom}link'
+ITUNES_DURATION = '{http://www.itunes.com/dtds/podcast-1.0.dtd}duration'
+
+
+def add_episodes(app, database, count, **fields):
+    with app.app_context():
+        for number in range(1, count + 1):
+            database.session.add(PodcastEpisode(**dict({
+                'title': f'Episode {number}', 'description': 'About it', 'episode_number': number,
+                'image_url': '/static/images/cover.jpg', 'audio_url': f'/static/uploads/episode{number}.mp3',
+                'publish_date': datetime(2024, 1, number)}, **fields)))
+        database.session.commit()
+
+
+def channel(response):
+    assert response.status_code == 200
+    return ET.fromstring(response.data).find('channel')
+
+
+def links(feed_channel):
+    return {link.get('rel'): link.get('href') for link in feed_channel.findall(ATOM)}
+
+
+def test_feed_lists_published_episodes_newest_first(app, database, client):
+    add_episodes(app, database, 2, duration_seconds=1805, byte_size=1234)
+    add_episodes(app, database, 1, title='Draft', is_published=False)
+    response = client.get('/feed.xml')
+    assert response.mimetype == 'application/rss+xml'
+    items = channel(response).findall('item')
+    assert [item.findtext('title') for item in items] == ['Episode 2', 'Episode 1']
+    enclosure = items[0].find('enclosure')
+    assert enclosure.get('url').startswith('http://localhost:5000/')
+    assert (enclosure.get('length'), enclosure.get('type')) == ('1234', 'audio/mpeg')
+    assert items[0].findtext(ITUNES_DURATION) == '1805'
+    assert items[0].findtext('pubDate') == 'Tue, 02 Jan 2024 00:00:00 +0000'
+
+
+def test_feed_pages_link_to_each_other(app, database, client, monkeypatch):
+    monkeypatch.setitem(app.config, 'FEED_PAGE_SIZE', 2)
+    add_episodes(app, database, 5)
+    with app.app_context():
+        assert build_feed() == 3
+    first = channel(client.get('/feed.xml'))
+    assert links(first)['next'] == 'http://localhost:5000/feed-2.xml'
+    assert 'previous' not in links(first)
+    second = channel(client.get('/feed-2.xml'))
+    assert [item.findtext('title') for item in second.findall('item')] == ['Episode 3', 'Episode 2']
+    assert links(second)['previous'] == 'http://localhost:5000/feed.xml'
+    last = channel(client.get('/feed-3.xml'))
+    assert 'next' not in links(last)
+    assert client.get('/feed-4.xml').status_code == 404
+
+
+def test_shorter_catalogue_drops_the_extra_pages(app, database, monkeypatch):
+    monkeypatch.setitem(app.config, 'FEED_PAGE_SIZE', 2)
+    add_episodes(app, database, 5)
+    with app.app_context():
+        build_feed()
+        PodcastEpisode.query.filter(PodcastEpisode.episode_number > 2).delete()
+        database.session.commit()
+        assert build_feed() == 1
+        assert not os.path.exists(feed_page_path(2))
+
+
+def test_unchanged_feed_keeps_its_validators(app, database, client):
+    add_episodes(app, database, 1)
+    first = client.get('/feed.xml')
+    with app.app_context():
+        build_feed()
+    assert client.get('/feed.xml', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
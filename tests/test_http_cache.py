@@ -0,0 +1,71 @@
+# test_http_cache.py - Response compression and conditional requests
+import gzip
+
+import brotli
+from flask import Flask
+from werkzeug.test import Client
+
+from http_cache import CompressionMiddleware
+
+PAGE = '<p>' + 'barz ' * 400 + '</p>'
+
+
+def compressed_client(body=PAGE, **headers):
+    app = Flask(__name__)
+
+    @app.route('/')
+    def page():
+        response = app.make_response(body)
+        response.headers.update(headers)
+        response.set_etag('abc')
+        return response
+
+    @app.route('/image')
+    def image():
+        return app.response_class(b'\x89PNG' * 500, mimetype='image/png')
+
+    return Client(CompressionMiddleware(app.wsgi_app, min_size=1024))
+
+
+def test_brotli_is_preferred_when_accepted():
+    response = compressed_client().get('/', headers={'Accept-Encoding': 'gzip, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert brotli.decompress(response.data).decode() == PAGE
+    assert response.headers['Content-Length'] == str(len(response.data))
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    assert response.headers['ETag'] == 'W/"abc"'
+
+
+def test_gzip_is_used_without_brotli():
+    response = compressed_client().get('/', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.data).decode() == PAGE
+
+
+def test_identity_responses_still_vary_on_accept_encoding():
+    response = compressed_client().get('/')
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_data(as_text=True) == PAGE
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    assert response.headers['ETag'] == '"abc"'
+
+
+def test_small_binary_and_no_transform_responses_are_left_alone():
+    assert 'Content-Encoding' not in compressed_client('<p>short</p>').get(
+        '/', headers={'Accept-Encoding': 'br'}).headers
+    assert 'Content-Encoding' not in compressed_client().get(
+        '/image', headers={'Accept-Encoding': 'br'}).headers
+    assert 'Content-Encoding' not in compressed_client(**{'Cache-Control': 'no-transform'}).get(
+        '/', headers={'Accept-Encoding': 'br'}).headers
+
+
+def test_page_etag_revalidates_to_304(client):
+    response = client.get('/events')
+    assert response.headers['Cache-Control'] == 'no-cache'
+    revalidated = client.get('/events', headers={'If-None-Match': response.headers['ETag']})
+    assert revalidated.status_code == 304
+    assert revalidated.data == b''
+
+
+def test_etag_depends_on_the_session(client, admin_client):
+    assert client.get('/events').get_etag() != admin_client.get('/events').get_etag()
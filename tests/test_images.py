@@ -0,0 +1,29 @@
+# test_images.py - Responsive image variants
+import os
+
+from PIL import Image
+
+import images
+
+
+def test_variants_are_written_listed_and_deleted(tmp_path):
+    original = str(tmp_path / 'abc.jpg')
+    Image.new('RGB', (600, 300), 'red').save(original)
+    written = images.generate_variants(original)
+    assert sorted(os.path.basename(path) for path in written) == [
+        'abc-160w.jpg', 'abc-160w.webp', 'abc-480w.jpg', 'abc-480w.webp', 'abc-600w.jpg', 'abc-600w.webp']
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+    with Image.open(tmp_path / 'abc-160w.jpg') as thumb:
+        assert thumb.size == (160, 80)
+    found = images.variants_for(original)
+    assert [width for _, width in found['original']] == [160, 480, 600]
+    assert [width for _, width in found['webp']] == [160, 480, 600]
+    images.delete_variants(original)
+    assert os.listdir(tmp_path) == ['abc.jpg']
+
+
+def test_a_leftover_temp_file_is_not_listed_as_a_variant(tmp_path):
+    original = str(tmp_path / 'abc.png')
+    Image.new('RGB', (200, 100)).save(original)
+    (tmp_path / 'abc-160w.png.0123abcd.tmp').write_bytes(b'partial')
+    assert images.variants_for(original) == {'original': [], 'webp': []}
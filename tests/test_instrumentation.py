@@ -0,0 +1,67 @@
+# test_instrumentation.py - Request timing, SQL metrics and the /metrics endpoint
+import logging
+
+import pytest
+from flask import Flask, render_template_string
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+
+from instrumentation import Instrumentation, normalize_statement
+
+
+@pytest.fixture
+def instrumented(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'metrics.db'}")
+    app = Flask(__name__)
+    app.config.update(INSTRUMENTATION_ENABLED=True, INSTRUMENTATION_N_PLUS_ONE=5, METRICS_TOKEN='secret')
+    instrumentation = Instrumentation(app, gauges=lambda: {'app_db_pool_checked_out': 2, 'pool_class': 'QueuePool'})
+
+    @app.route('/posts')
+    def posts():
+        with engine.connect() as connection:
+            # One query per row, as a lazy-loaded relationship would do
+            for post_id in range(6):
+                connection.execute(text('SELECT :id'), {'id': post_id})
+        return render_template_string('{{ count }} posts', count=6)
+
+    yield app, instrumentation
+    # The SQL listeners are registered on every Engine, so later tests must not see them
+    event.remove(Engine, 'before_cursor_execute', instrumentation._start_query)
+    event.remove(Engine, 'after_cursor_execute', instrumentation._finish_query)
+
+
+def scrape(app, token='secret'):
+    return app.test_client().get('/metrics', headers={'Authorization': f'Bearer {token}'})
+
+
+def test_in_lists_and_whitespace_share_one_fingerprint():
+    assert normalize_statement('SELECT *\n  FROM post WHERE id IN (?, ?, ?)') == \
+        normalize_statement('SELECT * FROM post WHERE id IN (?, ?)') == 'SELECT * FROM post WHERE id IN (...)'
+
+
+def test_response_carries_server_timing(instrumented):
+    app, _ = instrumented
+    timing = app.test_client().get('/posts').headers['Server-Timing']
+    assert timing.startswith('app;dur=')
+    assert 'db;dur=' in timing and 'desc="6 queries"' in timing
+    assert 'tpl;dur=' in timing
+
+
+def test_repeated_selects_are_flagged_as_n_plus_one(instrumented, caplog):
+    app, _ = instrumented
+    with caplog.at_level(logging.WARNING, logger='instrumentation'):
+        app.test_client().get('/posts')
+    assert 'Possible N+1 in posts: 6 runs of SELECT ?' in caplog.text
+    metrics = scrape(app).text
+    assert 'app_requests_total{endpoint="posts",method="GET",status="200"} 1' in metrics
+    assert 'app_sql_queries_total{endpoint="posts"} 6' in metrics
+    assert 'app_sql_n_plus_one_total{endpoint="posts",statement=' in metrics
+    assert 'app_request_duration_seconds_count{endpoint="posts"} 1' in metrics
+
+
+def test_metrics_need_the_token_and_include_numeric_gauges(instrumented):
+    app, _ = instrumented
+    assert scrape(app, token='wrong').status_code == 403
+    metrics = scrape(app).text
+    assert 'app_db_pool_checked_out 2' in metrics
+    assert 'pool_class' not in metrics
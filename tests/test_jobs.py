@@ -0,0 +1,24 @@
+# test_jobs.py - Job queue recovery and post-save jobs
+from datetime import datetime, timedelta
+
+from extensions import job_queue
+from helpers import enqueue_post_save_jobs
+from models import Job
+
+
+def test_stale_running_jobs_are_requeued(app, database):
+    with app.app_context():
+        stuck = Job(name='warm_pages', payload='{}', status='running', locked_by='gone:1',
+                    updated_at=datetime.utcnow() - timedelta(seconds=job_queue.stale_after + 60))
+        busy = Job(name='warm_pages', payload='{}', status='running', locked_by='alive:2',
+                   updated_at=datetime.utcnow())
+        database.session.add_all([stuck, busy])
+        database.session.commit()
+        assert job_queue.recover_stale() == 1
+        assert [job.status for job in Job.query.order_by(Job.id)] == ['queued', 'running']
+
+
+def test_pages_are_not_warmed_into_a_per_process_cache(app, database):
+    with app.test_request_context():
+        enqueue_post_save_jobs(pages=['/blog'])
+        assert Job.query.count() == 0
@@ -0,0 +1,86 @@
+# test_page_cache.py - Page cache and ETag consistency
+from datetime import datetime
+
+from models import BlogPost, HomepageVideo
+
+
+def add_post(app, db, title):
+    with app.app_context():
+        post = BlogPost(title=title, excerpt='excerpt', content='content', image='/static/images/post.jpg',
+                        author='author', publish_date=datetime.now())
+        db.session.add(post)
+        db.session.commit()
+        return post.id
+
+
+def test_second_request_is_a_cache_hit(app, database, client):
+    add_post(app, database, 'First post')
+    first = client.get('/blog')
+    second = client.get('/blog')
+    assert first.headers['X-Page-Cache'] == 'MISS'
+    assert second.headers['X-Page-Cache'] == 'HIT'
+    assert second.get_etag() == first.get_etag()
+
+
+def test_write_from_another_worker_is_not_served_stale(app, database, client):
+    add_post(app, database, 'First post')
+    cached = client.get('/blog')
+    assert b'First post' in cached.data
+    # Another worker saves a post: the version moves, but this process's cache is never invalidated
+    add_post(app, database, 'Second post')
+    fresh = client.get('/blog')
+    assert fresh.headers['X-Page-Cache'] == 'MISS'
+    assert b'Second post' in fresh.data
+    assert fresh.get_etag() != cached.get_etag()
+
+
+def test_old_etag_is_not_revalidated_after_a_write(app, database, client):
+    add_post(app, database, 'First post')
+    old_etag = client.get('/blog').get_etag()[0]
+    add_post(app, database, 'Second post')
+    response = client.get('/blog', headers={'If-None-Match': f'W/"{old_etag}"'})
+    assert response.status_code == 200
+    assert b'Second post' in response.data
+    assert client.get('/blog', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+
+def test_item_page_follows_its_content_version(app, database, client):
+    post_id = add_post(app, database, 'Original title')
+    assert b'Original title' in client.get(f'/blog/{post_id}').data
+    with app.app_context():
+        database.session.get(BlogPost, post_id).title = 'Edited title'
+        database.session.commit()
+    assert b'Edited title' in client.get(f'/blog/{post_id}').data
+
+
+def test_pages_with_pending_flashes_bypass_the_cache(app, database, client):
+    client.get('/blog')
+    client.get('/blog')
+    with client.session_transaction() as session:
+        session['_flashes'] = [('success', 'Saved')]
+    response = client.get('/blog')
+    assert 'X-Page-Cache' not in response.headers
+
+
+def test_homepage_videos_follow_edits_from_another_worker(app, database, client):
+    with app.app_context():
+        database.session.add(HomepageVideo(title='Old video', video_url='https://example.com/old'))
+        database.session.commit()
+    assert b'Old video' in client.get('/').data
+    # Saved by another worker: neither this process's video list nor its page cache is invalidated
+    with app.app_context():
+        video = HomepageVideo.query.one()
+        video.title = 'New video'
+        database.session.commit()
+    assert b'New video' in client.get('/').data
+
+
+def test_host_page_revalidates_when_the_layout_content_changes(app, database, client):
+    etag = client.get('/host').headers['ETag']
+    assert client.get('/host', headers={'If-None-Match': etag}).status_code == 304
+    with app.app_context():
+        database.session.add(HomepageVideo(title='New video', video_url='https://example.com/new'))
+        database.session.commit()
+    response = client.get('/host', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['X-Page-Cache'] == 'MISS'
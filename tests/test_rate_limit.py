@@ -0,0 +1,56 @@
+# test_rate_limit.py - Token buckets and the login limits
+import pytest
+
+from rate_limit import MemoryBucketStore, SharedBucketStore
+
+
+@pytest.fixture(params=['memory', 'shared'])
+def store(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryBucketStore()
+    return SharedBucketStore(str(tmp_path / 'buckets.sqlite'))
+
+
+def test_bucket_allows_its_burst_then_asks_to_wait(store):
+    assert store.take([('k', 2, 0.01)]) == 0
+    assert store.take([('k', 2, 0.01)]) == 0
+    assert store.take([('k', 2, 0.01)]) > 0
+
+
+def test_rejected_request_spends_no_token(store):
+    assert store.take([('ip', 2, 0.01), ('account', 1, 0.01)]) == 0
+    # The account bucket is empty, so the IP bucket must keep its last token
+    assert store.take([('ip', 2, 0.01), ('account', 1, 0.01)]) > 0
+    assert store.take([('ip', 2, 0.01)]) == 0
+
+
+def admin_login(client, address, username='admin', pin='0000'):
+    return client.post('/admin/login', data={'username': username, 'pin': pin},
+                       environ_overrides={'REMOTE_ADDR': address})
+
+
+def test_failed_logins_from_one_address_do_not_lock_out_another(client):
+    for _ in range(5):
+        assert admin_login(client, '203.0.113.1').status_code == 200
+    assert admin_login(client, '203.0.113.1').status_code == 429
+    assert admin_login(client, '198.51.100.7').status_code == 200
+
+
+def test_account_limit_does_not_use_up_the_address_limit(client):
+    for _ in range(5):
+        admin_login(client, '203.0.113.1')
+    for _ in range(5):
+        assert admin_login(client, '203.0.113.1').status_code == 429
+    # Only the five accepted attempts count against the address's ten
+    for _ in range(5):
+        assert admin_login(client, '203.0.113.1', username='someone-else').status_code == 200
+    assert admin_login(client, '203.0.113.1', username='a-third-name').status_code == 429
+
+
+def test_guesses_spread_over_many_addresses_hit_the_account_limit(client):
+    # Six addresses spend their five attempts each: the admin account's thirty for the hour
+    for host in range(1, 7):
+        for _ in range(5):
+            assert admin_login(client, f'203.0.113.{host}').status_code == 200
+    assert admin_login(client, '203.0.113.7').status_code == 429
+    assert admin_login(client, '203.0.113.7', username='someone-else').status_code == 200
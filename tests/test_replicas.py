@@ -0,0 +1,80 @@
+# test_replicas.py - Routing public reads to a replica
+import sqlite3
+
+import pytest
+from flask import Flask, request
+from flask_sqlalchemy import SQLAlchemy
+
+from replicas import ReplicaRouter, RoutingSession, replica_binds
+
+
+def seed(path, text):
+    with sqlite3.connect(path) as connection:
+        connection.execute('CREATE TABLE IF NOT EXISTS note (id INTEGER PRIMARY KEY, text TEXT)')
+        connection.execute('INSERT INTO note (text) VALUES (?)', (text,))
+
+
+@pytest.fixture
+def routed(tmp_path):
+    """An app whose primary and replica hold different rows, so responses show where they read"""
+    primary, replica = tmp_path / 'primary.db', tmp_path / 'replica.db'
+    seed(primary, 'from the primary')
+    seed(replica, 'from the replica')
+    app = Flask(__name__)
+    app.config.update(SECRET_KEY='test', SQLALCHEMY_DATABASE_URI=f'sqlite:///{primary}',
+                      SQLALCHEMY_BINDS=replica_binds(f' sqlite:///{replica} ,'), REPLICA_READ_AFTER_WRITE=60)
+    db = SQLAlchemy(app, session_options={'class_': RoutingSession})
+
+    class Note(db.Model):
+        id = db.Column(db.Integer, primary_key=True)
+        text = db.Column(db.String(100))
+
+    router = ReplicaRouter(db, {'notes'}, app)
+
+    @app.route('/notes', endpoint='notes', methods=['GET', 'POST'])
+    def notes():
+        if request.method == 'POST':
+            db.session.add(Note(text='new'))
+            db.session.commit()
+            return 'saved'
+        return db.session.get(Note, 1).text
+
+    @app.route('/admin-notes')
+    def admin_notes():
+        return db.session.get(Note, 1).text
+
+    return app, router
+
+
+def test_binds_are_parsed_from_a_comma_separated_list():
+    assert replica_binds('sqlite:///a.db, sqlite:///b.db,') == {
+        'replica_0': 'sqlite:///a.db', 'replica_1': 'sqlite:///b.db'}
+
+
+def test_public_reads_use_the_replica_and_other_endpoints_the_primary(routed):
+    client = routed[0].test_client()
+    assert client.get('/notes').text == 'from the replica'
+    assert client.get('/admin-notes').text == 'from the primary'
+
+
+def test_visitor_reads_their_own_writes_from_the_primary(routed):
+    client = routed[0].test_client()
+    assert client.post('/notes').text == 'saved'
+    assert client.get('/notes').text == 'from the primary'
+    # Other visitors keep reading from the replica
+    assert routed[0].test_client().get('/notes').text == 'from the replica'
+
+
+def test_lagging_or_unreachable_replicas_are_skipped(routed):
+    app, router = routed
+    client = app.test_client()
+    # Lag readings taken in the future stay cached for the whole test
+    router.lag['replica_0'] = (router.max_lag + 1, float('inf'))
+    assert client.get('/notes').text == 'from the primary'
+    router.lag['replica_0'] = (None, float('inf'))
+    assert client.get('/notes').text == 'from the primary'
+
+
+def test_cache_warming_can_ask_for_the_primary(routed):
+    client = routed[0].test_client()
+    assert client.get('/notes', environ_base={'db.use_primary': True}).text == 'from the primary'
@@ -0,0 +1,64 @@
+# test_search.py - Full-text search (the in-process index used off Postgres)
+from datetime import datetime
+
+from models import BlogPost, Event
+from search import highlight, parse_query, stem
+
+
+def add_post(app, database, title, content, is_published=True):
+    with app.app_context():
+        post = BlogPost(title=title, excerpt='', content=content, image='/static/images/post.jpg',
+                        author='author', publish_date=datetime(2024, 1, 1), is_published=is_published)
+        database.session.add(post)
+        database.session.commit()
+        return post.id
+
+
+def search(client, query, **args):
+    return client.get('/api/search', query_string=dict(q=query, **args)).get_json()['items']
+
+
+def test_query_syntax_stems_terms_and_excludes_minus_words():
+    assert parse_query('The Microphones -reviews') == (['microphone'], ['review'])
+    assert [stem(word) for word in ('classes', 'class', 'boxes', 'stories', 'recorded')] == [
+        'class', 'class', 'box', 'story', 'record']
+
+
+def test_title_matches_rank_above_body_matches(app, database, client):
+    body_id = add_post(app, database, 'Studio notes', 'We tried a new microphone this week.')
+    title_id = add_post(app, database, 'Choosing a microphone', 'Notes from the studio.')
+    add_post(app, database, 'Microphone draft', 'Not out yet.', is_published=False)
+    assert [hit['id'] for hit in search(client, 'microphones')] == [title_id, body_id]
+
+
+def test_every_term_is_required_and_minus_terms_exclude(app, database, client):
+    add_post(app, database, 'Live show', 'Recording the live show in Lagos.')
+    add_post(app, database, 'Live review', 'Reviewing the live album.')
+    assert [hit['title'] for hit in search(client, 'live lagos')] == ['Live show']
+    assert [hit['title'] for hit in search(client, 'live -album')] == ['Live show']
+
+
+def test_results_are_filtered_by_type_and_link_to_the_item(app, database, client):
+    post_id = add_post(app, database, 'Tour dates', 'The tour starts soon.')
+    with app.app_context():
+        database.session.add(Event(title='Tour kickoff', description='First night of the tour',
+                                   event_date=datetime(2024, 6, 1), location='Accra',
+                                   image_url='/static/images/event.jpg'))
+        database.session.commit()
+    assert {hit['type'] for hit in search(client, 'tour')} == {'blog', 'event'}
+    hits = search(client, 'tour', type='blog')
+    assert [(hit['type'], hit['url']) for hit in hits] == [('blog', f'/blog/{post_id}')]
+
+
+def test_index_follows_edits(app, database, client):
+    post_id = add_post(app, database, 'Old title', 'Nothing to see.')
+    assert search(client, 'renamed') == []
+    with app.app_context():
+        database.session.get(BlogPost, post_id).title = 'Renamed post'
+        database.session.commit()
+    assert [hit['id'] for hit in search(client, 'renamed')] == [post_id]
+
+
+def test_snippets_mark_matches_and_escape_content():
+    snippet = highlight('<b>Bold</b> claims & honest reviews', ['review'])
+    assert str(snippet) == 'Bold claims &amp; honest <mark>reviews</mark>'
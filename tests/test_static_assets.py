@@ -0,0 +1,52 @@
+# test_static_assets.py - Fingerprinted static files and stale builds
+import logging
+
+from flask import Flask, url_for
+
+import static_assets
+from static_assets import StaticAssets
+
+
+def make_app(static_folder):
+    app = Flask(__name__, static_folder=str(static_folder), static_url_path='/static')
+    app.config['SERVER_NAME'] = 'localhost'
+    return app
+
+
+def write(folder, path, text):
+    target = folder / path
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(text)
+
+
+def test_built_files_are_linked_and_served_precompressed(tmp_path):
+    write(tmp_path, 'img/logo.svg', '<svg xmlns="http://www.w3.org/2000/svg">' + ' ' * 400 + '</svg>')
+    write(tmp_path, 'css/style.css', 'body { background: url("../img/logo.svg"); }' + '\n' * 200)
+    manifest = static_assets.build(str(tmp_path))
+    assert (tmp_path / 'dist' / manifest['css/style.css']).read_text().startswith(
+        f'body {{ background: url("../{manifest["img/logo.svg"]}"); }}')
+    app = make_app(tmp_path)
+    StaticAssets(app)
+    with app.app_context():
+        url = url_for('static', filename='img/logo.svg')
+    assert url.endswith(f'/static/dist/{manifest["img/logo.svg"]}')
+    response = app.test_client().get(url, headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'immutable' in response.headers['Cache-Control']
+
+
+def test_files_changed_since_the_build_fall_back_to_unhashed_urls(tmp_path, caplog):
+    write(tmp_path, 'img/logo.svg', '<svg/>')
+    write(tmp_path, 'img/other.svg', '<svg/>')
+    write(tmp_path, 'css/style.css', 'body { background: url("../img/logo.svg"); }')
+    manifest = static_assets.build(str(tmp_path))
+    # Deployed without rebuilding: the stylesheet still points at the old logo
+    write(tmp_path, 'img/logo.svg', '<svg class="new"/>')
+    app = make_app(tmp_path)
+    with caplog.at_level(logging.WARNING, logger='static_assets'):
+        StaticAssets(app)
+    assert 'img/logo.svg, css/style.css' in caplog.text
+    with app.app_context():
+        assert url_for('static', filename='img/logo.svg') == 'http://localhost/static/img/logo.svg'
+        assert url_for('static', filename='css/style.css') == 'http://localhost/static/css/style.css'
+        assert url_for('static', filename='img/other.svg').endswith(manifest['img/other.svg'])
@@ -0,0 +1,66 @@
+# test_storage.py - Content-addressed storage: adopting and releasing objects
+import hashlib
+import os
+import time
+
+import pytest
+
+from storage import ContentStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ContentStore(str(tmp_path / 'uploads'), staging_dir=str(tmp_path / 'staging'), grace=60)
+
+
+def stage(store, data):
+    path = store.temp_path()
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path, hashlib.sha256(data).hexdigest()
+
+
+def age(store, url, seconds):
+    path = store.path_from_url(url)
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+def test_duplicate_is_adopted_onto_the_existing_object(store):
+    url = store.adopt(*stage(store, b'same bytes'), '.mp3')
+    assert store.adopt(*stage(store, b'same bytes'), '.mp3') == url
+    assert list(store.urls()) == [url]
+    assert os.listdir(store.tmp_dir) == []
+
+
+def test_release_deletes_an_unused_object_after_the_grace_period(store):
+    url = store.adopt(*stage(store, b'old bytes'), '.mp3')
+    assert not store.release(url, lambda: False)
+    age(store, url, 120)
+    assert store.release(url, lambda: False)
+    assert not os.path.exists(store.path_from_url(url))
+    assert os.listdir(os.path.dirname(store.path_from_url(url))) == []
+
+
+def test_release_keeps_an_object_adopted_again_meanwhile(store):
+    url = store.adopt(*stage(store, b'old bytes'), '.mp3')
+    age(store, url, 120)
+    # Another request re-adopts the same bytes for a row it has not committed yet
+    assert store.adopt(*stage(store, b'old bytes'), '.mp3') == url
+    assert not store.release(url, lambda: False)
+    assert os.path.exists(store.path_from_url(url))
+
+
+def test_release_rechecks_references_once_the_object_is_aside(store):
+    url = store.adopt(*stage(store, b'old bytes'), '.mp3')
+    age(store, url, 120)
+    seen = []
+
+    def in_use():
+        # Asked while the object is moved aside: an adopt() now stores its own copy
+        seen.append(os.path.exists(store.path_from_url(url)))
+        return True
+
+    assert not store.release(url, in_use)
+    assert seen == [False]
+    assert os.path.exists(store.path_from_url(url))
@@ -0,0 +1,133 @@
+# test_uploads.py - Chunked uploads and the episode form that claims them
+import hashlib
+import os
+
+from extensions import chunked_uploads, content_store
+from models import PodcastEpisode
+
+
+def upload(client, kind, filename, data, chunk_size=4):
+    started = client.post('/admin/uploads', json={'kind': kind, 'filename': filename, 'size': len(data)})
+    assert started.status_code == 201
+    upload_id = started.get_json()['id']
+    for offset in range(0, len(data), chunk_size):
+        chunk = data[offset:offset + chunk_size]
+        response = client.put(f'/admin/uploads/{upload_id}', data=chunk, headers={
+            'Content-Range': f'bytes {offset}-{offset + len(chunk) - 1}/{len(data)}'
+        })
+        assert response.status_code == 200
+    completed = client.post(f'/admin/uploads/{upload_id}/complete',
+                            json={'sha256': hashlib.sha256(data).hexdigest()})
+    assert completed.status_code == 200
+    return upload_id, completed.get_json()['url']
+
+
+def episode_form(**fields):
+    return dict({'title': 'Episode', 'description': 'About it', 'episode_number': '1',
+                 'publish_date': '2024-01-01', 'is_published': 'on'}, **fields)
+
+
+def test_upload_is_stored_under_its_hash(admin_client):
+    data = b'not really an mp3 file'
+    _, url = upload(admin_client, 'episode_audio', 'talk.mp3', data)
+    assert os.path.basename(url) == hashlib.sha256(data).hexdigest() + '.mp3'
+    assert os.path.exists(content_store.path_from_url(url))
+
+
+def test_chunk_at_the_wrong_offset_reports_the_resume_point(admin_client):
+    upload_id = admin_client.post('/admin/uploads', json={
+        'kind': 'episode_audio', 'filename': 'talk.mp3', 'size': 8
+    }).get_json()['id']
+    admin_client.put(f'/admin/uploads/{upload_id}', data=b'1234', headers={'Content-Range': 'bytes 0-3/8'})
+    response = admin_client.put(f'/admin/uploads/{upload_id}', data=b'5678', headers={'Content-Range': 'bytes 2-5/8'})
+    assert response.status_code == 409
+    assert response.get_json()['offset'] == 4
+    assert admin_client.get(f'/admin/uploads/{upload_id}').get_json()['offset'] == 4
+
+
+def test_checksum_mismatch_is_rejected(admin_client):
+    upload_id = admin_client.post('/admin/uploads', json={
+        'kind': 'episode_audio', 'filename': 'talk.mp3', 'size': 4
+    }).get_json()['id']
+    admin_client.put(f'/admin/uploads/{upload_id}', data=b'1234', headers={'Content-Range': 'bytes 0-3/4'})
+    response = admin_client.post(f'/admin/uploads/{upload_id}/complete', json={'sha256': '0' * 64})
+    assert response.status_code == 422
+
+
+def test_upload_stays_claimable_until_the_episode_is_saved(app, admin_client):
+    audio_id, audio_url = upload(admin_client, 'episode_audio', 'talk.mp3', b'audio bytes')
+    # No image: the form is rejected and the audio upload must survive for the next attempt
+    response = admin_client.post('/admin/episodes/new', data=episode_form(audio_upload_id=audio_id))
+    assert response.status_code == 302
+    assert admin_client.get(f'/admin/uploads/{audio_id}').status_code == 200
+    assert os.path.exists(content_store.path_from_url(audio_url))
+
+    image_id, image_url = upload(admin_client, 'episode_image', 'cover.png', b'image bytes')
+    response = admin_client.post('/admin/episodes/new',
+                                 data=episode_form(audio_upload_id=audio_id, image_upload_id=image_id))
+    assert response.headers['Location'].endswith('/admin/episodes')
+    with app.app_context():
+        episode = PodcastEpisode.query.one()
+        assert (episode.image_url, episode.audio_url) == (image_url, audio_url)
+    # Claimed once the row is committed
+    assert admin_client.get(f'/admin/uploads/{audio_id}').status_code == 404
+    assert admin_client.get(f'/admin/uploads/{image_id}').status_code == 404
+
+
+def test_expire_removes_abandoned_uploads(app, admin_client, monkeypatch):
+    monkeypatch.setattr(content_store, 'grace', 0)
+    partial_id = admin_client.post('/admin/uploads', json={
+        'kind': 'episode_audio', 'filename': 'talk.mp3', 'size': 8
+    }).get_json()['id']
+    admin_client.put(f'/admin/uploads/{partial_id}', data=b'1234', headers={'Content-Range': 'bytes 0-3/8'})
+    _, unclaimed_url = upload(admin_client, 'episode_audio', 'other.mp3', b'never used')
+    result = app.test_cli_runner().invoke(args=['expire-uploads', '--max-age', '0'])
+    assert 'Expired 1 completed upload' in result.output
+    assert admin_client.get(f'/admin/uploads/{partial_id}').status_code == 404
+    assert not os.path.exists(os.path.join(content_store.tmp_dir, f'{partial_id}.part'))
+    assert partial_id not in chunked_uploads._hashers
+    with app.app_context():
+        assert not os.path.exists(content_store.path_from_url(unclaimed_url))
+
+
+def test_partial_files_and_sessions_are_not_under_the_served_folder(app, admin_client):
+    upload_id = admin_client.post('/admin/uploads', json={
+        'kind': 'episode_audio', 'filename': 'talk.mp3', 'size': 8
+    }).get_json()['id']
+    admin_client.put(f'/admin/uploads/{upload_id}', data=b'1234', headers={'Content-Range': 'bytes 0-3/8'})
+    served = [name for _, _, names in os.walk(app.config['UPLOAD_FOLDER']) for name in names]
+    assert served == []
+    assert os.path.exists(os.path.join(app.config['UPLOAD_STAGING_DIR'], 'tmp', f'{upload_id}.part'))
+
+
+def test_concurrent_chunk_for_the_same_session_is_refused(app, admin_client):
+    upload_id = admin_client.post('/admin/uploads', json={
+        'kind': 'episode_audio', 'filename': 'talk.mp3', 'size': 8
+    }).get_json()['id']
+    # Another request is still streaming its chunk into the partial file
+    with chunked_uploads._locked_part(upload_id):
+        response = admin_client.put(f'/admin/uploads/{upload_id}', data=b'1234',
+                                    headers={'Content-Range': 'bytes 0-3/8'})
+        assert response.status_code == 409
+        assert admin_client.post(f'/admin/uploads/{upload_id}/complete', json={}).status_code == 409
+    assert admin_client.get(f'/admin/uploads/{upload_id}').get_json()['offset'] == 0
+
+
+def test_chunk_after_completion_is_refused(admin_client):
+    upload_id, _ = upload(admin_client, 'episode_audio', 'talk.mp3', b'12345678')
+    response = admin_client.put(f'/admin/uploads/{upload_id}', data=b'9',
+                                headers={'Content-Range': 'bytes 8-8/9'})
+    assert response.status_code == 409
+    assert response.get_json()['offset'] == 8
+
+
+def test_sweep_keeps_pending_uploads_and_deletes_orphans(app, admin_client, monkeypatch):
+    monkeypatch.setattr(content_store, 'grace', 0)
+    _, pending_url = upload(admin_client, 'episode_audio', 'talk.mp3', b'waiting for its episode')
+    orphan_id, orphan_url = upload(admin_client, 'episode_audio', 'old.mp3', b'nobody uses this')
+    chunked_uploads.claim(orphan_id)
+    result = app.test_cli_runner().invoke(args=['expire-uploads'])
+    assert 'Deleted 1 unreferenced file' in result.output
+    with app.app_context():
+        assert os.path.exists(content_store.path_from_url(pending_url))
+        assert not os.path.exists(content_store.path_from_url(orphan_url))
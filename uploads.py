@@ -0,0 +1,298 @@
+# uploads.py - Resumable chunked uploads for large media files
+import fcntl
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from werkzeug.utils import secure_filename
+
+"""
+Resumable chunked uploads.
+The browser starts an upload, PUTs the file in chunks at explicit offsets and
+then completes it. Each chunk is copied from the request stream straight into
+a partial file in the staging directory (UPLOAD_STAGING_DIR, outside the
+served uploads folder), so completing the upload is a rename instead of
+another copy, and nothing is spooled through /tmp. A request holds a lock on
+the partial file while it writes or completes, and a second request for the
+same session is turned away with a 409 rather than appending twice.
+A SHA-256 of the bytes is kept up to date as chunks arrive and becomes the
+stored file's name. A completed upload stays claimable until the row that
+uses it is committed; sessions nobody claims are removed by expire().
+"""
+
+CHUNK_READ_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    """Raised for invalid upload requests; carries the HTTP status to answer with"""
+
+    def __init__(self, message, status=400, offset=None):
+        super().__init__(message)
+        self.status = status
+        self.offset = offset
+
+
+class ChunkedUploads:
+    """Tracks upload sessions as JSON files under <staging_dir>/sessions"""
+
+    def __init__(self, store, kinds, app=None):
+        self.store = store
+        self.kinds = kinds
+        # upload_id -> (offset, hasher, stored_at); lets consecutive chunks hit the same
+        # worker without rereading the file. Missing entries are rebuilt from disk.
+        self._hashers = {}
+        self.max_age = 24 * 3600
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.max_size = int(app.config['MAX_UPLOAD_SIZE'])
+        self.meta_dir = os.path.join(app.config['UPLOAD_STAGING_DIR'], 'sessions')
+        self.max_age = float(app.config.get('UPLOAD_SESSION_MAX_AGE', 24 * 3600))
+
+    def _meta_path(self, upload_id):
+        # Upload ids are generated by us; anything else is rejected before touching the disk
+        try:
+            valid = uuid.UUID(hex=upload_id).hex == upload_id
+        except ValueError:
+            valid = False
+        if not valid:
+            raise UploadError('Unknown upload', 404)
+        return os.path.join(self.meta_dir, f'{upload_id}.json')
+
+    def _load(self, upload_id):
+        try:
+            with open(self._meta_path(upload_id)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise UploadError('Unknown upload', 404)
+
+    def _save(self, upload_id, meta):
+        path = self._meta_path(upload_id)
+        tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, path)
+
+    def _part_path(self, upload_id):
+        return os.path.join(self.store.tmp_dir, f'{upload_id}.part')
+
+    @contextmanager
+    def _locked_part(self, upload_id):
+        """Open the partial file under an exclusive lock and yield it with the current metadata.
+
+        A request that finds the lock taken gets a 409 instead of waiting: two
+        PUTs for one session would otherwise both append, and under gevent a
+        blocking lock would stall every request on the worker.
+        """
+        try:
+            f = open(self._part_path(upload_id), 'r+b')
+        except FileNotFoundError:
+            meta = self._load(upload_id)
+            raise UploadError('Upload already completed', 409, meta['size'])
+        with f:
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise UploadError('Another request is writing this upload', 409, os.fstat(f.fileno()).st_size)
+            # Reread under the lock: the request that held it may have completed the upload
+            meta = self._load(upload_id)
+            if meta['url']:
+                raise UploadError('Upload already completed', 409, meta['size'])
+            meta['offset'] = os.fstat(f.fileno()).st_size
+            yield f, meta
+
+    def start(self, kind, filename, size, allowed):
+        """Open a new upload session and return its metadata"""
+        if kind not in self.kinds:
+            raise UploadError('Unknown upload kind')
+        filename = secure_filename(filename or '')
+        if not filename or not allowed(filename):
+            raise UploadError('Invalid file type')
+        if size is None or size <= 0 or size > self.max_size:
+            raise UploadError('Invalid file size', 413 if size and size > 0 else 400)
+        upload_id = uuid.uuid4().hex
+        meta = {
+            'id': upload_id,
+            'kind': kind,
+            'filename': filename,
+            'size': size,
+            'created_at': time.time(),
+            'sha256': None,
+            'url': None
+        }
+        os.makedirs(self.meta_dir, exist_ok=True)
+        part_path = self._part_path(upload_id)
+        os.makedirs(os.path.dirname(part_path), exist_ok=True)
+        open(part_path, 'wb').close()
+        self._save(upload_id, meta)
+        meta['offset'] = 0
+        return meta
+
+    def status(self, upload_id):
+        """Return the session metadata with the number of bytes received so far"""
+        meta = self._load(upload_id)
+        if meta['url']:
+            meta['offset'] = meta['size']
+        else:
+            meta['offset'] = os.path.getsize(self._part_path(upload_id))
+        return meta
+
+    def write_chunk(self, upload_id, offset, stream, length):
+        """Append length bytes read from stream at offset; returns the new offset"""
+        with self._locked_part(upload_id) as (f, meta):
+            if offset != meta['offset']:
+                raise UploadError('Chunk does not start at the current offset', 409, meta['offset'])
+            if length is None or offset + length > meta['size']:
+                raise UploadError('Chunk exceeds the declared file size', 416, meta['offset'])
+            with self._lock:
+                cached = self._hashers.pop(upload_id, None)
+            if cached and cached[0] == offset:
+                hasher = cached[1]
+            else:
+                hasher = hashlib.sha256() if offset == 0 else None
+            written = 0
+            f.seek(offset)
+            while written < length:
+                data = stream.read(min(CHUNK_READ_SIZE, length - written))
+                if not data:
+                    break
+                f.write(data)
+                if hasher is not None:
+                    hasher.update(data)
+                written += len(data)
+            f.truncate(offset + written)
+            f.flush()
+            if hasher is not None:
+                now = time.time()
+                with self._lock:
+                    # Uploads abandoned half way would otherwise keep their hasher for good
+                    for stale_id in [key for key, entry in self._hashers.items() if now - entry[2] > self.max_age]:
+                        del self._hashers[stale_id]
+                    self._hashers[upload_id] = (offset + written, hasher, now)
+        if written != length:
+            raise UploadError('Chunk was truncated', 400, offset + written)
+        return offset + written
+
+    def _digest(self, upload_id, part_path, size):
+        with self._lock:
+            cached = self._hashers.pop(upload_id, None)
+        if cached and cached[0] == size:
+            return cached[1].hexdigest()
+        hasher = hashlib.sha256()
+        with open(part_path, 'rb') as f:
+            for data in iter(lambda: f.read(CHUNK_READ_SIZE), b''):
+                hasher.update(data)
+        return hasher.hexdigest()
+
+    def complete(self, upload_id, expected_sha256=None):
+        """Verify a fully received upload and move it into the store; returns the metadata"""
+        meta = self.status(upload_id)
+        if meta['url']:
+            return meta
+        with self._locked_part(upload_id) as (f, meta):
+            if meta['offset'] != meta['size']:
+                raise UploadError('Upload is incomplete', 409, meta['offset'])
+            part_path = self._part_path(upload_id)
+            digest = self._digest(upload_id, part_path, meta['size'])
+            if expected_sha256 and expected_sha256.lower() != digest:
+                raise UploadError('Checksum mismatch', 422, meta['offset'])
+            meta['sha256'] = digest
+            meta['url'] = self.store.adopt(part_path, digest, self.store.extension(meta['filename']))
+            # Saved under the lock, so a request that opened the partial file before the rename finds it completed
+            self._save(upload_id, {k: v for k, v in meta.items() if k != 'offset'})
+        return meta
+
+    def completed_url(self, upload_id, kind):
+        """Return the URL of a completed upload of the given kind, or None.
+
+        The session stays open, so the form can be resubmitted if saving the
+        row fails; call claim() once the row is committed.
+        """
+        try:
+            meta = self._load(upload_id)
+        except UploadError:
+            return None
+        if meta['kind'] != kind or not meta['url']:
+            return None
+        return meta['url']
+
+    def unclaimed_urls(self):
+        """URLs of completed uploads whose session has not been claimed yet"""
+        try:
+            names = os.listdir(self.meta_dir)
+        except FileNotFoundError:
+            return set()
+        urls = set()
+        for name in names:
+            upload_id, ext = os.path.splitext(name)
+            if ext != '.json':
+                continue
+            try:
+                meta = self._load(upload_id)
+            except (UploadError, ValueError):
+                continue
+            if meta['url']:
+                urls.add(meta['url'])
+        return urls
+
+    def claim(self, *upload_ids):
+        """Forget the sessions of uploads now referenced by a committed row"""
+        for upload_id in upload_ids:
+            try:
+                os.remove(self._meta_path(upload_id))
+            except (UploadError, FileNotFoundError):
+                pass
+
+    def expire(self, max_age=None):
+        """Remove sessions older than max_age seconds and their partial files.
+
+        Returns the URLs of expired uploads that were completed but never
+        claimed, for the caller to release if no row references them.
+        """
+        max_age = self.max_age if max_age is None else max_age
+        cutoff = time.time() - max_age
+        abandoned = []
+        try:
+            names = os.listdir(self.meta_dir)
+        except FileNotFoundError:
+            names = []
+        for name in names:
+            upload_id, ext = os.path.splitext(name)
+            path = os.path.join(self.meta_dir, name)
+            if ext != '.json':
+                # Leftover temporary metadata from an interrupted save
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                continue
+            try:
+                meta = self._load(upload_id)
+            except (UploadError, ValueError):
+                meta = {'created_at': os.path.getmtime(path), 'url': None}
+            if meta.get('created_at', 0) >= cutoff:
+                continue
+            if meta['url']:
+                abandoned.append(meta['url'])
+            for stale_path in (self._part_path(upload_id), path):
+                try:
+                    os.remove(stale_path)
+                except FileNotFoundError:
+                    pass
+            with self._lock:
+                self._hashers.pop(upload_id, None)
+        # Partial files whose session file is already gone
+        try:
+            part_names = os.listdir(self.store.tmp_dir)
+        except FileNotFoundError:
+            part_names = []
+        for name in part_names:
+            path = os.path.join(self.store.tmp_dir, name)
+            if name.endswith('.part') and os.path.getmtime(path) < cutoff \
+                    and not os.path.exists(os.path.join(self.meta_dir, name[:-len('.part')] + '.json')):
+                os.remove(path)
+        return abandoned
@@ -0,0 +1,325 @@
+# vendor_assets.py - Self-host the third-party fonts, icons and images the templates load
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import urllib.error
+import urllib.parse
+import urllib.request
+from xml.etree import ElementTree
+
+try:
+    from fontTools import subset
+    from fontTools.ttLib import TTFont
+except ImportError:
+    subset = TTFont = None
+
+"""
+Asset vendoring.
+Downloads the Google Fonts (latin subset only), the Ionicons the templates
+use and the images served from i.postimg.cc into static/vendor/, so the first
+paint needs nothing but our own origin. Fonts are subset further to the
+characters the site can show when fontTools is installed, and the icons are
+packed into a single SVG sprite holding only the icons named by
+{{ icon('...') }} calls in the templates. Run it once (and again after
+adding an icon), then commit static/vendor/:
+
+    pip install fonttools brotli  # optional, for subsetting
+    python vendor_assets.py
+
+Where the CDNs are unreachable, the icons and fonts can be read from local
+copies instead, e.g. the SVGs of the ionicons_python package and the
+variable fonts of the fontpkg-* packages (both mirror the upstream files;
+local fonts need fontTools):
+
+    python vendor_assets.py --icons-dir .../ionicons_python/icons \
+        --font-file '.../fontpkg_josefin_sans/files/JosefinSans[wght].ttf'
+
+Anything that cannot be fetched is left on its third-party host and listed
+in the manifest, so a partial run still moves what it can to our origin.
+The app picks the files up from static/vendor/vendor.json; without it the
+templates keep loading the assets from the third-party hosts.
+"""
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+VENDOR_DIR = os.path.join(STATIC_DIR, 'vendor')
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+
+# Family -> weights the templates use, as requested from Google Fonts
+FONT_FAMILIES = {
+    'Josefin Sans': (300, 400, 500, 600, 700),
+    'Turret Road': (400, 500, 700, 800),
+}
+# Google Fonts picks the format from the User-Agent; this one gets woff2
+FONTS_USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                    '(KHTML, like Gecko) Chrome/124.0 Safari/537.36')
+FONT_SUBSETS = {'latin'}
+# The body font is needed for first paint, so it is preloaded
+PRELOAD_FAMILIES = {'Josefin Sans'}
+ICON_URL = 'https://unpkg.com/ionicons@7.1.0/dist/svg/{name}.svg'
+ICON_CALL = re.compile(r'''icon\(\s*['"]([a-z0-9-]+)['"]\s*\)''')
+# Remote image -> (local name, selector of the style.css rule that uses it as a background)
+IMAGES = {
+    'https://i.postimg.cc/Y0nrN3zw/logo.png': ('logo.png', None),
+    'https://i.postimg.cc/kGnGvDrW/favicon.png': ('favicon.png', None),
+    'https://i.postimg.cc/4dCXsrMS/hero-title.png': ('hero-title.png', None),
+    'https://i.postimg.cc/s2GVFVnW/hero-banner.png': ('hero-banner.png', '.hero-banner'),
+    'https://i.postimg.cc/Qt21Vf8N/newsletter-bg.jpg': ('newsletter-bg.jpg', '.newsletter-card'),
+}
+# Characters kept when subsetting: printable ASCII, Latin-1 and common typographic punctuation
+SUBSET_UNICODES = (set(range(0x20, 0x7f)) | set(range(0xa0, 0x100))
+                   | {0x2013, 0x2014, 0x2018, 0x2019, 0x201c, 0x201d, 0x2022, 0x2026, 0x20ac, 0x2122})
+FONT_FACE = re.compile(r'/\*\s*([\w-]+)\s*\*/\s*@font-face\s*\{([^}]*)\}')
+SVG_NS = 'http://www.w3.org/2000/svg'
+BLACK = ('#000', '#000000', 'black')
+
+
+def fonts_css_url(families):
+    """Google Fonts stylesheet URL for the given families"""
+    query = '&'.join(
+        'family=' + urllib.parse.quote_plus(family) + ':wght@' + ';'.join(map(str, FONT_FAMILIES[family]))
+        for family in families
+    )
+    return f'https://fonts.googleapis.com/css2?{query}&display=swap'
+
+
+def fetch(url, user_agent=None):
+    request = urllib.request.Request(url, headers={'User-Agent': user_agent or 'barz-vendor-assets'})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return response.read()
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def slug(value):
+    return re.sub(r'[^a-z0-9]+', '-', value.lower()).strip('-')
+
+
+def unicode_range(codepoints):
+    """CSS unicode-range for a set of code points"""
+    ranges, start, previous = [], None, None
+    for codepoint in sorted(codepoints):
+        if start is None:
+            start = previous = codepoint
+        elif codepoint == previous + 1:
+            previous = codepoint
+        else:
+            ranges.append((start, previous))
+            start = previous = codepoint
+    if start is not None:
+        ranges.append((start, previous))
+    return ', '.join(f'U+{a:04X}' if a == b else f'U+{a:04X}-{b:04X}' for a, b in ranges)
+
+
+def subset_font(data, path):
+    """Write the font trimmed to SUBSET_UNICODES; returns the code points it covers, or None if not subset"""
+    if subset is None:
+        write(path, data)
+        return None
+    tmp_path = path + '.src'
+    write(tmp_path, data)
+    options = subset.Options()
+    options.flavor = 'woff2'
+    font = subset.load_font(tmp_path, options)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=SUBSET_UNICODES)
+    subsetter.subset(font)
+    covered = set(font.getBestCmap())
+    subset.save_font(font, path, options)
+    os.remove(tmp_path)
+    return covered
+
+
+def local_font_face(path):
+    """(family, style, weight) of a local font file; the weight is a range for variable fonts"""
+    font = TTFont(path)
+    family = font['name'].getBestFamilyName()
+    style = 'italic' if font['OS/2'].fsSelection & 1 else 'normal'
+    axes = {axis.axisTag: axis for axis in font['fvar'].axes} if 'fvar' in font else {}
+    if 'wght' in axes:
+        weight = f"{int(axes['wght'].minValue)} {int(axes['wght'].maxValue)}"
+    else:
+        weight = str(font['OS/2'].usWeightClass)
+    return family, style, weight
+
+
+def google_font_faces(families):
+    """Download the latin faces of the given families as (family, style, weight, data, unicode-range)"""
+    css = fetch(fonts_css_url(families), FONTS_USER_AGENT).decode('utf-8')
+    faces = {}  # (family, style, url) -> {'weights': [...], 'unicode_range': ...}
+    for subset_name, body in FONT_FACE.findall(css):
+        if subset_name not in FONT_SUBSETS:
+            continue
+        properties = dict(
+            (name.strip(), value.strip()) for name, _, value in
+            (line.partition(':') for line in body.split(';')) if value.strip()
+        )
+        url = re.search(r'url\(([^)]+)\)', properties['src']).group(1)
+        key = (properties['font-family'].strip('\'"'), properties['font-style'], url)
+        face = faces.setdefault(key, {'weights': [], 'unicode_range': properties['unicode-range']})
+        face['weights'].extend(int(weight) for weight in properties['font-weight'].split())
+    result = []
+    for (family, style, url), face in sorted(faces.items()):
+        weights = sorted(set(face['weights']))
+        weight = str(weights[0]) if len(weights) == 1 else f'{weights[0]} {weights[-1]}'
+        result.append((family, style, weight, fetch(url), face['unicode_range']))
+    return result
+
+
+def vendor_fonts(font_files=()):
+    """Vendor the latin faces; returns (@font-face rules, font files to preload, families left remote)"""
+    faces = []
+    for path in font_files:
+        with open(path, 'rb') as f:
+            faces.append(local_font_face(path) + (f.read(), None))
+    remote = [family for family in FONT_FAMILIES if family not in {face[0] for face in faces}]
+    if remote:
+        try:
+            faces.extend(google_font_faces(remote))
+            remote = []
+        except (urllib.error.URLError, OSError) as e:
+            print(f"⚠️  Could not download {', '.join(remote)} from Google Fonts ({e}); left remote")
+    rules, preload = [], []
+    for family, style, weight, data, source_range in faces:
+        name = f"fonts/{slug(family)}-{weight.replace(' ', '-')}{'-italic' if style == 'italic' else ''}.woff2"
+        covered = subset_font(data, os.path.join(VENDOR_DIR, *name.split('/')))
+        rules.append(
+            '@font-face {\n'
+            f"  font-family: '{family}';\n"
+            f'  font-style: {style};\n'
+            f'  font-weight: {weight};\n'
+            '  font-display: swap;\n'
+            f"  src: url('{name}') format('woff2');\n"
+            f"  unicode-range: {unicode_range(covered) if covered else source_range};\n"
+            '}\n'
+        )
+        if family in PRELOAD_FAMILIES and style == 'normal':
+            preload.append(f'vendor/{name}')
+        print(f'  {name}')
+    return rules, preload, remote
+
+
+def used_icons():
+    names = set()
+    for path in glob.glob(os.path.join(TEMPLATES_DIR, '*.html')):
+        with open(path, encoding='utf-8') as f:
+            names.update(ICON_CALL.findall(f.read()))
+    return sorted(names)
+
+
+def use_current_color(element):
+    """Let an icon element follow currentColor and --ionicon-stroke-width like the web component.
+
+    The unpkg SVGs use currentColor and set stroke-width="32" as an
+    attribute; the designer downloads (and ionicons_python) paint black,
+    through attributes or a style.
+    """
+    for name in ('stroke', 'fill'):
+        if element.get(name) in BLACK:
+            element.set(name, 'currentColor')
+    if element.get('stroke-width') == '32':
+        del element.attrib['stroke-width']
+        element.set('style', 'stroke-width: var(--ionicon-stroke-width, 32px)')
+    style = element.get('style')
+    if not style or 'var(' in style:
+        return
+    declarations = []
+    for declaration in style.split(';'):
+        name, _, value = (part.strip() for part in declaration.partition(':'))
+        if name in ('stroke', 'fill') and value in BLACK:
+            value = 'currentColor'
+        elif name == 'stroke-width' and value in ('32', '32px'):
+            value = 'var(--ionicon-stroke-width, 32px)'
+        if name:
+            declarations.append(f'{name}: {value}')
+    element.set('style', '; '.join(declarations))
+
+
+def vendor_icons(names, icons_dir=None):
+    """Pack the named Ionicons into one sprite of <symbol> elements; returns False if any is unavailable"""
+    ElementTree.register_namespace('', SVG_NS)
+    sprite = ElementTree.Element(f'{{{SVG_NS}}}svg')
+    for name in names:
+        try:
+            if icons_dir:
+                with open(os.path.join(icons_dir, f'{name}.svg'), 'rb') as f:
+                    data = f.read()
+            else:
+                data = fetch(ICON_URL.format(name=name))
+        except (urllib.error.URLError, OSError) as e:
+            # The web component cannot be mixed with the sprite, so icons are vendored all or nothing
+            print(f'⚠️  Could not load icon {name} ({e}); icons left on unpkg')
+            return False
+        icon = ElementTree.fromstring(data)
+        symbol = ElementTree.SubElement(sprite, f'{{{SVG_NS}}}symbol', id=name, viewBox=icon.get('viewBox'))
+        for child in icon:
+            for element in child.iter():
+                use_current_color(element)
+            symbol.append(child)
+    path = os.path.join(VENDOR_DIR, 'icons.svg')
+    write(path, ElementTree.tostring(sprite, encoding='utf-8'))
+    print(f'  icons.svg ({len(names)} icons)')
+    return True
+
+
+def vendor_images():
+    """Download the images; returns (remote URL -> static path, background overrides)"""
+    images, overrides = {}, []
+    for url, (name, selector) in IMAGES.items():
+        try:
+            data = fetch(url)
+        except (urllib.error.URLError, OSError) as e:
+            print(f'⚠️  Could not download {url} ({e}); left remote')
+            continue
+        write(os.path.join(VENDOR_DIR, 'images', name), data)
+        images[url] = f'vendor/images/{name}'
+        if selector:
+            overrides.append(f"{selector} {{ background-image: url('images/{name}'); }}\n")
+        print(f'  images/{name}')
+    return images, overrides
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Self-host the third-party fonts, icons and images the templates load.')
+    parser.add_argument('--skip-fonts', action='store_true', help='leave the fonts on Google Fonts')
+    parser.add_argument('--icons-dir', help='read the Ionicons SVGs from this directory instead of unpkg')
+    parser.add_argument('--font-file', action='append', default=[],
+                        help='use this local font file for its family instead of Google Fonts (repeatable)')
+    args = parser.parse_args()
+
+    if args.font_file and TTFont is None:
+        print('❌ --font-file needs fontTools: pip install fonttools brotli')
+        return 1
+    if subset is None:
+        print('⚠️  fontTools is not installed: fonts are kept as Google serves them, without subsetting')
+    icons = used_icons()
+    icons_vendored = vendor_icons(icons, args.icons_dir)
+    images, overrides = vendor_images()
+    rules, preload, remote_families = ([], [], list(FONT_FAMILIES)) if args.skip_fonts \
+        else vendor_fonts(args.font_file)
+    stylesheet = '/* Generated by vendor_assets.py; loaded after style.css */\n\n' + '\n'.join(rules + overrides)
+    write(os.path.join(VENDOR_DIR, 'vendor.css'), stylesheet.encode('utf-8'))
+    manifest = {
+        'stylesheet': 'vendor/vendor.css',
+        'fonts': bool(rules),
+        # Families that could not be vendored are still loaded from Google Fonts
+        'fonts_css': fonts_css_url(remote_families) if rules and remote_families else None,
+        'preload': preload,
+        'icons': 'vendor/icons.svg' if icons_vendored else None,
+        'icon_names': icons if icons_vendored else [],
+        'images': images,
+    }
+    write(os.path.join(VENDOR_DIR, 'vendor.json'), json.dumps(manifest, indent=1, sort_keys=True).encode('utf-8'))
+    print(f"✅ Vendored {len(manifest['icon_names'])} icons, {len(images)} images and {len(rules)} font faces "
+          f"into static/vendor")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())